@@ -0,0 +1,98 @@
+"""Ingredient icon thumbnails served as static files.
+
+The source icons in ``imgs/`` are several hundred pixels wide, but result
+cards show them at 40×40. ``build_thumbnails`` writes one 40×40 PNG per
+ingredient to ``static/thumbs/`` (served by Streamlit when
+``server.enableStaticServing`` is on; see ``.streamlit/config.toml``). Cards
+then reference the URL, and the browser downloads and caches each icon once.
+It does not receive it again inside the HTML of every card on every rerun.
+
+File names carry a hash of the source bytes and ``THUMBNAIL_VERSION``. A
+changed icon gets a new URL, so browsers never show a stale one, and an
+unchanged icon is never re-encoded. If the static folder cannot be written
+(e.g. a read-only deploy), the thumbnails are returned inline as data URIs.
+They are still a fraction of the size of the full icons.
+"""
+
+import base64
+import hashlib
+import io
+import os
+
+from .config import INGREDIENT_IMAGE_FILES, ingredient_images_dir
+
+THUMBNAIL_SIZE = 40
+# Bump when the resize settings change so existing thumbnails are rebuilt.
+THUMBNAIL_VERSION = 1
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+_THUMBS_SUBDIR = "thumbs"
+# Streamlit serves <app dir>/static/<path> at app/static/<path>.
+_STATIC_URL = "app/static"
+
+
+def make_thumbnail(source_bytes: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """Return a ``size``×``size`` PNG of an icon, scaled to fit and centred on transparency."""
+    from PIL import Image  # Installed with Streamlit.
+
+    with Image.open(io.BytesIO(source_bytes)) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((size, size), Image.LANCZOS)
+        canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    out = io.BytesIO()
+    canvas.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _slug(name: str) -> str:
+    return "".join(ch.lower() if ch.isalnum() else "-" for ch in name)
+
+
+def build_thumbnails(static_dir: str = STATIC_DIR, size: int = THUMBNAIL_SIZE, serve_static: bool = True) -> dict:
+    """Write any missing thumbnails and return ``{ingredient: image src}``.
+
+    Args:
+        static_dir (str): The app's static folder
+        size (int): Thumbnail width and height in pixels
+        serve_static (bool): False when static serving is off, to inline the thumbnails instead
+
+    Returns:
+        dict: Static URLs (``app/static/thumbs/<name>-<hash>.png``), or PNG data
+        URIs if the folder is not writable; ``""`` for missing source icons
+    """
+    imgs_dir = ingredient_images_dir()
+    thumbs_dir = os.path.join(static_dir, _THUMBS_SUBDIR)
+    writable = serve_static
+    if writable:
+        try:
+            os.makedirs(thumbs_dir, exist_ok=True)
+            writable = os.access(thumbs_dir, os.W_OK)
+        except OSError:
+            writable = False
+
+    sources = {}
+    for ingredient, filename in INGREDIENT_IMAGE_FILES.items():
+        try:
+            with open(os.path.join(imgs_dir, filename), "rb") as f:
+                source_bytes = f.read()
+        except FileNotFoundError:
+            sources[ingredient] = ""
+            continue
+        digest = hashlib.sha256(source_bytes + f"|{size}|{THUMBNAIL_VERSION}".encode()).hexdigest()[:12]
+        thumb_name = f"{_slug(ingredient)}-{digest}.png"
+        thumb_path = os.path.join(thumbs_dir, thumb_name)
+        if writable and not os.path.exists(thumb_path):
+            partial = f"{thumb_path}.{os.getpid()}.tmp"
+            try:
+                with open(partial, "wb") as f:
+                    f.write(make_thumbnail(source_bytes, size))
+                os.replace(partial, thumb_path)
+            except OSError:
+                writable = False
+        if writable:
+            sources[ingredient] = f"{_STATIC_URL}/{_THUMBS_SUBDIR}/{thumb_name}"
+        else:
+            thumb = base64.b64encode(make_thumbnail(source_bytes, size)).decode("utf-8")
+            sources[ingredient] = f"data:image/png;base64,{thumb}"
+    return sources
@@ -0,0 +1,218 @@
+"""Headless batch solving of many inventories, streamed as JSON Lines.
+
+Reads one problem per CSV row or JSONL line, solves them on a process pool
+with the same ``AlchemyOptimizer.optimize`` call the app makes, and writes one
+JSON result per line as each solve completes::
+
+    python -m src.batch all_runs.csv --output results.jsonl --workers 4
+
+Inputs:
+
+- CSV in the shape of the admin export (``all_runs.csv``): one column per
+  ingredient (count) and per loot type (importance); other columns such as
+  ``timestamp`` are ignored except ``--id-column``.
+- JSONL with either the same flat keys, or
+  ``{"id": ..., "ingredient_counts": {...}, "importance_scores": {...}}``.
+
+Missing ingredients count as 0 and missing loot types take the app's default
+importance. Only ``--workers * 4`` problems are in flight at once and
+results are written as they arrive, so memory stays flat however large the
+input is. Output lines carry the input ``row`` (0-based) and are in
+completion order unless ``--ordered`` is given. Each line's ``combos`` are in
+brewing order (``schedule_brews``) with their ``batch``, and
+``schedule_violations`` lists any step the stock cannot cover (normally none).
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .config import default_importance_scores
+from .optimizer import AlchemyOptimizer
+from .recipe_catalog import DEFAULT_EVENT, RecipeCatalog
+from .recipes import CompiledRecipes
+from .schedule import schedule_brews, verify_schedule
+from .solvers import SolverConfig
+
+_worker_optimizer = None
+
+
+def _init_worker(recipes: CompiledRecipes, solver_config: SolverConfig | None) -> None:
+    global _worker_optimizer
+    _worker_optimizer = AlchemyOptimizer(recipes, solver_config=solver_config)
+
+
+def _number(value, default):
+    if value is None or value == "":
+        return default
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def parse_problem(record: dict, recipes: CompiledRecipes) -> tuple[dict, dict]:
+    """Split one input record into ``(ingredient_counts, importance_scores)`` for ``recipes``.
+
+    Raises:
+        ValueError: If a count or importance is not a finite number, or a count is negative
+    """
+    counts = record.get("ingredient_counts", record)
+    scores = record.get("importance_scores", record)
+    ingredient_counts = {item: int(_number(counts.get(item), 0)) for item in recipes.items}
+    if any(count < 0 for count in ingredient_counts.values()):
+        raise ValueError("ingredient counts must be non-negative")
+    importance_scores = {
+        loot: _number(scores.get(loot), default_importance_scores.get(loot, 0.0)) for loot in recipes.loot_types
+    }
+    return ingredient_counts, importance_scores
+
+
+def read_records(path, id_column: str | None = None):
+    """Yield ``(row, id, record)`` from a CSV or JSONL file, one at a time ("-" reads JSONL from stdin)."""
+    if path != "-" and path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row, record in enumerate(csv.DictReader(f)):
+                yield row, record.get(id_column) if id_column else None, record
+        return
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        row = 0
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield row, record.get(id_column or "id"), record
+            row += 1
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _solve(task) -> dict:
+    """Solve one problem in a worker and reduce the output to a JSON-ready result."""
+    row, problem_id, ingredient_counts, importance_scores = task
+    output = _worker_optimizer.optimize(ingredient_counts, importance_scores)
+    scheduled = schedule_brews(output["formatted_combos"])
+    return {
+        "row": row,
+        "id": problem_id,
+        "total_score": output["total_score"],
+        "total_loot": output["total_loot"],
+        "combos": [
+            {"input1": c["input1"], "input2": c["input2"], "count": c["count"], "result": c["result"], "batch": c["batch"]}
+            for c in scheduled
+        ],
+        "schedule_violations": verify_schedule(ingredient_counts, scheduled),
+        "status": output["solver"]["solution_status"],
+        "optimal": output["solver"]["optimal"],
+    }
+
+
+def iter_results(recipes: CompiledRecipes, records, max_workers=None, solver_config=None, ordered: bool = False):
+    """Solve ``(row, id, record)`` triples and yield one result dict per record.
+
+    At most ``4 * max_workers`` problems are queued at once. Records that
+    cannot be parsed yield ``{"row", "id", "error"}`` instead of stopping the batch.
+
+    Args:
+        recipes (CompiledRecipes): The compiled recipe table
+        records (iterable): ``(row, id, record)`` triples, e.g. from ``read_records``
+        max_workers (int, optional): Pool size. Defaults to the CPU count; 1 solves in-process.
+        solver_config (SolverConfig, optional): Backend and limits for every solve
+        ordered (bool): Yield results in input order rather than completion order
+    """
+    def tasks():
+        for row, problem_id, record in records:
+            try:
+                yield (row, problem_id, *parse_problem(record, recipes))
+            except (TypeError, ValueError) as exc:
+                yield {"row": row, "id": problem_id, "error": str(exc)}
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(recipes, solver_config)
+        for task in tasks():
+            yield task if isinstance(task, dict) else _solve(task)
+        return
+
+    window = 4 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(recipes, solver_config)) as pool:
+        pending = {}  # future -> row
+        done_rows = {}  # ordered mode: finished results waiting on an earlier row
+        next_row = 0
+
+        def drain(block: bool):
+            nonlocal next_row
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED) if block else (
+                [future for future in pending if future.done()], None
+            )
+            for future in finished:
+                pending.pop(future)
+                result = future.result()
+                if not ordered:
+                    yield result
+                    continue
+                done_rows[result["row"]] = result
+            while ordered and next_row in done_rows:
+                yield done_rows.pop(next_row)
+                next_row += 1
+
+        for task in tasks():
+            if isinstance(task, dict):
+                if ordered:
+                    done_rows[task["row"]] = task
+                else:
+                    yield task
+            else:
+                pending[pool.submit(_solve, task)] = task[0]
+            # Ordered output also caps rows held back behind a slow one.
+            while len(pending) + len(done_rows) >= window and pending:
+                yield from drain(block=True)
+            yield from drain(block=False)
+        while pending:
+            yield from drain(block=True)
+        yield from drain(block=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Solve many inventories headlessly and stream JSONL results.")
+    parser.add_argument("input", help="CSV (admin export layout) or JSONL file of inventories; '-' reads JSONL from stdin")
+    parser.add_argument("--output", default="-", help="JSONL file to write; '-' writes to stdout")
+    parser.add_argument("--event", default=DEFAULT_EVENT, help="Event from the recipe catalog (see the app's Event selector)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 solves in-process)")
+    parser.add_argument("--backend", default="CBC", help="Solver backend (see src/solvers.py)")
+    parser.add_argument("--time-limit", type=float, default=20.0, help="Solver time limit per inventory, in seconds")
+    parser.add_argument("--gap", type=float, default=None, help="Relative MIP gap (e.g. 0.01); default solves to optimality")
+    parser.add_argument("--id-column", default=None, help="Input column/key copied to each result as 'id'")
+    parser.add_argument("--ordered", action="store_true", help="Write results in input order instead of as they finish")
+    args = parser.parse_args(argv)
+
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    _, recipes = RecipeCatalog(app_dir, default_importance_scores.keys()).load(args.event)
+    solver_config = SolverConfig(backend=args.backend, time_limit=args.time_limit, gap_rel=args.gap)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    solved = failed = 0
+    try:
+        results = iter_results(recipes, read_records(args.input, args.id_column), args.workers, solver_config, args.ordered)
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if "error" in result:
+                failed += 1
+            else:
+                solved += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{solved} solved, {failed} skipped", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
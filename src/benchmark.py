@@ -0,0 +1,340 @@
+"""Scalability benchmark for the optimizer pipeline.
+
+Generates synthetic recipe tables shaped like ``TT2 Alchemy Event.csv``
+(ingredients on both axes, symmetric, each cell either another ingredient or
+``"<amount> <loot type>"``) together with realistic inventories, and times
+each stage of a run the way the app performs it:
+
+- ``parse``: ``pd.read_csv`` of the table plus ``extract_loot`` on every cell
+- ``build``: ``compile_recipes`` and ``AlchemyOptimizer`` model construction
+- ``solve``: ``AlchemyOptimizer.optimize`` (no result cache)
+- ``track_inventory``: ``brew_steps`` plus ``inventory_history``
+- ``inventory_table``: ``inventory_table``, the rounded history and change list shown by ``st.dataframe``
+- ``visualization``: ``create_crafting_visualization`` from the same ``brew_steps`` record
+
+Results are written as JSON and compared against a stored baseline so a slow
+stage is caught before an event launch::
+
+    python -m src.benchmark --output benchmarks/results.json --baseline benchmarks/baseline.json
+
+``--update-baseline`` rewrites the baseline from the current run. The exit
+status is 1 when any stage regressed by more than ``--tolerance``.
+
+``--check-agreement`` instead solves random inventories on every shipped
+event table with ``--backend`` and with CBC, and exits with status 1 if the
+backend reports a plan as optimal that scores differently from CBC's::
+
+    python -m src.benchmark --check-agreement --backend Native
+"""
+
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .config import default_importance_scores
+from .graph_visualisation import create_crafting_visualization
+from .inventory_tracking import inventory_history, inventory_table
+from .optimizer import AlchemyOptimizer
+from .recipe_catalog import RecipeCatalog
+from .recipes import compile_recipes, extract_loot
+from .schedule import brew_steps
+from .solvers import SolverConfig
+
+# The event's own ingredient names; larger tables add generated ones after these.
+BASE_ITEMS = [
+    "Leaf", "Petal", "Berries", "Water", "Poison", "Crystal", "Mushroom", "Flame",
+    "Power", "Lightning", "Essence", "Scale", "Beetle", "Spirit", "Steel", "Tooth",
+]
+
+DEFAULT_SIZES = (16, 22, 50, 100, 200)
+DEFAULT_INGREDIENT_RATIOS = (0.1, 0.3)
+STAGES = ("parse", "build", "solve", "track_inventory", "inventory_table", "visualization")
+
+# Loot amounts per brew, roughly matching the ranges in the real table.
+_LOOT_AMOUNTS = {
+    "Currency": (10, 700),
+    "Crafting Shards": (1, 10),
+    "Perk Tickets": (5, 40),
+    "Skill Points": (1, 5),
+    "Eggs": (1, 5),
+    "Raid Cards": (5, 45),
+    "Wildcards": (10, 40),
+    "Common Equipment": (10, 30),
+    "Rare Equipment": (5, 15),
+    "Legendary Equipment": (1, 5),
+    "Clan Scroll": (1, 5),
+    "Fortune Scroll": (1, 10),
+    "Fortune Weapons": (1, 5),
+    "Hero Weapons": (1, 5),
+}
+
+
+def synthetic_items(n_items: int) -> list[str]:
+    """Return ``n_items`` ingredient names: the event's own first, then ``"OreA"``, ``"OreB"``, ..."""
+    items = BASE_ITEMS[:n_items]
+    k = 0
+    while len(items) < n_items:
+        suffix, rest = "", k
+        while True:
+            suffix = string.ascii_uppercase[rest % 26] + suffix
+            rest = rest // 26 - 1
+            if rest < 0:
+                break
+        items.append(f"Ore{suffix}")
+        k += 1
+    return items
+
+
+def synthetic_recipe_table(n_items: int, ingredient_ratio: float = 0.15, seed: int = 0) -> pd.DataFrame:
+    """Build a symmetric recipe table in the shape of ``TT2 Alchemy Event.csv``.
+
+    Args:
+        n_items (int): Number of ingredients (rows and columns)
+        ingredient_ratio (float): Share of cells that produce another ingredient
+            rather than loot
+        seed (int): Random seed, so every run benchmarks the same table
+
+    Returns:
+        pandas.DataFrame: Recipe cells indexed by ingredient on both axes
+    """
+    rng = random.Random(seed)
+    items = synthetic_items(n_items)
+    table = pd.DataFrame("", index=items, columns=items, dtype=object)
+    for a, first in enumerate(items):
+        for second in items[a:]:
+            roll = rng.random()
+            if roll < ingredient_ratio:
+                cell = rng.choice(items)
+            elif roll < ingredient_ratio + 0.02:
+                cell = "Event Equipment"
+            else:
+                loot = rng.choice(list(_LOOT_AMOUNTS))
+                low, high = _LOOT_AMOUNTS[loot]
+                cell = f"{rng.randint(low, high)} {loot}"
+            table.loc[first, second] = cell
+            table.loc[second, first] = cell
+    return table
+
+
+def synthetic_inventory(items, seed: int = 0, max_count: int = 60) -> dict:
+    """Return random ingredient counts like a mid-event inventory (some ingredients at zero)."""
+    rng = random.Random(seed)
+    return {item: (0 if rng.random() < 0.1 else rng.randint(1, max_count)) for item in items}
+
+
+def _time(func):
+    # As in ``timeit``: collect first and keep the collector off while timing, so
+    # garbage left by earlier cases is not charged to whichever stage trips it.
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started
+    finally:
+        gc.enable()
+
+
+def _track(output):
+    steps = brew_steps(output["ingredient_counts"], output["formatted_combos"])
+    return steps, inventory_history(steps)
+
+
+def run_case(n_items: int, ingredient_ratio: float, seed: int = 0, solver_config: SolverConfig | None = None) -> dict:
+    """Time every pipeline stage once for one synthetic table.
+
+    Returns:
+        dict: Seconds per stage (see ``STAGES``) plus the plan's ``n_brews`` and ``total_score``
+    """
+    loot_types = tuple(default_importance_scores.keys())
+    csv_text = synthetic_recipe_table(n_items, ingredient_ratio, seed).to_csv()
+    inventory = synthetic_inventory(synthetic_items(n_items), seed)
+    timings = {}
+
+    def parse():
+        table = pd.read_csv(io.StringIO(csv_text), index_col=0)
+        table.map(lambda cell: extract_loot(cell, loot_types))
+        return table
+
+    recipe_df, timings["parse"] = _time(parse)
+    optimizer, timings["build"] = _time(
+        lambda: AlchemyOptimizer(compile_recipes(recipe_df, loot_types), solver_config=solver_config)
+    )
+    output, timings["solve"] = _time(lambda: optimizer.optimize(inventory, default_importance_scores))
+    (steps, inventory_df), timings["track_inventory"] = _time(lambda: _track(output))
+    _, timings["inventory_table"] = _time(lambda: inventory_table(inventory_df))
+    _, timings["visualization"] = _time(lambda: create_crafting_visualization(steps).source)
+    timings["n_brews"] = len(output["formatted_combos"])
+    timings["total_score"] = output["total_score"]
+    return timings
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, ingredient_ratios=DEFAULT_INGREDIENT_RATIOS, repeats: int = 3, solver_config: SolverConfig | None = None) -> dict:
+    """Run every (size, ratio) case ``repeats`` times and keep the median time per stage.
+
+    Returns:
+        dict: ``{"meta": {...}, "cases": {"<size>x<ratio>": {stage: seconds, ...}}}``;
+        each case also has ``ranges``, the ``[fastest, slowest]`` run of every stage
+    """
+    solver_config = solver_config or SolverConfig()
+    cases = {}
+    for n_items in sizes:
+        for ratio in ingredient_ratios:
+            runs = [run_case(n_items, ratio, seed=0, solver_config=solver_config) for _ in range(repeats)]
+            case = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+            case["ranges"] = {stage: [min(run[stage] for run in runs), max(run[stage] for run in runs)] for stage in STAGES}
+            case["n_brews"] = runs[0]["n_brews"]
+            case["total_score"] = runs[0]["total_score"]
+            cases[f"{n_items}x{ratio}"] = case
+            print(f"{n_items:>4} ingredients, ratio {ratio}: " + ", ".join(f"{stage} {case[stage]:.3f}s" for stage in STAGES), file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": solver_config.backend,
+            "repeats": repeats,
+        },
+        "cases": cases,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.05) -> list[dict]:
+    """List the stages that got slower than the baseline by more than ``tolerance``.
+
+    A stage counts as slower only if its median is over ``tolerance`` above the
+    baseline's and its fastest run is also slower than the baseline's slowest
+    (``ranges``), so a noisy repeat on either side is not a regression.
+    Stages under ``min_seconds`` in both runs are ignored; at a few
+    milliseconds one run can differ from the next by 2x. A changed
+    ``total_score`` is reported too, since a faster stage that returns a
+    different plan is not an improvement.
+
+    Returns:
+        list[dict]: One entry per regression with ``case``, ``stage``,
+        ``baseline``, ``current`` and ``ratio``
+    """
+    regressions = []
+    for case, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(case)
+        if previous is None:
+            continue
+        for stage in STAGES:
+            before, after = previous.get(stage), current.get(stage)
+            if before is None or after is None or max(before, after) < min_seconds:
+                continue
+            fastest = current.get("ranges", {}).get(stage, [after])[0]
+            slowest = previous.get("ranges", {}).get(stage, [before])[-1]
+            if after > before * (1 + tolerance) and fastest > slowest:
+                regressions.append({"case": case, "stage": stage, "baseline": before, "current": after, "ratio": after / max(before, 1e-9)})
+        if previous.get("total_score") is not None and abs(previous["total_score"] - current["total_score"]) > 1e-6:
+            regressions.append({"case": case, "stage": "total_score", "baseline": previous["total_score"], "current": current["total_score"], "ratio": None})
+    return regressions
+
+
+def check_agreement(directory: str, solver_config: SolverConfig, cases_per_event: int = 12, seed: int = 0) -> dict:
+    """Solve random inventories on every event table in ``directory`` with ``solver_config`` and with CBC.
+
+    Returns:
+        dict: ``cases``, ``mismatches`` (one dict per case where a plan reported
+        optimal scores differently from CBC's, with ``event``, ``score``,
+        ``cbc_score`` and ``info``), ``not_optimal`` and the ``median``/``max``
+        solve seconds of each backend
+    """
+    rng = random.Random(seed)
+    catalog = RecipeCatalog(directory, default_importance_scores.keys())
+    reference = SolverConfig(backend="CBC", time_limit=None)
+    mismatches, not_optimal = [], 0
+    seconds = {"backend": [], "cbc": []}
+    for event in catalog.events():
+        _, recipes = catalog.load(event)
+        optimizer = AlchemyOptimizer(recipes, solver_config=solver_config, cache=None)
+        for _ in range(cases_per_event):
+            counts = {item: rng.choice([0, 1, 3, 8, 20, 60]) for item in recipes.items}
+            scores = {loot: rng.choice([0, 1, 3, 7.5, 50, 100]) for loot in default_importance_scores}
+            coefficients = recipes.objective(scores)
+            (plan, info), elapsed = _time(lambda: optimizer.solve(counts, scores))
+            (cbc_plan, _), cbc_elapsed = _time(lambda: optimizer.solve(counts, scores, solver=reference))
+            seconds["backend"].append(elapsed)
+            seconds["cbc"].append(cbc_elapsed)
+            score, cbc_score = float(coefficients @ plan), float(coefficients @ cbc_plan)
+            if not info["optimal"]:
+                not_optimal += 1
+            elif abs(score - cbc_score) > 1e-6 * max(1.0, abs(cbc_score)):
+                mismatches.append({"event": event, "score": score, "cbc_score": cbc_score, "info": info})
+    return {
+        "cases": len(seconds["cbc"]),
+        "mismatches": mismatches,
+        "not_optimal": not_optimal,
+        **{f"{name}_median": statistics.median(times) for name, times in seconds.items()},
+        **{f"{name}_max": max(times) for name, times in seconds.items()},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the optimizer pipeline on synthetic recipe tables.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Ingredient counts to benchmark")
+    parser.add_argument("--ratios", type=float, nargs="+", default=list(DEFAULT_INGREDIENT_RATIOS), help="Shares of ingredient-producing cells")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case; the median is kept")
+    parser.add_argument("--backend", default="CBC", help="Solver backend (see src/solvers.py)")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="Solver time limit per solve, in seconds")
+    parser.add_argument("--output", default="benchmarks/results.json", help="Where to write the results JSON")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown per stage (0.25 = 25%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore stages faster than this in both runs")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--check-agreement", action="store_true", help="Compare --backend with CBC on the shipped event tables instead")
+    args = parser.parse_args(argv)
+
+    if args.check_agreement:
+        report = check_agreement(".", SolverConfig(backend=args.backend, time_limit=args.time_limit))
+        for m in report["mismatches"]:
+            print(f"MISMATCH {m['event']}: {m['score']} vs CBC {m['cbc_score']} ({m['info']})", file=sys.stderr)
+        print(
+            f"{report['cases']} cases, {len(report['mismatches'])} mismatches, {report['not_optimal']} not optimal; "
+            f"median {report['backend_median'] * 1000:.1f} ms (CBC {report['cbc_median'] * 1000:.1f} ms), "
+            f"max {report['backend_max']:.2f}s (CBC {report['cbc_max']:.2f}s)",
+            file=sys.stderr,
+        )
+        return 1 if report["mismatches"] else 0
+
+    results = run_benchmarks(args.sizes, args.ratios, args.repeats, SolverConfig(backend=args.backend, time_limit=args.time_limit))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one", file=sys.stderr)
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_seconds)
+    for r in regressions:
+        if r["stage"] == "total_score":
+            print(f"CHANGED {r['case']}: total_score {r['baseline']} -> {r['current']}", file=sys.stderr)
+        else:
+            print(f"REGRESSION {r['case']} {r['stage']}: {r['baseline']:.3f}s -> {r['current']:.3f}s ({r['ratio']:.2f}x)", file=sys.stderr)
+    if not regressions:
+        print("No regressions against the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,52 @@
 import os
-import base64
 
-def get_ingredient_images():
-    """Return a dictionary mapping ingredients to base64 data URI image sources loaded from the local imgs folder"""
+# Default importance scores
+default_importance_scores = {
+    "Currency": 100,
+    "Crafting Shards": 1,
+    "Perk Tickets": 1,
+    "Skill Points": 1,
+    "Eggs": 1,
+    "Raid Cards": 1,
+    "Wildcards": 1,
+    "Common Equipment": 1,
+    "Rare Equipment": 1,
+    "Legendary Equipment": 1,
+    "Event Equipment": 1,
+    "Clan Scroll": 1,
+    "Fortune Scroll": 1,
+    "Fortune Weapons": 1,
+    "Hero Weapons": 1
+}
+
+# Local icon file for each ingredient, in imgs/
+INGREDIENT_IMAGE_FILES = {
+    "Leaf": "CGUuB2u - Imgur.png",
+    "Sand": "FOQ1xFS - Imgur.png",
+    "Water": "u6EWIJo - Imgur.png",
+    "Lightning": "FvsyopO - Imgur.png",
+    "Poison": "AipJ3Yt - Imgur.png",
+    "Beetle": "bdFdyx0 - Imgur.png",
+    "Tooth": "4jZrlLN - Imgur.png",
+    "Flame": "qJNRGqq - Imgur.png",
+    "Steel": "Wb606H3 - Imgur.png",
+    "Scale": "nfZPsNs - Imgur.png",
+    "Essence": "Q15uLvW - Imgur.png",
+    "Power": "Z6cupwx - Imgur.png",
+    "Shadow": "oVOhOh6 - Imgur.png",
+    "Spirit": "kcLJ0Nh - Imgur.png",
+    "Petal": "gtiQgMt - Imgur.png",
+    "Berries": "OCp0DoE - Imgur.png",
+    "Crystal": "KJvnNaG - Imgur.png",
+    "Feather": "dWg2BnN - Imgur.png",
+    "Acorn": "AOswOIi - Imgur.png",
+    "Egg": "JeqRY8x - Imgur.png",
+    "Mushroom": "lGZtYOj - Imgur.png",
+    "Pepper": "nHb35IP - Imgur.png",
+}
+
+
+def ingredient_images_dir():
     base_dir = os.path.dirname(__file__)
 
     # Support both running from repo root (imgs at root) and from within src (imgs alongside src)
@@ -10,41 +54,18 @@ def get_ingredient_images():
         os.path.join(base_dir, "imgs"),
         os.path.join(base_dir, "..", "imgs"),
     ]
-    imgs_dir = next((d for d in map(os.path.abspath, candidate_dirs) if os.path.isdir(d)), os.path.abspath(os.path.join(base_dir, "..", "imgs")))
-
-    # Map ingredient names to local filenames
-    filename_map = {
-        "Leaf": "CGUuB2u - Imgur.png",
-        "Sand": "FOQ1xFS - Imgur.png",
-        "Water": "u6EWIJo - Imgur.png",
-        "Lightning": "FvsyopO - Imgur.png",
-        "Poison": "AipJ3Yt - Imgur.png",
-        "Beetle": "bdFdyx0 - Imgur.png",
-        "Tooth": "4jZrlLN - Imgur.png",
-        "Flame": "qJNRGqq - Imgur.png",
-        "Steel": "Wb606H3 - Imgur.png",
-        "Scale": "nfZPsNs - Imgur.png",
-        "Essence": "Q15uLvW - Imgur.png",
-        "Power": "Z6cupwx - Imgur.png",
-        "Shadow": "oVOhOh6 - Imgur.png",
-        "Spirit": "kcLJ0Nh - Imgur.png",
-        "Petal": "gtiQgMt - Imgur.png",
-        "Berries": "OCp0DoE - Imgur.png",
-        "Crystal": "KJvnNaG - Imgur.png",
-        "Feather": "dWg2BnN - Imgur.png",
-        "Acorn": "AOswOIi - Imgur.png",
-        "Egg": "JeqRY8x - Imgur.png",
-        "Mushroom": "lGZtYOj - Imgur.png",
-        "Pepper": "nHb35IP - Imgur.png",
-    }
-
-    images: dict[str, str] = {}
-    for ingredient, filename in filename_map.items():
-        img_path = os.path.join(imgs_dir, filename)
+    return next((d for d in map(os.path.abspath, candidate_dirs) if os.path.isdir(d)), os.path.abspath(os.path.join(base_dir, "..", "imgs")))
+
+
+def ingredient_images_signature():
+    """Return ``(filename, size, mtime)`` per icon: a cheap cache key that changes when any icon file does."""
+    imgs_dir = ingredient_images_dir()
+    signature = []
+    for filename in INGREDIENT_IMAGE_FILES.values():
         try:
-            with open(img_path, "rb") as f:
-                b64 = base64.b64encode(f.read()).decode("utf-8")
-            images[ingredient] = f"data:image/png;base64,{b64}"
+            stat = os.stat(os.path.join(imgs_dir, filename))
+            signature.append((filename, stat.st_size, stat.st_mtime_ns))
         except FileNotFoundError:
-            images[ingredient] = ""
-    return images
\ No newline at end of file
+            signature.append((filename, None, None))
+    return tuple(signature)
+
@@ -1,19 +1,19 @@
+import hashlib
+from collections import defaultdict
 import streamlit as st
 import graphviz
-import re
-from collections import defaultdict
-from .inventory_tracking import track_inventory_from_formatted_combos, create_transition_df_from_inventory
+import numpy as np
+from .result_cache import ResultCache
+from .schedule import BrewSteps
 
+# Detail levels of the crafting graph, finest first.
+DETAIL_LEVELS = ("Every step", "By recipe", "By tier")
 
-def create_crafting_visualization(transition_df, inventory_df):
-    """
-    Create a GraphViz visualization of the crafting system with linked nodes.
-    - Ingredients are shown as squares
-    - Actions are shown as triangles with count of operations
-    - Outputs that aren't ingredients are shown as yellow squares
-    - Links outputs to subsequent inputs when they're the same item
-    - Adds final total nodes for outputs of the same type (e.g., Currency)
-    """
+# Largest graph laid out; a finer view over this budget falls back to the next coarser one.
+MAX_GRAPH_NODES = 150
+
+
+def _new_digraph():
     # Create a new directed graph
     dot = graphviz.Digraph(comment='Crafting System')
 
@@ -24,219 +24,296 @@ def create_crafting_visualization(transition_df, inventory_df):
     dot.attr(ratio='fill')  # Fill the available space
     dot.attr(size='3,4')  # Set a larger size to spread out horizontally
     dot.attr(splines='polyline')  # Use straight lines for cleaner appearance
+    return dot
 
-    # Set default node attributes for smaller sizes
-    # dot.attr('node', fontsize='20', width='1.6', height='1.4', margin='0.05,0.02')
-
-    # Get the final inventory (last row in inventory_df)
-    final_inventory = inventory_df.iloc[-1].to_dict()
-
-    # Track all unique ingredients to determine what's an ingredient vs. an output
-    all_ingredients = set()
-
-    # Track item nodes by name to reuse them
-    item_nodes = {}  # Format: {item_name: node_id}
-
-    # Track final values for each output type
-    final_values = defaultdict(int)
-    final_outputs = set()
-
-    # First pass to collect all ingredients and final values
-    for idx, row in transition_df.iterrows():
-        # Extract ingredient names (without counts)
-        input1_match = re.match(r'([A-Za-z]+)', row['input1'])
-        input2_match = re.match(r'([A-Za-z]+)', row['input2'])
-
-        if input1_match and input2_match:
-            input1_name = input1_match.group(1)
-            input2_name = input2_match.group(1)
-            all_ingredients.add(input1_name)
-            all_ingredients.add(input2_name)
-
-        # Extract output name and count
-        output1_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['output1'])
-        if output1_match:
-            if len(output1_match.groups()) > 1 and output1_match.group(2):
-                output1_name, output1_count = output1_match.groups()
-                try:
-                    final_values[output1_name] = int(float(output1_count))
-                except ValueError:
-                    final_values[output1_name] = int(float(output1_count))
-                final_outputs.add(output1_name)
-            else:
-                output1_name = output1_match.group(1)
-                final_outputs.add(output1_name)
-                final_values[output1_name] = 1
-
-    # Second pass to create the graph
-    for idx, row in transition_df.iterrows():
-        # Create unique node IDs
-        action_id = f"action_{idx}"
-
-        # Extract ingredient names and counts
-        input1_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['input1'])
-        input2_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['input2'])
-        output1_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['output1'])
-        output2_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['output2'])
-        output3_match = re.match(r'([A-Za-z]+)(?:\s+\(([^)]+)\))?', row['output3'])
-
-        if input1_match and input2_match and output1_match:
-            # Handle input1
-            input1_name = input1_match.group(1)
-            input1_count_raw = input1_match.group(2) if len(input1_match.groups()) > 1 and input1_match.group(
-                2) else "1"
-            input1_count_display = str(int(float(input1_count_raw)))
-
-            # Handle input2
-            input2_name = input2_match.group(1)
-            input2_count_raw = input2_match.group(2) if len(input2_match.groups()) > 1 and input2_match.group(
-                2) else "1"
-            input2_count_display = str(int(float(input2_count_raw)))
-
-            # Handle output1
-            output1_name = output1_match.group(1)
-            output1_count_raw = output1_match.group(2) if len(output1_match.groups()) > 1 and output1_match.group(
-                2) else "1"
-            output1_count_display = str(int(float(output1_count_raw)))
-
-            # Create or get input node IDs - use raw values for IDs to maintain node positions
-            input1_node_id = f"{input1_name}_{input1_count_raw}"
-            if input1_node_id not in item_nodes:
-                item_nodes[input1_node_id] = input1_node_id
-                dot.node(input1_node_id, f"{input1_name}\n({input1_count_display})", shape='box')
-
-            input2_node_id = f"{input2_name}_{input2_count_raw}"
-            if input2_node_id not in item_nodes:
-                item_nodes[input2_node_id] = input2_node_id
-                dot.node(input2_node_id, f"{input2_name}\n({input2_count_display})", shape='box')
-
-            # Extract the multiplier from the action
-            action_multiplier_match = re.match(r'([\d.]+)\s*x', row['action'])
-            action_multiplier = "x" + action_multiplier_match.group(1) if action_multiplier_match else ""
-
-            # Add action node (triangle) with just the multiplier
-            dot.node(action_id, action_multiplier, shape='triangle', fontsize='8')
-
-            # Connect inputs to action
-            dot.edge(item_nodes[input1_node_id], action_id)
-            dot.edge(item_nodes[input2_node_id], action_id)
-
-            # Process main output
-            output1_node_id = f"{output1_name}_{output1_count_raw}"
-            if output1_node_id not in item_nodes:
-                item_nodes[output1_node_id] = output1_node_id
-                if output1_name not in all_ingredients or output1_name in ['Currency', 'Shards', 'Perk Tickets', 'Dust',
-                                                                           'Skill']:
-                    dot.node(output1_node_id, f"{output1_name}\n({output1_count_display})",
-                             shape='box', style='filled', fillcolor='yellow')
-                else:
-                    dot.node(output1_node_id, f"{output1_name}\n({output1_count_display})", shape='box')
-
-            # Connect action to output
-            dot.edge(action_id, item_nodes[output1_node_id])
-
-            # Process output2 (updated count of input1)
-            if output2_match:
-                output2_name = output2_match.group(1)
-                output2_count_raw = output2_match.group(2) if len(output2_match.groups()) > 1 and output2_match.group(
-                    2) else "1"
-                if output2_count_raw != '0':  # Only add if count > 0
-                    output2_count_display = str(int(float(output2_count_raw)))
-                    output2_node_id = f"{output2_name}_{output2_count_raw}"
-
-                    if output2_node_id not in item_nodes:
-                        item_nodes[output2_node_id] = output2_node_id
-                        dot.node(output2_node_id, f"{output2_name}\n({output2_count_display})", shape='box')
-                        dot.edge(action_id, item_nodes[output2_node_id])
-
-            # Process output3 (updated count of input2)
-            if output3_match:
-                output3_name = output3_match.group(1)
-                output3_count_raw = output3_match.group(2) if len(output3_match.groups()) > 1 and output3_match.group(
-                    2) else "1"
-                if output3_count_raw != '0':  # Only add if count > 0
-                    output3_count_display = str(int(float(output3_count_raw)))
-                    output3_node_id = f"{output3_name}_{output3_count_raw}"
-
-                    if output3_node_id not in item_nodes:
-                        item_nodes[output3_node_id] = output3_node_id
-                        dot.node(output3_node_id, f"{output3_name}\n({output3_count_display})", shape='box')
-                        dot.edge(action_id, item_nodes[output3_node_id])
+
+def create_crafting_visualization(steps: BrewSteps, selected=None):
+    """
+    Create a GraphViz visualization of the crafting system with linked nodes.
+    - Ingredients are shown as squares
+    - Actions are shown as triangles with count of operations
+    - Outputs that aren't ingredients are shown as yellow squares
+    - Links outputs to subsequent inputs when they're the same item
+    - Adds final total nodes for outputs of the same type (e.g., Currency)
+
+    Args:
+        steps (BrewSteps): The scheduled plan
+        selected (array-like, optional): Indices of the steps to draw (e.g. from
+            ``focus_steps``); all of them by default
+    """
+    dot = _new_digraph()
+    selected = range(steps.n_steps) if selected is None else selected
+    focused = len(selected) < steps.n_steps
+
+    names = steps.items
+    inventory = steps.inventory
+    used_as_input = set(steps.inputs.ravel().tolist())
+    loot = set(steps.outputs[~steps.is_ingredient].tolist()) - {-1}
+
+    # Each item node is one version of that item's stock, named after the row
+    # where a step last wrote it, so later steps link to it by position alone.
+    written = np.zeros(inventory.shape, dtype=bool)
+    written[0] = True
+    rows = np.arange(1, steps.n_steps + 1)
+    written[np.repeat(rows, 2), steps.inputs.ravel()] = True
+    made = steps.outputs >= 0
+    written[rows[made], steps.outputs[made]] = True
+    version = np.maximum.accumulate(np.where(written, np.arange(len(inventory))[:, None], 0), axis=0)
+
+    item_nodes = set()
+
+    def item_node(column, row, **attrs):
+        node_id = f"item_{column}_{row}"
+        if node_id not in item_nodes:
+            item_nodes.add(node_id)
+            dot.node(node_id, f"{names[column]}\n({int(round(inventory[row, column]))})", shape='box', **attrs)
+        return node_id
+
+    touched = set()
+    for i in selected:
+        (a, b), output = steps.inputs[i], steps.outputs[i]
+        touched.update((a, b, output))
+        action_id = f"action_{i}"
+        input_ids = [item_node(column, version[i, column]) for column in (a, b)]
+
+        # Add action node (triangle) with just the multiplier
+        dot.node(action_id, f"x{steps.counts[i]:g}", shape='triangle', fontsize='8')
+        for input_id in input_ids:
+            dot.edge(input_id, action_id)
+
+        # Main output: yellow when it is loot or never used as an input
+        if output >= 0:
+            fill = {} if output in used_as_input else {'style': 'filled', 'fillcolor': 'yellow'}
+            dot.edge(action_id, item_node(output, i + 1, **fill))
+        else:
+            dot.node(f"result_{i}", steps.results[i], shape='box', style='filled', fillcolor='yellow')
+            dot.edge(action_id, f"result_{i}")
+
+        # Remaining stock of each input, if any
+        for column in dict.fromkeys((a, b)):
+            if column != output and inventory[i + 1, column] != 0:
+                dot.edge(action_id, item_node(column, i + 1))
 
     # Add final total nodes only for items that have a non-zero count in the final inventory
-    for item_name in final_inventory:
-        if item_name not in ["Step", "Action"]:  # Skip non-item columns
-            final_count = final_inventory[item_name]
-
-            # Only add final nodes for items with a value greater than 0 in the final inventory
-            if final_count > 0:
-                final_node_id = f"final_{item_name}"
-
-                # Always display as integer
-                final_count_display = str(int(final_count))
-
-                if item_name in ['Currency', 'Shards', 'Perk Tickets', 'Dust', 'Skill']:
-                    dot.node(final_node_id, f"FINAL {item_name}\n({final_count_display})",
-                             shape='box', style='filled', fillcolor='orange', penwidth='2')
-                elif item_name not in all_ingredients:
-                    dot.node(final_node_id, f"FINAL {item_name}\n({final_count_display})",
-                             shape='box', style='filled', fillcolor='yellow', penwidth='2')
-                else:
-                    dot.node(final_node_id, f"FINAL {item_name}\n({final_count_display})",
-                             shape='box', style='filled', fillcolor='lightblue', penwidth='2')
-
-                # Connect all nodes of this type to the final node
-                for node_id in item_nodes:
-                    if node_id.startswith(f"{item_name}_"):
-                        node_count_match = re.match(fr"{item_name}_(.+)", node_id)
-                        if node_count_match:
-                            node_count_raw = node_count_match.group(1)
-                            try:
-                                node_count_float = float(node_count_raw)
-                                if abs(node_count_float - final_count) < 0.01:
-                                    dot.edge(node_id, final_node_id, style='dashed')
-                            except ValueError:
-                                if node_count_raw == str(final_count):
-                                    dot.edge(node_id, final_node_id, style='dashed')
+    for column, final_count in enumerate(inventory[-1]):
+        if final_count <= 0 or (focused and column not in touched):
+            continue
+        if column in loot:
+            fill = 'orange'
+        elif column not in used_as_input:
+            fill = 'yellow'
+        else:
+            fill = 'lightblue'
+        final_node_id = f"final_{column}"
+        dot.node(final_node_id, f"FINAL {names[column]}\n({int(round(final_count))})",
+                 shape='box', style='filled', fillcolor=fill, penwidth='2')
+        last_id = f"item_{column}_{version[-1, column]}"
+        if last_id in item_nodes:
+            dot.edge(last_id, final_node_id, style='dashed')
 
     return dot
 
 
-def render_graph_visualization(combos_used, ingredient_counts, total_loot, formatted_combos=None):
+def focus_steps(steps: BrewSteps, item: str) -> np.ndarray:
+    """Indices of the steps that make or use ``item``, i.e. its sub-graph."""
+    column = steps.items.index(item)
+    return np.flatnonzero((steps.inputs == column).any(axis=1) | (steps.outputs == column))
+
+
+def _item_attrs(steps: BrewSteps, column):
+    # Loot, and ingredients nothing uses, are yellow, as in the step-by-step graph
+    if column in steps.inputs:
+        return {'shape': 'box'}
+    return {'shape': 'box', 'style': 'filled', 'fillcolor': 'yellow'}
+
+
+def _item_label(steps: BrewSteps, column):
+    start, end = steps.inventory[0, column], steps.inventory[-1, column]
+    return f"{steps.items[column]}\n({int(round(start))} → {int(round(end))})"
+
+
+def recipe_graph(steps: BrewSteps, selected=None):
     """
-    Create and display a graph visualization of the alchemy combinations.
+    Create a GraphViz overview with one node per item and one per recipe.
+
+    Repeated brews of a recipe are collapsed into one triangle with their total
+    count, and recipes are grouped into ingredient-producing and loot-producing
+    clusters. Edges carry the quantities used and made. Items show their stock
+    at the start and end of the plan.
+    """
+    dot = _new_digraph()
+    selected = range(steps.n_steps) if selected is None else selected
+    recipes = {}  # (input, input, output) -> [brews, made, makes an ingredient, step]
+    for i in selected:
+        (a, b), output = steps.inputs[i].tolist(), int(steps.outputs[i])
+        key = (a, b, output if output >= 0 else steps.results[i])
+        recipe = recipes.setdefault(key, [0.0, 0.0, bool(steps.is_ingredient[i]), i])
+        recipe[0] += steps.counts[i]
+        recipe[1] += steps.amounts[i]
+
+    items = set()
+    for is_ingredient, label in ((True, "Ingredient-producing brews"), (False, "Loot-producing brews")):
+        with dot.subgraph(name=f"cluster_{'ingredient' if is_ingredient else 'loot'}") as cluster:
+            cluster.attr(label=label, style='dashed', fontsize='10')
+            for (a, b, output), (brews, made, makes_ingredient, i) in recipes.items():
+                if makes_ingredient == is_ingredient:
+                    cluster.node(f"recipe_{i}", f"x{brews:g}", shape='triangle', fontsize='8')
+
+    for (a, b, output), (brews, made, _, i) in recipes.items():
+        for column in dict.fromkeys((a, b)):
+            items.add(column)
+            used = brews * (2 if a == b else 1)
+            dot.edge(f"item_{column}", f"recipe_{i}", label=str(int(round(used))), fontsize='8')
+        if isinstance(output, str):
+            dot.node(f"result_{i}", output, shape='box', style='filled', fillcolor='yellow')
+            dot.edge(f"recipe_{i}", f"result_{i}")
+        else:
+            items.add(output)
+            dot.edge(f"recipe_{i}", f"item_{output}", label=str(int(round(made))), fontsize='8')
+    for column in sorted(items):
+        dot.node(f"item_{column}", _item_label(steps, column), **_item_attrs(steps, column))
+    return dot
+
+
+def tier_graph(steps: BrewSteps, selected=None):
+    """
+    Create a GraphViz overview with one node per item and one per recipe tier.
+
+    The tiers are the ingredient-producing and the loot-producing brews; edges
+    carry the total each tier uses of or adds to an item.
+    """
+    dot = _new_digraph()
+    selected = np.arange(steps.n_steps) if selected is None else np.asarray(selected, dtype=np.int64)
+    items = set()
+    for is_ingredient, name in ((True, "Ingredient brews"), (False, "Loot brews")):
+        tier = selected[steps.is_ingredient[selected] == is_ingredient]
+        if not len(tier):
+            continue
+        tier_id = f"tier_{'ingredient' if is_ingredient else 'loot'}"
+        dot.node(tier_id, f"{name}\n({len(tier)} recipes, {steps.counts[tier].sum():g} brews)",
+                 shape='box', style='rounded,filled', fillcolor='lightgrey')
+        used = defaultdict(float)
+        made = defaultdict(float)
+        for i in tier:
+            for column in steps.inputs[i].tolist():
+                used[column] += steps.counts[i]
+            if steps.outputs[i] >= 0:
+                made[int(steps.outputs[i])] += steps.amounts[i]
+        for column, amount in used.items():
+            dot.edge(f"item_{column}", tier_id, label=str(int(round(amount))), fontsize='8')
+        for column, amount in made.items():
+            dot.edge(tier_id, f"item_{column}", label=str(int(round(amount))), fontsize='8')
+        items.update(used, made)
+    for column in sorted(items):
+        dot.node(f"item_{column}", _item_label(steps, column), **_item_attrs(steps, column))
+    return dot
+
+
+def _node_count(steps: BrewSteps, detail: str, selected) -> int:
+    """Upper bound on the nodes ``detail`` draws for the selected steps."""
+    columns = set(steps.inputs[selected].ravel().tolist()) | set(steps.outputs[selected].tolist())
+    if detail == "Every step":
+        return 4 * len(selected) + len(columns)  # action, output and both inputs' stock per step, plus finals
+    if detail == "By recipe":
+        recipes = np.column_stack([steps.inputs[selected], steps.outputs[selected]])
+        return len(np.unique(recipes, axis=0)) + len(columns)
+    return 2 + len(columns)
+
+
+def graph_view(steps: BrewSteps, detail: str = "Every step", focus: str | None = None, max_nodes: int = MAX_GRAPH_NODES):
+    """
+    Build the crafting graph at the finest detail level within the node budget.
 
     Args:
-        combos_used (list): List of tuples (combo, count, product)
-        ingredient_counts (dict): Dictionary of ingredient counts
-        total_loot (dict): Dictionary of total loot by type
-        formatted_combos (list, optional): List of dicts with formatted combo data
+        steps (BrewSteps): The scheduled plan
+        detail (str): Requested level, one of ``DETAIL_LEVELS``
+        focus (str, optional): Only draw the brews making or using this item
+        max_nodes (int): Node budget; coarser levels are tried until one fits.
+            "By tier" is always drawn, since it has at most two nodes more than
+            there are items.
+
+    Returns:
+        tuple: (graphviz.Digraph, detail level drawn)
     """
+    selected = focus_steps(steps, focus) if focus else np.arange(steps.n_steps)
+    levels = DETAIL_LEVELS[DETAIL_LEVELS.index(detail):]
+    for level in levels:
+        if level == levels[-1] or _node_count(steps, level, selected) <= max_nodes:
+            break
+    builder = {"Every step": create_crafting_visualization, "By recipe": recipe_graph, "By tier": tier_graph}[level]
+    return builder(steps, selected), level
+
+
+# Laid-out graphs, keyed by a hash of the plan: ("svg", markup) or, without the dot executable, ("dot", source).
+_graph_cache = ResultCache(maxsize=64)
+
+
+def _steps_key(steps: BrewSteps) -> str:
+    digest = hashlib.sha256("\x1f".join(steps.items + steps.results).encode("utf-8"))
+    for array in (steps.inputs, steps.counts, steps.outputs, steps.amounts, steps.inventory):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def crafting_graph(steps: BrewSteps, detail: str = "Every step", focus: str | None = None, max_nodes: int = MAX_GRAPH_NODES):
+    """
+    Return the crafting graph of a plan, laid out once per plan, view and process.
+
+    The graph comes from ``graph_view``. Its layout is rendered to SVG with
+    the Graphviz ``dot`` executable, so reruns (and other sessions showing
+    the same plan) only send the cached markup. Without the executable the
+    DOT source is cached instead and laid out in the browser, as
+    ``st.graphviz_chart`` always did.
+
+    Returns:
+        tuple: (``"svg"`` or ``"dot"``, markup or source, detail level drawn)
+    """
+    key = hashlib.sha256(f"{_steps_key(steps)}|{detail}|{focus}|{max_nodes}".encode("utf-8")).hexdigest()
+    cached = _graph_cache.get(key)
+    if cached is not None:
+        return cached
+
+    dot, level = graph_view(steps, detail, focus, max_nodes)
     try:
-        # If formatted_combos is provided, use it directly
-        if formatted_combos:
-            # Track inventory using formatted combos
-            inventory_df = track_inventory_from_formatted_combos(ingredient_counts, formatted_combos)
+        graph = ("svg", dot.pipe(format="svg", encoding="utf-8"), level)
+    except graphviz.ExecutableNotFound:
+        graph = ("dot", dot.source, level)
+    _graph_cache.put(key, graph)
+    return graph
 
-            # Create transition dataframe
-            transition_df = create_transition_df_from_inventory(inventory_df)
-        else:
-            # Use the original approach with inventory_tracking module
-            from .inventory_tracking import prepare_visualization_data
-            inventory_df, transition_df = prepare_visualization_data(combos_used, ingredient_counts)
 
-        # Create the graphviz visualization
-        dot = create_crafting_visualization(transition_df, inventory_df)
+def render_graph_visualization(steps: BrewSteps):
+    """
+    Create and display a graph visualization of the alchemy combinations.
+
+    The user picks the detail level and can focus on one item's sub-graph;
+    plans too large for the chosen level are drawn at a coarser one.
+
+    Args:
+        steps (BrewSteps): The scheduled plan, from ``brew_steps``
+    """
+    try:
+        detail_col, focus_col = st.columns(2)
+        detail = detail_col.radio("Detail", DETAIL_LEVELS, horizontal=True, key="graph_detail")
+        brewed = sorted(set(steps.items[j] for j in steps.inputs.ravel().tolist()))
+        focus = focus_col.selectbox("Focus on ingredient", ["All"] + brewed, key="graph_focus")
+        kind, graph, level = crafting_graph(steps, detail, None if focus == "All" else focus)
+        if level != detail:
+            st.caption(f"This plan is too large to draw {detail.lower()} readably; showing it {level.lower()} instead.")
 
         # Display the results with a wider configuration
         st.caption("Note: This visualization shows the flow of ingredients through the optimization process. The loot is a running total, not just from that combination.")
-        st.graphviz_chart(dot, use_container_width=True)  # Use full container width
+        if kind == "svg":
+            st.image(graph, use_container_width=True)
+        else:
+            st.graphviz_chart(graph, use_container_width=True)  # Use full container width
 
         # Add explanation of the visualization
         st.info("""
         **Visualization Legend:**
-        - **Squares**: Ingredients with their quantities
-        - **Triangles**: Combination operations with their multiplier
+        - **Squares**: Ingredients with their quantities (start → end of the plan in the recipe and tier views)
+        - **Triangles**: Combination operations with their multiplier (totals per recipe in the recipe view)
+        - **Grey boxes**: All ingredient-producing or loot-producing brews together (tier view)
         - **Yellow Squares**: Rewards/loot obtained
         - **Orange Squares**: Final totals for currency and rewards
         - **Light Blue Squares**: Final totals for ingredients
@@ -247,5 +324,3 @@ def render_graph_visualization(combos_used, ingredient_counts, total_loot, forma
     except Exception as e:
         st.error(f"Error creating visualization: {str(e)}")
         st.exception(e)
-
-    return inventory_df
\ No newline at end of file
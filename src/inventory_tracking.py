@@ -1,208 +1,102 @@
-import streamlit as st
-import graphviz
-import re
+import numpy as np
 import pandas as pd
 
-def track_inventory_from_formatted_combos(ingredient_counts, formatted_combos):
+from .schedule import BrewSteps, brew_steps
+
+
+def inventory_history(steps: BrewSteps):
     """
-    Track inventory changes using the formatted combo data from the optimizer.
+    Inventory at each step of a scheduled plan, as a DataFrame.
 
     Args:
-        ingredient_counts (dict): Dictionary of initial ingredient counts
-        formatted_combos (list): List of dicts with keys: input1, input2, count, result, is_ingredient
+        steps (BrewSteps): The plan, from ``brew_steps``
 
     Returns:
-        pandas.DataFrame: DataFrame tracking inventory at each step
+        pandas.DataFrame: Step and Action columns, then one column per item;
+        initial items that only ever hold whole numbers are int64
     """
-    import pandas as pd
-    from collections import defaultdict
-
-    # Initialize history with initial state
-    history = [{"Step": "Initial", "Action": "-", **ingredient_counts}]
+    names = steps.items
+    whole = (steps.inventory == np.round(steps.inventory)).all(axis=0)
+    columns = {
+        "Step": ["Initial"] + [f"Step {i}" for i in range(1, steps.n_steps + 1)],
+        "Action": ["-"] + [
+            f"{count:g} x ('{names[a]}', '{names[b]}') = {result}"
+            for count, (a, b), result in zip(steps.counts, steps.inputs, steps.results)
+        ],
+    }
+    for j, name in enumerate(names):
+        column = steps.inventory[:, j]
+        columns[name] = column.astype(np.int64) if j < steps.n_initial and whole[j] else column
+    return pd.DataFrame(columns)
 
-    # Start with initial inventory
-    current_inventory = ingredient_counts.copy()
-    seen_values = defaultdict(list)
 
-    # Initialize seen values tracking
-    for item, count in current_inventory.items():
-        seen_values[item].append(count)
-
-    # Sort formatted_combos: ingredient-producing first, then loot-producing
-    sorted_combos = sorted(formatted_combos, key=lambda x: not x['is_ingredient'])
-
-    # Process each combination
-    for i, combo in enumerate(sorted_combos, 1):
-        # Create a copy of the current inventory
-        new_inventory = current_inventory.copy()
-
-        # Extract combo data
-        input1, input2 = combo['input1'], combo['input2']
-        count, result = combo['count'], combo['result']
-        is_ingredient = combo['is_ingredient']
-
-        # Format action string
-        action = f"{count} x ('{input1}', '{input2}') = {result}"
-
-        # Update inputs (decrease used ingredients)
-        new_inventory[input1] = max(0, new_inventory.get(input1, 0) - count)
-        new_inventory[input2] = max(0, new_inventory.get(input2, 0) - count)
-
-        # Handle the result
-        if is_ingredient:
-            # It's an ingredient - add to inventory with unique value if needed
-            if result in new_inventory:
-                new_value = new_inventory[result] + count
+def track_inventory_from_formatted_combos(ingredient_counts, formatted_combos):
+    """
+    Track inventory changes using the formatted combo data from the optimizer.
 
-                # Ensure uniqueness by adding a small increment if needed
-                if new_value in seen_values[result]:
-                    new_value += 0.001
+    Steps follow ``schedule_brews``: every ingredient is brewed before the
+    brews that use it, then the loot brews.
 
-                new_inventory[result] = new_value
-                seen_values[result].append(new_value)
-            else:
-                new_inventory[result] = count
-                seen_values[result].append(count)
-        else:
-            # It's a loot/currency item
-            # Extract amount and loot type
-            loot_match = re.match(r"(\d+)\s*(.+)", result)
-            if loot_match:
-                amount = int(loot_match.group(1))
-                loot_type = loot_match.group(2)
+    Args:
+        ingredient_counts (dict): Dictionary of initial ingredient counts
+        formatted_combos (list): List of dicts with keys: input1, input2, count, result, is_ingredient
 
-                # Increase loot count
-                new_inventory[loot_type] = new_inventory.get(loot_type, 0) + amount * count
+    Returns:
+        pandas.DataFrame: DataFrame tracking inventory at each step
+    """
+    return inventory_history(brew_steps(ingredient_counts, formatted_combos))
 
-        # Add step to history
-        history.append({"Step": f"Step {i}", "Action": action, **new_inventory})
 
-        # Update current inventory for next iteration
-        current_inventory = new_inventory
+def _tidy_actions(actions):
+    # "3.0 x ('Leaf', 'Petal') = Bones" -> "3.0 x [Leaf + Petal = Bones]"
+    tidied = (actions.str.replace(' x ', ' x [', regex=False) + ']').str.translate(_ACTION_CHARS)
+    tidied.iloc[0] = ""
+    return tidied
 
-    # Convert to DataFrame
-    df = pd.DataFrame(history).fillna(0)
 
-    # Reorder columns to have Step and Action first
-    cols = ["Step", "Action"] + [c for c in df.columns if c not in ["Step", "Action"]]
-    return df[cols]
+_ACTION_CHARS = str.maketrans({',': ' +', "'": None, '(': None, ')': None})
 
 
-def create_transition_df_from_inventory(inventory_df):
+def inventory_changes(df):
     """
-    Create a transition DataFrame from inventory history.
+    Round an inventory history for display and find the cells that changed.
 
-    Args:
-        inventory_df (pandas.DataFrame): DataFrame with inventory history
+    - Round all numeric values to the nearest integer
+    - Tidy the Action text and blank the first row's
+    - Move the columns after Scale (loot types) right after Action
 
     Returns:
-        pandas.DataFrame: Transition DataFrame for visualization
-    """
-    import pandas as pd
-
-    transitions = []
-
-    # Iterate through steps (skip the first/initial state)
-    for i in range(1, len(inventory_df)):
-        # Get states
-        before_state = inventory_df.iloc[i - 1].to_dict()
-        after_state = inventory_df.iloc[i].to_dict()
-        action = after_state['Action']
-
-        # Parse action
-        action_match = re.match(r"([\d.]+)\s*x\s*\('([^']+)',\s*'([^']+)'\)\s*=\s*(.+)", action)
-
-        if action_match:
-            count, input1, input2, result = action_match.groups()
-
-            # Format count display (integer if possible)
-            def format_count(value):
-                return str(int(value)) if value == int(value) else str(value)
-
-            # Format inputs with counts
-            input1_before = f"{input1} ({format_count(before_state.get(input1, 0))})"
-            input2_before = f"{input2} ({format_count(before_state.get(input2, 0))})"
-
-            # Format outputs
-            loot_match = re.match(r"(\d+)\s*(.+)", result)
-            if loot_match and loot_match.group(2) != result:
-                # It's loot/currency
-                loot_type = loot_match.group(2)
-                output1 = f"{loot_type} ({format_count(after_state.get(loot_type, 0))})"
-            else:
-                # It's an ingredient
-                result_item = result.strip()
-                output1 = f"{result_item} ({format_count(after_state.get(result_item, 0))})"
-
-            # Format ingredient updates
-            output2 = f"{input1} ({format_count(after_state.get(input1, 0))})"
-            output3 = f"{input2} ({format_count(after_state.get(input2, 0))})"
-
-            # Add transition row
-            transitions.append({
-                'input1': input1_before,
-                'input2': input2_before,
-                'action': action,
-                'output1': output1,
-                'output2': output2,
-                'output3': output3
-            })
-
-    return pd.DataFrame(transitions)
-
-
-def highlight_changes(df):
+        tuple: (display DataFrame, boolean NumPy mask of cells that differ from the
+        previous row; never set on the first row or the Step/Action columns)
     """
-    Highlight cells where values differ from the previous row.
-    - Skip highlighting the first row entirely
-    - Skip highlighting the first two columns
-    - Use pale yellow (#FFFFCC) for highlighting
-    - Round all values to the nearest integer
-    Returns a styled pandas DataFrame.
-    """
-    # Create a copy and round all numeric values to the nearest integer
-    rounded_df = df.copy()
-    for col in rounded_df.columns:
-        # Check if the column contains numeric values
-        if pd.api.types.is_numeric_dtype(rounded_df[col]):
-            rounded_df[col] = rounded_df[col].round(0).astype(int)
-
-    # Define a styling function to highlight changes
-    def style_changed_cells(x):
-        # Create an empty DataFrame with the same shape as the input
-        highlighted = pd.DataFrame('', index=x.index, columns=x.columns)
-
-        # For each column (skipping the first two columns)
-        for col in x.columns[2:]:
-            # Create a mask where values differ from previous row
-            mask = x[col].ne(x[col].shift())
-
-            # Skip the first row
-            mask.iloc[0] = False
-
-            # Set the style for cells where values changed
-            highlighted.loc[mask, col] = 'background-color: #FFFFCC'
-
-        return highlighted
-
-    # for the df column replace ' x ' with ' x [' and add ] at the end just for the Action column
-    rounded_df['Action'] = rounded_df['Action'].str.replace(' x ', ' x [') + ']'
-    # replace . with a +
-    rounded_df['Action'] = rounded_df['Action'].str.replace(',', ' +')
-    rounded_df['Action'] = rounded_df['Action'].str.replace("'", '')
-    rounded_df['Action'] = rounded_df['Action'].str.replace(")", '')
-    rounded_df['Action'] = rounded_df['Action'].str.replace("(", '')
-
-    # put the first action value to ""
-    rounded_df['Action'].iloc[0] = ""
-
-    # reorder the columns so that the columns after Scale are put after Action
-    columns = list(rounded_df.columns)
+    columns = list(df.columns)
     columns = columns[:2] + columns[columns.index('Scale')+1:] + columns[2:columns.index('Scale')]
-    rounded_df = rounded_df[columns]
+    numeric = df[columns[2:]].to_numpy(dtype=float)
+    rounded = np.round(numeric).astype(int)
+
+    rounded_df = pd.DataFrame(rounded, columns=columns[2:], index=df.index)
+    rounded_df.insert(0, 'Action', _tidy_actions(df['Action']).to_numpy())
+    rounded_df.insert(0, 'Step', df['Step'].to_numpy())
 
-    # drop the step column
-    # rounded_df = rounded_df.drop(columns=['Step'])
+    mask = np.zeros(rounded_df.shape, dtype=bool)
+    mask[1:, 2:] = rounded[1:] != rounded[:-1]
+    return rounded_df, mask
 
-    # Apply the styling function
-    return rounded_df.style.apply(style_changed_cells, axis=None)
\ No newline at end of file
+
+def inventory_table(df):
+    """
+    Inventory history for ``st.dataframe``: the rounded values from
+    ``inventory_changes`` plus a Changes column (e.g. "Leaf -10, Petal +5")
+    that lists each step's changed cells instead of colouring them.
+    """
+    rounded_df, mask = inventory_changes(df)
+    values = rounded_df.iloc[:, 2:].to_numpy()
+    steps = np.zeros_like(values)
+    steps[1:] = values[1:] - values[:-1]
+    names = np.asarray(rounded_df.columns[2:])
+    changes = [
+        ", ".join(f"{name} {delta:+d}" for name, delta in zip(names[row], steps[i, row]))
+        for i, row in enumerate(mask[:, 2:])
+    ]
+    rounded_df.insert(2, 'Changes', changes)
+    return rounded_df
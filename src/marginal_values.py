@@ -0,0 +1,74 @@
+"""Marginal value of each ingredient and reduced costs of unused brews.
+
+Answers "how much is one extra Tooth worth to me?" without re-running the
+optimizer once per ingredient by hand:
+
+- LP shadow prices: the duals of the ``used <= count + created`` constraints
+  from a single LP-relaxation solve. Cheap, but only an estimate because
+  brews are really whole numbers.
+- Exact +1 values: the integer optimum with one more unit of each ingredient,
+  minus the current optimum. These bounded re-solves run in parallel on the
+  sweep process pool.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .optimizer import AlchemyOptimizer
+from .sweep import run_sweep
+
+
+def shadow_prices(optimizer: AlchemyOptimizer, ingredient_counts, importance_scores):
+    """Return the LP-relaxation marginal values per ingredient and reduced costs per combination.
+
+    Returns:
+        tuple: (ingredients DataFrame, reduced-cost DataFrame of unused combinations)
+    """
+    recipes = optimizer.recipes
+    relaxation = optimizer.solve_relaxation(ingredient_counts, importance_scores)
+
+    ingredients = pd.DataFrame({
+        "Ingredient": list(recipes.items),
+        "Count": [ingredient_counts[item] for item in recipes.items],
+        "LP value per unit": relaxation["shadow_prices"].round(2),
+    })
+
+    unused = np.flatnonzero(relaxation["solution"] <= 1e-9)
+    reduced = pd.DataFrame({
+        "Combination": [f"{recipes.combinations[k][0]} + {recipes.combinations[k][1]}" for k in unused],
+        "Result": [recipes.products[k] for k in unused],
+        "Reduced cost": relaxation["reduced_costs"][unused].round(2),
+    })
+    return ingredients, reduced.sort_values("Reduced cost", ascending=False).reset_index(drop=True)
+
+
+def exact_marginal_values(optimizer: AlchemyOptimizer, ingredient_counts, importance_scores, max_workers=None, solver_config=None) -> pd.Series:
+    """Return the exact integer score gained from one extra unit of each ingredient."""
+    recipes = optimizer.recipes
+    count_vectors = [dict(ingredient_counts)]
+    count_vectors += [{**ingredient_counts, item: ingredient_counts[item] + 1} for item in recipes.items]
+    sweep = run_sweep(
+        recipes, [importance_scores] * len(count_vectors), count_vectors,
+        max_workers=max_workers, solver_config=solver_config or optimizer.solver_config,
+    )
+
+    scores = sweep["total_score"].to_numpy()
+    return pd.Series(scores[1:] - scores[0], index=list(recipes.items), name="Exact value of +1")
+
+
+def marginal_values(optimizer: AlchemyOptimizer, ingredient_counts, importance_scores, exact=True, max_workers=None, solver_config=None):
+    """Combine the LP and (optionally) exact marginal values, best ingredient to farm first.
+
+    Returns:
+        tuple: (ingredients DataFrame, reduced-cost DataFrame of unused combinations)
+    """
+    ingredients, reduced = shadow_prices(optimizer, ingredient_counts, importance_scores)
+    sort_column = "LP value per unit"
+    if exact:
+        exact_values = exact_marginal_values(
+            optimizer, ingredient_counts, importance_scores, max_workers=max_workers, solver_config=solver_config
+        )
+        ingredients["Exact value of +1"] = exact_values.reindex(ingredients["Ingredient"]).to_numpy().round(2)
+        sort_column = "Exact value of +1"
+    ingredients = ingredients.sort_values(sort_column, ascending=False, kind="stable").reset_index(drop=True)
+    return ingredients, reduced
@@ -0,0 +1,343 @@
+"""Multi-day planning with expected daily ingredient income.
+
+The event runs for several days and new ingredients arrive every day, so
+the best brews today depend on what tomorrow brings: an ingredient worth
+little now may complete a valuable combination once more stock arrives.
+
+The time-indexed model has one integer variable per combination and day.
+Brews of day ``s`` may only use stock that has arrived by then::
+
+    sum_{r <= s} A x_r  <=  counts + s * income     for every day s and ingredient
+
+where ``A`` is the compiled net-usage matrix (``CompiledRecipes``), so brews
+can still chain products within a day. Income arrives at the start of each
+day after today.
+
+``plan_rolling_horizon`` keeps every solve small. It solves a window of
+``window`` days, commits only the first day's brews, applies that day's
+income and rolls forward. The window solve only fixes how many of each brew
+are worth making over the window. A second, single-day solve then brews as
+much of that as today's stock allows; without it the window solve could defer
+every brew to its last day at no cost.
+
+Each plan runs within a time budget: each day's solves get an even share
+of what is left, so a long event cannot hold a worker for minutes.
+``plan_with_baseline`` splits one ``PLAN_TIME_BUDGET`` between the greedy
+baseline and the rolling-horizon plan. Each window solve starts from the previous window's plan
+shifted by a day, and the single-day solve from the window's first day;
+days whose solves hit their limit are marked ``optimal=False``.
+
+``plan_greedy`` is the baseline the app has always implied: run the
+single-day optimizer on each day's stock and brew everything it finds.
+"""
+
+import time
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+from pulp import LpAffineExpression, LpMaximize, LpProblem, LpSolutionOptimal, LpVariable, value
+
+from .optimizer import AlchemyOptimizer, format_solution, plan_counts, repair_plan
+from .presolve import presolve
+from .recipes import CompiledRecipes
+from .solvers import NATIVE_BACKEND, SolverConfig, make_pulp_solver
+
+
+def _inventory_dict(recipes: CompiledRecipes, stock) -> dict:
+    return {item: int(round(count)) for item, count in zip(recipes.items, stock)}
+
+
+# Window solves stop within this relative gap unless the config sets one, and
+# after at most this many seconds (keeping the best plan found). The income
+# they plan with is only an estimate, and proving the last 0.01% can take CBC
+# minutes on some inventories where this takes well under a second.
+WINDOW_GAP_REL = 1e-4
+WINDOW_TIME_LIMIT = 5.0
+# The single-day solve after each window is capped much lower: it starts from
+# the window's first day, which is already a good feasible plan.
+FIRST_DAY_TIME_LIMIT = 1.0
+# Seconds for all solves of a plan and its greedy baseline together, the
+# baseline's share of it, and the least any one solve gets.
+PLAN_TIME_BUDGET = 10.0
+GREEDY_BUDGET_SHARE = 0.25
+_MIN_SOLVE_TIME = 0.2
+
+
+def _solve(prob, config: SolverConfig, warm_start: bool = False) -> bool:
+    # The native backend is tuned to the single-day model; these solves go through CBC instead.
+    config = replace(config, backend="CBC") if config.backend == NATIVE_BACKEND else config
+    prob.solve(make_pulp_solver(config, warm_start=warm_start))
+    return prob.sol_status == LpSolutionOptimal
+
+
+def _capped(config: SolverConfig, limit: float) -> SolverConfig:
+    """Return ``config`` with its time limit lowered to ``limit`` seconds."""
+    return replace(config, time_limit=min(config.time_limit, limit) if config.time_limit else limit)
+
+
+def _row_terms(A):
+    return [list(zip(np.flatnonzero(A[i]), A[i, np.flatnonzero(A[i])])) for i in range(A.shape[0])]
+
+
+def _solve_window(A, c, stock, income, n_days: int, config: SolverConfig, start=None):
+    """Solve one window of the time-indexed model and return its brews per day and combination.
+
+    The cumulative stock rows are written with carry-over variables (stock
+    left at the end of each day). It is the same model with far sparser rows::
+
+        A x_0 + s_0 <= counts,   A x_t + s_t - s_{t-1} <= income   (t >= 1)
+
+    Args:
+        start (np.ndarray, optional): ``(n_days, n_cols)`` feasible brews to start the search from
+
+    Returns:
+        tuple: (``(n_days, n_cols)`` brew counts, proven optimal)
+    """
+    n_items, n_cols = A.shape
+    prob = LpProblem("Multi_Day_Window", LpMaximize)
+    brews = [[LpVariable(f"x_{t}_{k}", lowBound=0, cat="Integer") for k in range(n_cols)] for t in range(n_days)]
+    carry = [[LpVariable(f"s_{t}_{i}", lowBound=0) for i in range(n_items)] for t in range(n_days - 1)]
+    prob.setObjective(LpAffineExpression((brews[t][k], c[k]) for t in range(n_days) for k in np.flatnonzero(c)))
+    for t in range(n_days):
+        for i, terms in enumerate(_row_terms(A)):
+            expr = {brews[t][k]: a for k, a in terms}
+            if t < n_days - 1:
+                expr[carry[t][i]] = 1.0
+            if t > 0:
+                expr[carry[t - 1][i]] = -1.0
+            prob += (LpAffineExpression(expr) <= (stock[i] if t == 0 else income[i]), f"Stock_{t}_{i}")
+    if start is not None:
+        left = np.array(stock, dtype=float)
+        for t in range(n_days):
+            for k in range(n_cols):
+                brews[t][k].setInitialValue(int(start[t, k]))
+            left = left - A @ start[t]
+            if t < n_days - 1:
+                for i in range(n_items):
+                    carry[t][i].setInitialValue(float(left[i]))
+                left = left + income
+    config = replace(config, gap_rel=WINDOW_GAP_REL if config.gap_rel is None else config.gap_rel)
+    optimal = _solve(prob, config, warm_start=start is not None)
+    plan = np.array([[round(value(brews[t][k]) or 0) for k in range(n_cols)] for t in range(n_days)], dtype=np.int64)
+    return plan, optimal
+
+
+def _first_day(A, c, stock, window_totals, config: SolverConfig, start=None):
+    """Return the most valuable part of the window's brews that today's stock allows.
+
+    This is the single-day model with each combination capped at its window
+    total. Without it the window solve is free to defer brews to later days
+    at no cost, and nothing would be committed until the end of the event.
+
+    Args:
+        start (np.ndarray, optional): Feasible brews to start the search from,
+            e.g. the window's first day
+    """
+    prob = LpProblem("Multi_Day_First_Day", LpMaximize)
+    brews = [LpVariable(f"x_{k}", lowBound=0, upBound=int(total), cat="Integer") for k, total in enumerate(window_totals)]
+    prob.setObjective(LpAffineExpression((brews[k], c[k]) for k in np.flatnonzero(c)))
+    for i, terms in enumerate(_row_terms(A)):
+        prob += (LpAffineExpression({brews[k]: a for k, a in terms}) <= stock[i], f"Stock_{i}")
+    if start is not None:
+        for var, count in zip(brews, start):
+            var.setInitialValue(int(count))
+    optimal = _solve(prob, config, warm_start=start is not None)
+    return np.array([round(value(var) or 0) for var in brews], dtype=np.int64), optimal
+
+
+def _window_start(recipes: CompiledRecipes, previous, columns, stock, income, n_days: int):
+    """Shift the previous window's plan one day on, repaired to fit the current stock.
+
+    Day ``t`` of the new window starts from day ``t + 1`` of the previous one
+    (nothing on days it did not cover), with brews of dropped combinations
+    removed and the rest cut by ``repair_plan`` until they fit what is on hand
+    that day, so the start is always feasible.
+    """
+    matrix = recipes.incidence_dense()
+    dropped = np.ones(recipes.n_combos, dtype=bool)
+    dropped[columns] = False
+    start = np.zeros((n_days, len(columns)), dtype=np.int64)
+    left = np.array(stock, dtype=float)
+    for t in range(n_days):
+        if t + 1 < len(previous):
+            counts = np.where(dropped, 0, previous[t + 1])
+            counts = repair_plan(recipes, counts, _inventory_dict(recipes, left))
+            start[t] = counts[columns]
+            left = left - matrix @ counts
+        left = left + income
+    return start
+
+
+def _summarise(recipes: CompiledRecipes, days, final_stock, started) -> dict:
+    total_loot = {}
+    for day in days:
+        for name, amount in day["total_loot"].items():
+            total_loot[name] = total_loot.get(name, 0.0) + amount
+    return {
+        "days": days,
+        "total_score": float(sum(day["total_score"] for day in days)),
+        "total_loot": total_loot,
+        "final_inventory": _inventory_dict(recipes, final_stock),
+        "solve_time": time.perf_counter() - started,
+    }
+
+
+def plan_rolling_horizon(
+    recipes: CompiledRecipes,
+    ingredient_counts,
+    daily_income,
+    importance_scores,
+    days: int,
+    window: int = 3,
+    solver_config: SolverConfig | None = None,
+    time_budget: float = PLAN_TIME_BUDGET,
+) -> dict:
+    """Plan brews day by day over ``days`` days with rolling-horizon decomposition.
+
+    Args:
+        recipes (CompiledRecipes): The compiled recipe table
+        ingredient_counts (dict): Stock available today
+        daily_income (dict): Ingredients expected to arrive each following day (missing means 0)
+        importance_scores (dict): Importance per loot type
+        days (int): Days left in the event, including today
+        window (int): Days looked ahead in each solve; 1 is the greedy plan
+        solver_config (SolverConfig, optional): Backend and per-solve limits
+        time_budget (float): Seconds for all solves together; each day gets an
+            even share of what is left (but at least ``_MIN_SOLVE_TIME`` per solve)
+
+    Returns:
+        dict: ``days`` (one ``optimization_output``-style dict per day, with
+        ``day``, starting ``ingredient_counts`` and an ``optimal`` flag),
+        ``total_score``, ``total_loot``, ``final_inventory`` and ``solve_time``
+    """
+    config = solver_config or SolverConfig()
+    started = time.perf_counter()
+    income = np.array([float(daily_income.get(item, 0)) for item in recipes.items])
+    stock = recipes.rhs(ingredient_counts)
+    coefficients = recipes.objective(importance_scores)
+    matrix = recipes.incidence_dense()
+
+    plan_days = []
+    previous = np.zeros((0, recipes.n_combos), dtype=np.int64)  # last window's brews per day
+    for day in range(days):
+        horizon = min(window, days - day)
+        # Anything unobtainable even with the window's full income can be dropped.
+        pooled = _inventory_dict(recipes, stock + (horizon - 1) * income)
+        columns = np.flatnonzero(presolve(recipes, pooled, importance_scores).keep)
+        counts = np.zeros(recipes.n_combos, dtype=np.int64)
+        optimal = True
+        if len(columns):
+            A, c = matrix[:, columns], coefficients[columns]
+            share = max(time_budget - (time.perf_counter() - started), 0.0) / (days - day)
+            first_limit = max(min(FIRST_DAY_TIME_LIMIT, share / 4), _MIN_SOLVE_TIME)
+            window_limit = max(min(WINDOW_TIME_LIMIT, share - first_limit), _MIN_SOLVE_TIME)
+            start = _window_start(recipes, previous, columns, stock, income, horizon) if len(previous) else None
+            window_plan, optimal = _solve_window(A, c, stock, income, horizon, _capped(config, window_limit), start)
+            counts[columns], first_optimal = _first_day(
+                A, c, stock, window_plan.sum(axis=0), _capped(config, first_limit), start=window_plan[0],
+            )
+            optimal = optimal and first_optimal
+            previous = np.zeros((horizon, recipes.n_combos), dtype=np.int64)
+            previous[:, columns] = window_plan
+        output = format_solution(recipes, counts, _inventory_dict(recipes, stock), importance_scores)
+        output["day"] = day + 1
+        output["optimal"] = optimal
+        plan_days.append(output)
+        stock = stock - matrix @ counts + income
+    return _summarise(recipes, plan_days, stock - income, started)
+
+
+def plan_greedy(
+    recipes: CompiledRecipes,
+    ingredient_counts,
+    daily_income,
+    importance_scores,
+    days: int,
+    solver_config: SolverConfig | None = None,
+    optimizer: AlchemyOptimizer | None = None,
+    time_budget: float = PLAN_TIME_BUDGET,
+) -> dict:
+    """Brew the single-day optimum every day ("brew everything today"), for comparison.
+
+    Args:
+        optimizer (AlchemyOptimizer, optional): A built optimizer to reuse
+            (e.g. the app's); one is built from ``recipes`` otherwise
+        time_budget (float): Seconds for all solves together; each day's solve
+            is capped at an even share of what is left
+
+    Returns:
+        dict: Same layout as ``plan_rolling_horizon``
+    """
+    optimizer = optimizer or AlchemyOptimizer(recipes, solver_config=solver_config)
+    config = solver_config or optimizer.solver_config
+    started = time.perf_counter()
+    income = np.array([float(daily_income.get(item, 0)) for item in recipes.items])
+    stock = recipes.rhs(ingredient_counts)
+    matrix = recipes.incidence_dense()
+
+    plan_days = []
+    for day in range(days):
+        share = max(time_budget - (time.perf_counter() - started), 0.0) / (days - day)
+        day_config = _capped(config, max(share, _MIN_SOLVE_TIME))
+        output = optimizer.optimize(_inventory_dict(recipes, stock), importance_scores, solver=day_config)
+        output["day"] = day + 1
+        output["optimal"] = output["solver"]["optimal"]
+        plan_days.append(output)
+        stock = stock - matrix @ plan_counts(recipes, output) + income
+    return _summarise(recipes, plan_days, stock - income, started)
+
+
+def plan_with_baseline(
+    recipes: CompiledRecipes,
+    ingredient_counts,
+    daily_income,
+    importance_scores,
+    days: int,
+    window: int = 3,
+    solver_config: SolverConfig | None = None,
+    optimizer: AlchemyOptimizer | None = None,
+    time_budget: float = PLAN_TIME_BUDGET,
+) -> tuple[dict, dict]:
+    """Plan the event with ``plan_rolling_horizon`` and ``plan_greedy`` within one time budget.
+
+    The greedy baseline runs first with ``GREEDY_BUDGET_SHARE`` of the budget
+    (its single-day solves rarely need it); the rolling-horizon plan gets the rest.
+
+    Returns:
+        tuple: (rolling-horizon plan, greedy plan)
+    """
+    started = time.perf_counter()
+    greedy = plan_greedy(
+        recipes, ingredient_counts, daily_income, importance_scores, days,
+        solver_config=solver_config, optimizer=optimizer, time_budget=time_budget * GREEDY_BUDGET_SHARE,
+    )
+    rolling = plan_rolling_horizon(
+        recipes, ingredient_counts, daily_income, importance_scores, days, window=window,
+        solver_config=solver_config, time_budget=max(time_budget - (time.perf_counter() - started), 0.0),
+    )
+    return rolling, greedy
+
+
+def compare_plans(plans: dict) -> pd.DataFrame:
+    """Tabulate plans day by day for comparison.
+
+    Args:
+        plans (dict): ``{label: plan}`` with plans from ``plan_rolling_horizon``/``plan_greedy``
+
+    Returns:
+        pd.DataFrame: One row per day with ``<label> score``, ``<label> cumulative``,
+        ``<label> solved`` (``"optimal"`` or ``"best found"`` when a solve hit its
+        time limit) and ``<label> brews`` (e.g. ``"3× Bones + Ashes"``) columns per plan
+    """
+    columns = {}
+    for label, plan in plans.items():
+        scores = [day["total_score"] for day in plan["days"]]
+        columns["Day"] = [day["day"] for day in plan["days"]]
+        columns[f"{label} score"] = scores
+        columns[f"{label} cumulative"] = np.cumsum(scores)
+        columns[f"{label} solved"] = ["optimal" if day["optimal"] else "best found" for day in plan["days"]]
+        columns[f"{label} brews"] = [
+            ", ".join(f"{c['count']}× {c['input1']} + {c['input2']}" for c in day["formatted_combos"]) for day in plan["days"]
+        ]
+    return pd.DataFrame(columns)
@@ -0,0 +1,66 @@
+"""Plotly view of a multi-day plan (see ``src/multiday.py``).
+
+- Cumulative score per day for the rolling-horizon plan and the greedy
+  "brew everything today" baseline.
+- A per-day table of each plan's brews, plus a CSV download.
+"""
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from .multiday import compare_plans
+
+
+def render_multiday_plan(rolling: dict, greedy: dict) -> None:
+    """Render the rolling-horizon plan against the greedy baseline."""
+    if not rolling["days"]:
+        st.info("The plan has no days.")
+        return
+
+    gain = rolling["total_score"] - greedy["total_score"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rolling-horizon score", f"{rolling['total_score']:,.0f}")
+    col2.metric("Greedy score", f"{greedy['total_score']:,.0f}")
+    col3.metric("Gain", f"{gain:,.0f}", f"{gain / greedy['total_score']:.1%}" if greedy["total_score"] else None)
+    for label, plan in (("Rolling-horizon", rolling), ("Greedy", greedy)):
+        stopped = [str(day["day"]) for day in plan["days"] if not day["optimal"]]
+        if stopped:
+            st.warning(f"{label} plan is best-effort: the solves for day{'s' if len(stopped) > 1 else ''} "
+                       f"{', '.join(stopped)} hit their time limit, so those days use the best brews found "
+                       "rather than a proven optimum (marked ◇ in the chart).")
+
+    plans = {"Rolling": rolling, "Greedy": greedy}
+    table = compare_plans(plans)
+    fig = go.Figure()
+    for label, color in (("Rolling", "#7c5cff"), ("Greedy", "#9aa0a6")):
+        fig.add_trace(
+            go.Scatter(
+                x=table["Day"],
+                y=table[f"{label} cumulative"],
+                mode="lines+markers",
+                name=label,
+                marker=dict(
+                    color=color,
+                    symbol=["circle" if solved == "optimal" else "diamond-open" for solved in table[f"{label} solved"]],
+                    size=9,
+                ),
+                customdata=table[[f"{label} score", f"{label} solved"]].to_numpy(),
+                hovertemplate="Day %{x}<br>total: %{y}<br>that day: %{customdata[0]} (%{customdata[1]})<extra></extra>",
+            )
+        )
+    fig.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        yaxis_title="Cumulative score",
+        xaxis_title="Day",
+        margin=dict(l=10, r=10, t=10, b=10),
+        height=320,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    st.download_button(
+        "Download multi-day plan (CSV)",
+        data=table.to_csv(index=False).encode("utf-8"),
+        file_name="multi_day_plan.csv",
+        mime="text/csv",
+    )
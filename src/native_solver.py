@@ -0,0 +1,549 @@
+"""Native in-process solver for the alchemy MIP.
+
+PuLP's default path writes the model to a temp file and spawns a CBC
+subprocess for every solve, which dominates latency for a model this small.
+This module solves the same problem, maximise ``c . x`` subject to
+``A x <= b`` with ``x`` a non-negative integer vector, entirely in-process
+with NumPy:
+
+- the root LP is solved with a dense two-phase tableau simplex, then
+  tightened with rounds of Gomory mixed-integer cuts and reduced-cost fixing
+  against the best plan found so far
+- branch-and-bound works on copies of the optimal tableau: a branch
+  (``x_k <= floor`` / ``x_k >= ceil``) only changes a variable bound, and the
+  child is re-optimised with a few dual simplex pivots instead of a fresh LP
+- nodes are explored best-bound first, diving from each one, branching on
+  pseudocosts, and every node LP is rounded and repaired into a candidate plan
+
+Only the combinations left after presolve enter the tableau. Results are
+exact (same objective as CBC) unless a time limit or gap stops the search;
+either way the reported ``gap`` is measured against the best bound left
+unexplored, and only an exhausted search is reported as optimal. The search
+is a plain best-first branch-and-bound, so on harder tables it can be much
+slower than CBC; ``AlchemyOptimizer`` hands such solves over to CBC after
+a short in-process attempt.
+"""
+
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from .recipes import CompiledRecipes
+
+_PIVOT_TOL = 1e-9
+_FEAS_TOL = 1e-7
+_INT_TOL = 1e-6
+_MAX_PIVOTS = 50000
+_CUT_ROUNDS = 20
+_CUTS_PER_ROUND = 8
+
+
+class _Node:
+    """An optimal LP tableau plus the bookkeeping needed to cut and branch on it.
+
+    ``tableau`` rows are constraints with the objective row last; columns are
+    variables with the right-hand side last. Branching bounds are kept out of
+    the tableau: column ``j`` holds ``t_j`` with ``0 <= t_j <= width[j]`` and
+    the variable's value is ``offset[j] + sign[j] * t_j``. ``col_var`` maps
+    columns to combination indices (-1 for slacks), ``int_cols`` marks columns
+    that are integral in every integer plan and ``cut_cols`` marks cut slacks.
+    """
+
+    __slots__ = ("tableau", "basis", "col_var", "int_cols", "cut_cols", "offset", "sign", "width")
+
+    def __init__(self, tableau, basis, col_var, int_cols, cut_cols):
+        self.tableau = tableau
+        self.basis = basis
+        self.col_var = col_var
+        self.int_cols = int_cols
+        self.cut_cols = cut_cols
+        cols = tableau.shape[1] - 1
+        self.offset = np.zeros(cols)
+        self.sign = np.ones(cols)
+        self.width = np.full(cols, np.inf)
+
+    @property
+    def bound(self) -> float:
+        return float(self.tableau[-1, -1])
+
+    def values(self) -> np.ndarray:
+        t = np.zeros(self.tableau.shape[1] - 1)
+        t[self.basis] = self.tableau[:-1, -1]
+        return self.offset + self.sign * t
+
+    def solution(self, n) -> np.ndarray:
+        structural = self.col_var >= 0
+        x = np.zeros(n)
+        x[self.col_var[structural]] = self.values()[structural]
+        return np.maximum(x, 0.0)
+
+    def fractional_rows(self) -> np.ndarray:
+        """Return the rows whose basic variable is a fractional combination count."""
+        value = self.values()[self.basis]
+        fraction = value - np.floor(value)
+        structural = self.col_var[self.basis] >= 0
+        return np.flatnonzero(structural & (fraction > _INT_TOL) & (fraction < 1 - _INT_TOL))
+
+    def copy(self) -> "_Node":
+        node = _Node.__new__(_Node)
+        node.tableau = self.tableau.copy()
+        node.basis = self.basis.copy()
+        node.col_var = self.col_var
+        node.int_cols = self.int_cols
+        node.cut_cols = self.cut_cols
+        node.offset = self.offset.copy()
+        node.sign = self.sign.copy()
+        node.width = self.width.copy()
+        return node
+
+    def add_cuts(self, coefficients, rhs) -> "_Node":
+        """Return a copy with the cuts ``coefficients @ t + s = rhs`` appended, each ``s`` a new basic slack.
+
+        Only valid before any branching bounds are applied.
+        """
+        rows, cols = self.tableau.shape
+        k = len(rhs)
+        grown = np.zeros((rows + k, cols + k))
+        grown[:rows - 1, :cols - 1] = self.tableau[:-1, :-1]
+        grown[:rows - 1, -1] = self.tableau[:-1, -1]
+        grown[rows - 1:-1, :cols - 1] = coefficients
+        grown[rows - 1:-1, cols - 1:-1] = np.eye(k)
+        grown[rows - 1:-1, -1] = rhs
+        grown[-1, :cols - 1] = self.tableau[-1, :-1]
+        grown[-1, -1] = self.tableau[-1, -1]
+        return _Node(
+            grown,
+            np.concatenate([self.basis, cols - 1 + np.arange(k)]),
+            np.concatenate([self.col_var, np.full(k, -1)]),
+            np.concatenate([self.int_cols, np.zeros(k, dtype=bool)]),
+            np.concatenate([self.cut_cols, np.ones(k, dtype=bool)]),
+        )
+
+    def drop_columns(self, columns) -> None:
+        """Remove nonbasic columns (e.g. combinations fixed at zero)."""
+        keep = np.ones(self.tableau.shape[1], dtype=bool)
+        keep[columns] = False
+        remap = np.cumsum(keep) - 1
+        self.tableau = self.tableau[:, keep]
+        self.basis = remap[self.basis]
+        keep = keep[:-1]
+        self.col_var = self.col_var[keep]
+        self.int_cols = self.int_cols[keep]
+        self.cut_cols = self.cut_cols[keep]
+        self.offset = self.offset[keep]
+        self.sign = self.sign[keep]
+        self.width = self.width[keep]
+
+    def drop_slack_cuts(self) -> None:
+        """Remove cuts whose slack is basic and positive: the row and the slack column go together."""
+        inactive = np.flatnonzero(self.cut_cols[self.basis] & (self.tableau[:-1, -1] > _FEAS_TOL))
+        if inactive.size == 0:
+            return
+        slack_cols = self.basis[inactive]
+        keep_rows = np.ones(self.tableau.shape[0], dtype=bool)
+        keep_rows[inactive] = False
+        self.tableau = self.tableau[keep_rows]
+        self.basis = self.basis[keep_rows[:-1]]
+        self.drop_columns(slack_cols)
+
+    def branch(self, row, down) -> "_Node":
+        """Return a child with the basic variable of ``row`` rounded down (``x <= floor``) or up (``x >= ceil``).
+
+        The child is left primal infeasible; ``_dual_simplex`` restores it.
+        """
+        child = self.copy()
+        col = child.basis[row]
+        value = child.values()[col]
+        # Translate the bound on x = offset + sign * t into a bound on t.
+        limit = ((np.floor(value) if down else np.ceil(value)) - child.offset[col]) * child.sign[col]
+        if down == (child.sign[col] > 0):
+            child.width[col] = min(child.width[col], limit)
+        else:
+            # A lower bound on t: shift it out with t = limit + t'.
+            child.offset[col] += child.sign[col] * limit
+            child.width[col] -= limit
+            child.tableau[row, -1] -= limit
+        return child
+
+
+def _pivot(tableau, basis, row, col) -> None:
+    tableau[row] /= tableau[row, col]
+    factors = tableau[:, col].copy()
+    factors[row] = 0.0
+    tableau -= np.outer(factors, tableau[row])
+    basis[row] = col
+
+
+def _primal_simplex(tableau, basis) -> bool:
+    """Pivot until the objective row (last row) is optimal. Return False if unbounded."""
+    rows = tableau.shape[0] - 1
+    use_bland = False
+    stalled = 0
+    for _ in range(_MAX_PIVOTS):
+        reduced = tableau[-1, :-1]
+        candidates = np.flatnonzero(reduced < -_PIVOT_TOL)
+        if candidates.size == 0:
+            return True
+        col = candidates[0] if use_bland else candidates[np.argmin(reduced[candidates])]
+
+        column = tableau[:rows, col]
+        positive = column > _PIVOT_TOL
+        if not positive.any():
+            return False
+        ratios = np.full(rows, np.inf)
+        ratios[positive] = tableau[:rows, -1][positive] / column[positive]
+        best = ratios.min()
+        ties = np.flatnonzero(ratios <= best + _PIVOT_TOL)
+        row = ties[np.argmin(basis[ties])]
+
+        # Degenerate pivots can cycle under Dantzig pricing; fall back to Bland's rule.
+        stalled = stalled + 1 if best <= _PIVOT_TOL else 0
+        if stalled > rows:
+            use_bland = True
+        _pivot(tableau, basis, row, col)
+    raise RuntimeError("Native simplex did not converge")
+
+
+def _dual_simplex(node) -> bool:
+    """Restore primal feasibility of an optimal-priced node in place. Return False if infeasible.
+
+    A basic variable above its width is complemented (``t' = width - t``) so
+    that every violation becomes a negative right-hand side.
+    """
+    tableau, basis = node.tableau, node.basis
+    if (node.width < -_FEAS_TOL).any():
+        return False
+    use_bland = False
+    for pivots in range(_MAX_PIVOTS):
+        rhs = tableau[:-1, -1]
+        violation = np.maximum(-rhs, rhs - node.width[basis])
+        infeasible = np.flatnonzero(violation > _FEAS_TOL)
+        if infeasible.size == 0:
+            return True
+        row = infeasible[np.argmin(basis[infeasible])] if use_bland else infeasible[np.argmax(violation[infeasible])]
+
+        if rhs[row] > 0:
+            col = basis[row]
+            node.offset[col] += node.sign[col] * node.width[col]
+            node.sign[col] = -node.sign[col]
+            tableau[row, :-1] *= -1.0
+            tableau[row, col] = 1.0
+            tableau[row, -1] = node.width[col] - rhs[row]
+
+        entries = tableau[row, :-1]
+        candidates = np.flatnonzero(entries < -_PIVOT_TOL)
+        if candidates.size == 0:
+            return False
+        ratios = np.maximum(tableau[-1, candidates], 0.0) / -entries[candidates]
+        col = candidates[np.flatnonzero(ratios <= ratios.min() + _PIVOT_TOL)[0]]
+        _pivot(tableau, basis, row, col)
+        # As in the primal, switch to Bland's rule if the pivots drag on.
+        if pivots > 2 * tableau.shape[0]:
+            use_bland = True
+    raise RuntimeError("Native dual simplex did not converge")
+
+
+def _root_node(c, A, b):
+    """Solve ``max c.x`` s.t. ``A x <= b``, ``x >= 0`` from scratch (``b`` may be negative).
+
+    Returns:
+        tuple: (status, node) where status is "optimal", "infeasible" or
+        "unbounded" and node is the optimal ``_Node`` (None otherwise)
+    """
+    m, n = A.shape
+    negative = b < 0
+    n_art = int(negative.sum())
+    width = n + m + n_art
+    tableau = np.zeros((m + 1, width + 1))
+    tableau[:m, :n] = A
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = b
+    tableau[:m][negative] *= -1.0
+    basis = np.arange(n, n + m)
+    art_rows = np.flatnonzero(negative)
+    tableau[art_rows, n + m + np.arange(n_art)] = 1.0
+    basis[art_rows] = n + m + np.arange(n_art)
+
+    keep_rows = np.ones(m, dtype=bool)
+    if n_art:
+        # Phase 1: maximise -sum(artificials) to find a feasible basis.
+        tableau[-1, n + m:width] = 1.0
+        tableau[-1] -= tableau[art_rows].sum(axis=0)
+        _primal_simplex(tableau, basis)
+        if tableau[-1, -1] < -_FEAS_TOL:
+            return "infeasible", None
+        # Drive zero-level artificials out of the basis (or drop redundant rows),
+        # then drop the artificial columns altogether.
+        for row in np.flatnonzero(basis >= n + m):
+            nonzero = np.flatnonzero(np.abs(tableau[row, :n + m]) > _PIVOT_TOL)
+            if nonzero.size:
+                _pivot(tableau, basis, row, nonzero[0])
+            else:
+                keep_rows[row] = False
+        tableau = np.delete(tableau[np.append(keep_rows, True)], np.s_[n + m:width], axis=1)
+        basis = basis[keep_rows]
+
+    # Phase 2: the real objective.
+    tableau[-1] = 0.0
+    tableau[-1, :n] = -np.asarray(c, dtype=float)
+    for row, col in enumerate(basis):
+        if tableau[-1, col] != 0.0:
+            tableau[-1] -= tableau[-1, col] * tableau[row]
+    if not _primal_simplex(tableau, basis):
+        return "unbounded", None
+
+    # Slacks of rows with integer data are integral in every integer plan.
+    integral_rows = np.all(A == np.round(A), axis=1) & (b == np.round(b))
+    return "optimal", _Node(
+        tableau,
+        basis,
+        np.concatenate([np.arange(n), np.full(m, -1)]),
+        np.concatenate([np.ones(n, dtype=bool), integral_rows]),
+        np.zeros(n + m, dtype=bool),
+    )
+
+
+def _gomory_cut(node, row):
+    """Return the Gomory mixed-integer cut from a tableau row as ``(coefficients, rhs)``.
+
+    The cut ``sum(alpha . x_nonbasic) >= 1`` is returned as the row
+    ``-alpha . t + s = -1`` so it can be appended with ``_Node.add_cuts``.
+    Badly scaled cuts are skipped (None) rather than risk numerical trouble.
+    """
+    values = node.tableau[row, :-1]
+    f0 = node.tableau[row, -1] - np.floor(node.tableau[row, -1])
+    fractions = values - np.floor(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = np.where(
+            node.int_cols,
+            np.where(fractions <= f0, fractions / f0, (1.0 - fractions) / (1.0 - f0)),
+            np.where(values >= 0, values / f0, -values / (1.0 - f0)),
+        )
+    alpha[node.basis] = 0.0
+    alpha[np.abs(values) <= _PIVOT_TOL] = 0.0
+    if not np.isfinite(alpha).all() or alpha.max() > 1e6:
+        return None
+    # Relax the right-hand side slightly so rounding error can never cut off a plan.
+    return -alpha, -(1.0 - 1e-7)
+
+
+def _objective_step(c) -> float:
+    """Return the spacing of achievable objective values, or 0 if there is none to exploit.
+
+    Scores are usually whole numbers or halves (e.g. importance 7.5), so any
+    plan that beats the incumbent beats it by at least this much.
+    """
+    for scale in (1, 2, 4, 5, 10, 20, 100):
+        scaled = np.round(c * scale)
+        if np.allclose(c * scale, scaled, rtol=0.0, atol=1e-9):
+            return float(np.gcd.reduce(np.abs(scaled).astype(np.int64))) / scale
+    return 0.0
+
+
+class _Rounder:
+    """Turns fractional points into plans: round down, fix ``A x <= b``, then fill up.
+
+    Brews are cut lowest-value first until every row fits, then leftover
+    stock is spent greedily on the most valuable brews. This runs at every
+    node, so the sparse column data is unpacked into plain lists once.
+    """
+
+    def __init__(self, A, b, c):
+        order = np.argsort(c, kind="stable")
+        self.A = A
+        self.b = b
+        self.entries = [[(int(r), float(A[r, k])) for r in np.flatnonzero(A[:, k])] for k in range(A.shape[1])]
+        self.cut_order = [[(int(k), float(A[r, k])) for k in order if A[r, k] > 0] for r in range(A.shape[0])]
+        self.fill_order = [
+            (int(k), [(r, a) for r, a in self.entries[k] if a > 0]) for k in order[::-1] if c[k] > 0 and (A[:, k] > 0).any()
+        ]
+
+    def __call__(self, x) -> np.ndarray:
+        x = np.floor(x + _INT_TOL)
+        slack = (self.b - self.A @ x).tolist()
+        x = x.tolist()
+        while True:
+            worst = min(range(len(slack)), key=slack.__getitem__)
+            if slack[worst] >= -_FEAS_TOL:
+                break
+            for k, amount in self.cut_order[worst]:
+                if x[k] > 0:
+                    cut = min(x[k], np.ceil(-slack[worst] / amount - _INT_TOL))
+                    x[k] -= cut
+                    for r, a in self.entries[k]:
+                        slack[r] += cut * a
+                    break
+        for k, uses in self.fill_order:
+            extra = min(np.floor(slack[r] / a + _INT_TOL) for r, a in uses)
+            if extra > 0:
+                x[k] += extra
+                for r, a in self.entries[k]:
+                    slack[r] -= extra * a
+        return np.array(x)
+
+
+def branch_and_bound(c, A, b, time_limit=None, gap_rel=None, warm_start=None):
+    """Maximise ``c.x`` s.t. ``A x <= b`` over non-negative integer ``x``.
+
+    Returns:
+        tuple: (x, info) with ``optimal``, ``gap`` and ``nodes``. A search
+        stopped by ``time_limit`` or ``gap_rel`` returns its best plan with
+        ``optimal`` False and the gap to the best bound it did not rule out.
+    """
+    c = np.asarray(c, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n = len(c)
+    started = time.perf_counter()
+    step = _objective_step(c)
+    rounder = _Rounder(A, b, c)
+
+    def out_of_time():
+        return time_limit is not None and time.perf_counter() - started > time_limit
+
+    def cutoff():
+        # A node must be able to beat the incumbent by a full objective step.
+        return incumbent_value + step - _INT_TOL * max(1.0, step, abs(incumbent_value) * 1e-6)
+
+    gap_bound = -np.inf  # best bound discarded only because of ``gap_rel``
+
+    def prunable(bound):
+        nonlocal gap_bound
+        if bound < cutoff():
+            return True
+        if gap_rel and bound < cutoff() + gap_rel * abs(bound):
+            gap_bound = max(gap_bound, bound)
+            return True
+        return False
+
+    incumbent = np.zeros(n)
+    if warm_start is not None:
+        incumbent = rounder(np.asarray(warm_start, dtype=float))
+    incumbent_value = float(c @ incumbent)
+
+    def consider(node):
+        nonlocal incumbent, incumbent_value
+        candidate = rounder(node.solution(n))
+        if c @ candidate > incumbent_value + _FEAS_TOL:
+            incumbent, incumbent_value = candidate, float(c @ candidate)
+
+    status, root = _root_node(c, A, b)
+    if status == "unbounded":
+        raise ValueError("The alchemy model is unbounded; check the recipe table for free loot cycles")
+    if status == "infeasible":
+        return incumbent.astype(np.int64), {"optimal": True, "gap": 0.0, "nodes": 1}
+    consider(root)
+
+    # Tighten the root bound with rounds of Gomory cuts, keeping only the binding ones.
+    for _ in range(_CUT_ROUNDS):
+        rows = root.fractional_rows()
+        if rows.size == 0 or prunable(root.bound) or out_of_time():
+            break
+        rhs = root.tableau[rows, -1]
+        cuts = [_gomory_cut(root, row) for row in rows[np.argsort(np.abs(rhs - np.floor(rhs) - 0.5))][:_CUTS_PER_ROUND]]
+        cuts = [cut for cut in cuts if cut is not None]
+        if not cuts:
+            break
+        tightened = root.add_cuts(np.array([cut[0] for cut in cuts]), np.array([cut[1] for cut in cuts]))
+        if not _dual_simplex(tightened):
+            break
+        tightened.drop_slack_cuts()
+        improved = root.bound - tightened.bound > 1e-6 * max(1.0, abs(root.bound))
+        root = tightened
+        consider(root)
+        if not improved:
+            break
+
+    # Reduced-cost fixing: a nonbasic combination whose first brew would drop
+    # the bound below the cutoff stays at zero in every better plan.
+    nonbasic = np.ones(root.tableau.shape[1] - 1, dtype=bool)
+    nonbasic[root.basis] = False
+    reduced = root.tableau[-1, :-1]
+    root.drop_columns(np.flatnonzero(nonbasic & (root.col_var >= 0) & (root.bound - reduced < cutoff())))
+
+    # Pseudocosts: average bound drop per unit of rounding, by branch direction
+    # (row 0 up, row 1 down) and combination, learned as the search goes.
+    pseudo_sum = np.zeros((2, n))
+    pseudo_count = np.zeros((2, n))
+
+    def branch_row(node, rows):
+        value = node.values()[node.basis[rows]]
+        fraction = value - np.floor(value)
+        combos = node.col_var[node.basis[rows]]
+        average = pseudo_sum.sum(axis=1) / np.maximum(pseudo_count.sum(axis=1), 1.0)
+        known = pseudo_count[:, combos] > 0
+        cost = np.where(known, pseudo_sum[:, combos] / np.maximum(pseudo_count[:, combos], 1.0), average[:, None])
+        # Product rule: prefer combinations whose both branches move the bound.
+        score = np.maximum((1.0 - fraction) * cost[0], 1e-6) * np.maximum(fraction * cost[1], 1e-6)
+        return rows[np.argmax(score)], fraction[np.argmax(score)]
+
+    tie = itertools.count()
+    heap = [(-root.bound, next(tie), root, None)]
+    nodes = 1
+    timed_out = False
+    while heap:
+        if out_of_time():
+            timed_out = True
+            break
+        _, _, node, branch = heapq.heappop(heap)
+        if prunable(node.bound):
+            continue
+
+        # Dive from this node, leaving the sibling of every branch on the heap.
+        while True:
+            if branch is not None:
+                parent, (row, down, fraction) = node, branch
+                node = parent.branch(row, down)
+                nodes += 1
+                if not _dual_simplex(node):
+                    break
+                combo = parent.col_var[parent.basis[row]]
+                pseudo_sum[int(down), combo] += max(parent.bound - node.bound, 0.0) / (fraction if down else 1.0 - fraction)
+                pseudo_count[int(down), combo] += 1
+            if prunable(node.bound):
+                break
+            consider(node)
+            rows = node.fractional_rows()
+            if rows.size == 0:
+                break
+
+            # Dive into the down branch; the up branch waits on the heap.
+            row, fraction = branch_row(node, rows)
+            heapq.heappush(heap, (-node.bound, next(tie), node, (row, False, fraction)))
+            branch = (row, True, fraction)
+            if out_of_time():
+                heapq.heappush(heap, (-node.bound, next(tie), node, branch))
+                break
+
+    # The best bound no explored node ruled out: open nodes after a timeout, and nodes dropped on the gap.
+    open_bound = max(incumbent_value, gap_bound)
+    if timed_out and heap:
+        open_bound = max(open_bound, -heap[0][0])
+    gap = max(0.0, (open_bound - incumbent_value) / max(abs(open_bound), _FEAS_TOL))
+    optimal = not timed_out and gap_bound == -np.inf
+    return np.round(incumbent).astype(np.int64), {"optimal": optimal, "gap": gap, "nodes": nodes}
+
+
+def solve_native(recipes: CompiledRecipes, coefficients, rhs, keep=None, time_limit=None, gap_rel=None, warm_start=None):
+    """Solve the alchemy model for one objective/RHS with ``branch_and_bound``.
+
+    Args:
+        recipes (CompiledRecipes): The compiled recipe table
+        coefficients (np.ndarray): Objective coefficient per combination
+        rhs (np.ndarray): Ingredient counts in ``recipes.items`` order
+        keep (np.ndarray, optional): Boolean mask of combinations to consider (from presolve)
+        time_limit (float, optional): Stop searching after this many seconds
+        gap_rel (float, optional): Accept plans within this relative gap of the bound
+        warm_start (np.ndarray, optional): A plan to seed the incumbent
+
+    Returns:
+        tuple: (integer brew counts for every combination, info dict)
+    """
+    columns = np.flatnonzero(keep) if keep is not None else np.arange(recipes.n_combos)
+    A = recipes.incidence_dense()[:, columns]
+    start = None if warm_start is None else np.asarray(warm_start)[columns]
+    x, info = branch_and_bound(np.asarray(coefficients)[columns], A, np.asarray(rhs, dtype=float), time_limit, gap_rel, start)
+    counts = np.zeros(recipes.n_combos, dtype=np.int64)
+    counts[columns] = x
+    return counts, info
@@ -0,0 +1,493 @@
+"""Headless optimizer engine for the alchemy event.
+
+The PuLP model is built a single time from a compiled recipe table (see
+``src/recipes.py``); each solve only swaps the constraint RHS (ingredient
+counts) and the objective (importance scores).
+
+This module has no Streamlit dependency so it can be used from tests, batch
+jobs and services as well as from ``streamlit_app.py``.
+"""
+
+import threading
+import time
+from dataclasses import replace
+
+import numpy as np
+from pulp import (
+    LpAffineExpression,
+    LpMaximize,
+    LpProblem,
+    LpSolution,
+    LpSolutionIntegerFeasible,
+    LpSolutionOptimal,
+    LpStatus,
+    LpStatusNotSolved,
+    LpStatusOptimal,
+    LpVariable,
+    value,
+)
+
+from .native_solver import solve_native
+from .presolve import presolve
+from .recipes import CompiledRecipes
+from .result_cache import ResultCache, make_key
+from .solvers import NATIVE_BACKEND, SolverConfig, make_pulp_solver
+
+
+# Seconds the native backend searches before handing an unfinished solve to CBC,
+# and the most combinations (after presolve) it takes on at all: its dense
+# tableau is built before the first time check, and beyond a few hundred
+# columns that alone takes longer than CBC's whole solve.
+NATIVE_HANDOFF_TIME = 0.05
+NATIVE_MAX_COMBOS = 500
+
+
+def plan_counts(recipes: CompiledRecipes, output) -> np.ndarray:
+    """Recover the per-combination brew counts from an ``optimization_output`` dict."""
+    index = {combo: k for k, combo in enumerate(recipes.combinations)}
+    counts = np.zeros(recipes.n_combos, dtype=np.int64)
+    for combo in output["formatted_combos"]:
+        counts[index[(combo["input1"], combo["input2"])]] = round(combo["count"])
+    return counts
+
+
+def repair_plan(recipes: CompiledRecipes, counts, ingredient_counts) -> np.ndarray:
+    """Shrink a brew plan until it fits ``ingredient_counts``.
+
+    Used to turn the previous solution into a feasible MIP start after the
+    counts went down. Each pass cuts the brews consuming the most over-used
+    ingredient, lowest-value first; every cut lowers the total brew count so
+    the loop always terminates (at worst at the empty plan).
+    """
+    counts = np.array(counts, dtype=np.int64)
+    rhs = recipes.rhs(ingredient_counts)
+    matrix = recipes.incidence_dense()
+    value_order = np.argsort(recipes.loot_amount * (~recipes.is_ingredient), kind="stable")
+    while True:
+        deficit = matrix @ counts - rhs
+        worst = int(np.argmax(deficit))
+        if deficit[worst] <= 0:
+            return counts
+        for k in value_order:
+            if counts[k] > 0 and matrix[worst, k] > 0:
+                counts[k] -= min(counts[k], int(np.ceil(deficit[worst] / matrix[worst, k])))
+                break
+
+
+def format_solution(recipes: CompiledRecipes, counts, ingredient_counts, importance_scores) -> dict:
+    """Turn per-combination brew counts into the app's ``optimization_output`` dict.
+
+    Combos are ordered ingredient-producing first, then by the table position
+    of their first input, matching the ordering the app has always shown.
+    """
+    coefficients = recipes.objective(importance_scores)
+    used = [k for k in np.flatnonzero(np.asarray(counts) > 0)]
+    used.sort(key=lambda k: (not recipes.is_ingredient[k], recipes.input_index[k, 0]))
+
+    combos_used = []
+    total_loot = {}
+    formatted_combos = []
+    total_score = 0
+    for k in used:
+        combo, count, product = recipes.combinations[k], float(counts[k]), recipes.products[k]
+        combos_used.append((combo, count, product))
+
+        product_name = recipes.loot_names[recipes.loot_index[k]]
+        total_loot[product_name] = total_loot.get(product_name, 0) + recipes.loot_amount[k] * count
+        total_score += coefficients[k] * count
+        formatted_combos.append({
+            'input1': combo[0],
+            'input2': combo[1],
+            'count': count,
+            'result': product,
+            'is_ingredient': bool(recipes.is_ingredient[k]),
+        })
+
+    return {
+        "total_score": float(total_score),
+        "combos_used": combos_used,
+        "total_loot": {name: float(amount) for name, amount in total_loot.items()},
+        "formatted_combos": formatted_combos,
+        "ingredient_counts": dict(ingredient_counts),
+    }
+
+
+class AlchemyOptimizer:
+    """A PuLP model built once per compiled recipe table and re-solved in place.
+
+    Solves are serialised with a lock so a single instance can be shared by
+    every Streamlit session in the server process. If a ``ResultCache`` is
+    given, ``optimize`` answers repeated inputs from it without solving. With
+    ``use_presolve`` (the default) combinations that cannot help are fixed to
+    zero before each solve (see ``src/presolve.py``). ``solver_config`` is the
+    default backend and limits (see ``src/solvers.py``).
+    """
+
+    def __init__(
+        self,
+        recipes: CompiledRecipes,
+        cache: ResultCache | None = None,
+        use_presolve: bool = True,
+        solver_config: SolverConfig | None = None,
+    ):
+        self.recipes = recipes
+        self.cache = cache
+        self.use_presolve = use_presolve
+        self.solver_config = solver_config or SolverConfig()
+        self._lock = threading.Lock()
+        self._vars = [
+            LpVariable(f"Combo_{k}", lowBound=0, cat='Integer') for k in range(recipes.n_combos)
+        ]
+
+        # Group the COO incidence entries by row to get one expression per item.
+        order = np.argsort(recipes.incidence_rows, kind="stable")
+        rows = recipes.incidence_rows[order]
+        cols = recipes.incidence_cols[order]
+        data = recipes.incidence_data[order]
+        bounds = np.searchsorted(rows, np.arange(recipes.n_items + 1))
+        self._stock_terms = []
+        for r in range(recipes.n_items):
+            terms = {}
+            for c, d in zip(cols[bounds[r]:bounds[r + 1]], data[bounds[r]:bounds[r + 1]]):
+                terms[self._vars[c]] = terms.get(self._vars[c], 0.0) + d
+            self._stock_terms.append(terms)
+        self._prob, self._constraints = self._new_problem("Maximize_Loot_Score")
+
+    def _new_problem(self, name: str):
+        """Return a problem over the shared brew variables with one stock row per item."""
+        prob = LpProblem(name, LpMaximize)
+        constraints = []
+        for r, terms in enumerate(self._stock_terms):
+            prob += (LpAffineExpression(terms) <= 0, f"Stock_{r}")
+            constraints.append(prob.constraints[f"Stock_{r}"])
+        return prob, constraints
+
+    def _load(self, ingredient_counts, importance_scores, keep=None, model=None) -> None:
+        """Swap in a new objective, RHS and pruning mask. Callers must hold ``self._lock``.
+
+        ``model`` is a ``(problem, stock constraints)`` pair; defaults to the main model.
+        """
+        prob, constraints = model or (self._prob, self._constraints)
+        coefficients = self.recipes.objective(importance_scores)
+        prob.setObjective(LpAffineExpression(zip(self._vars, coefficients)))
+        for constraint, bound in zip(constraints, self.recipes.rhs(ingredient_counts)):
+            constraint.changeRHS(bound)
+        for k, var in enumerate(self._vars):
+            var.upBound = None if keep is None or keep[k] else 0
+
+    def solve(self, ingredient_counts, importance_scores, solver=None, warm_start=None, keep=None):
+        """Return the best brew count of every combination and a solver report.
+
+        Args:
+            solver (SolverConfig, optional): Backend and limits; defaults to ``self.solver_config``
+            warm_start (np.ndarray, optional): A plan (e.g. the previous solution)
+                passed to the solver as the initial incumbent
+            keep (np.ndarray, optional): Boolean mask of combinations allowed in
+                the plan; when omitted it comes from presolve (or allows
+                everything if presolve is disabled)
+
+        Returns:
+            tuple: (integer brew counts, dict with ``backend``, ``status``,
+            ``solution_status``, ``optimal``, ``gap`` and ``solve_time``)
+        """
+        config = solver or self.solver_config
+        if keep is None and self.use_presolve:
+            keep = presolve(self.recipes, ingredient_counts, importance_scores).keep
+        if warm_start is not None and keep is not None:
+            warm_start = repair_plan(self.recipes, np.where(keep, warm_start, 0), ingredient_counts)
+        if config.backend == NATIVE_BACKEND:
+            return self._solve_native(ingredient_counts, importance_scores, config, warm_start, keep)
+        pulp_solver = make_pulp_solver(config, warm_start=warm_start is not None)
+
+        with self._lock:
+            self._load(ingredient_counts, importance_scores, keep)
+            if warm_start is not None:
+                for var, start in zip(self._vars, warm_start):
+                    var.setInitialValue(int(start))
+            started = time.perf_counter()
+            self._prob.solve(pulp_solver)
+            solve_time = time.perf_counter() - started
+            solution = [value(var) for var in self._vars]
+            objective = value(self._prob.objective) or 0.0
+            info = {
+                "backend": config.backend,
+                "status": LpStatus[self._prob.status],
+                "solution_status": LpSolution[self._prob.sol_status],
+                "optimal": self._prob.sol_status == LpSolutionOptimal,
+                "gap": 0.0 if self._prob.sol_status == LpSolutionOptimal else None,
+                "solve_time": solve_time,
+            }
+
+        # Stopped early (time limit or gap): bound the gap with the LP relaxation.
+        if not info["optimal"]:
+            bound = self.solve_relaxation(ingredient_counts, importance_scores)["objective"]
+            if bound > 0:
+                info["gap"] = max(0.0, (bound - objective) / bound)
+        counts = np.array([round(v) if v else 0 for v in solution], dtype=np.int64)
+        return counts, info
+
+    def _solve_native(self, ingredient_counts, importance_scores, config, warm_start, keep):
+        """Solve with the in-process backend. It never touches the PuLP model, so no lock is needed.
+
+        The native search gets at most ``NATIVE_HANDOFF_TIME`` seconds. A search
+        still open by then is handed to CBC with its best plan as the MIP start
+        and the rest of the time limit, so a table the native branch-and-bound
+        struggles with costs at most that much more than CBC alone. Models
+        with more than ``NATIVE_MAX_COMBOS`` combinations go to CBC directly.
+        """
+        started = time.perf_counter()
+        n_combos = self.recipes.n_combos if keep is None else int(np.count_nonzero(keep))
+        if n_combos > NATIVE_MAX_COMBOS:
+            counts, info = self.solve(
+                ingredient_counts, importance_scores, solver=replace(config, backend="CBC"), warm_start=warm_start, keep=keep,
+            )
+            info["backend"] = f"{config.backend} → CBC"
+            return counts, info
+        limit = min(config.time_limit, NATIVE_HANDOFF_TIME) if config.time_limit else NATIVE_HANDOFF_TIME
+        counts, result = solve_native(
+            self.recipes,
+            self.recipes.objective(importance_scores),
+            self.recipes.rhs(ingredient_counts),
+            keep=keep,
+            time_limit=limit,
+            gap_rel=config.gap_rel,
+            warm_start=warm_start,
+        )
+        elapsed = time.perf_counter() - started
+        remaining = None if config.time_limit is None else config.time_limit - elapsed
+        if not result["optimal"] and elapsed >= limit and (remaining is None or remaining > 0):
+            handoff = replace(config, backend="CBC", time_limit=remaining)
+            counts, info = self.solve(ingredient_counts, importance_scores, solver=handoff, warm_start=counts, keep=keep)
+            info["backend"] = f"{config.backend} → CBC"
+            info["solve_time"] = time.perf_counter() - started
+            return counts, info
+        info = {
+            "backend": config.backend,
+            "status": LpStatus[LpStatusOptimal if result["optimal"] else LpStatusNotSolved],
+            "solution_status": LpSolution[LpSolutionOptimal if result["optimal"] else LpSolutionIntegerFeasible],
+            "optimal": result["optimal"],
+            "gap": result["gap"],
+            "solve_time": time.perf_counter() - started,
+        }
+        return counts, info
+
+    def solve_relaxation(self, ingredient_counts, importance_scores) -> dict:
+        """Solve the LP relaxation and return its objective, duals and reduced costs.
+
+        Returns:
+            dict: ``objective`` (float), ``solution`` (fractional brew counts),
+            ``shadow_prices`` (one per item: score gained per extra unit of that
+            ingredient) and ``reduced_costs`` (one per combination: score change
+            per brew forced into the plan; <= 0 for unused brews)
+        """
+        with self._lock:
+            self._load(ingredient_counts, importance_scores)
+            self._prob.solve(make_pulp_solver(SolverConfig(backend="CBC", time_limit=None), mip=False))
+            return {
+                "objective": float(value(self._prob.objective) or 0.0),
+                "solution": np.array([var.varValue or 0.0 for var in self._vars]),
+                "shadow_prices": np.array([constraint.pi or 0.0 for constraint in self._constraints]),
+                "reduced_costs": np.array([var.dj or 0.0 for var in self._vars]),
+            }
+
+    def solve_with_minimums(self, ingredient_counts, importance_scores, minimum_loot: dict, solver=None):
+        """Like ``solve``, but every plan must obtain at least ``minimum_loot[name]`` of each named loot type.
+
+        The rows are added to a separate problem over the same brew
+        variables, so the shared model is never modified. The native backend
+        solves through CBC here.
+
+        Returns:
+            tuple: (integer brew counts, solver report as in ``solve``); all
+            zeros with ``optimal`` False if the minimums cannot be met
+        """
+        config = solver or self.solver_config
+        if config.backend == NATIVE_BACKEND:
+            config = replace(config, backend="CBC")
+        keep = presolve(self.recipes, ingredient_counts, importance_scores).keep if self.use_presolve else None
+        pulp_solver = make_pulp_solver(config)
+        with self._lock:
+            prob, constraints = self._new_problem("Maximize_With_Minimums")
+            self._load(ingredient_counts, importance_scores, keep, model=(prob, constraints))
+            for name, minimum in minimum_loot.items():
+                amounts = self.recipes.loot_amount * (np.asarray(self.recipes.loot_names)[self.recipes.loot_index] == name)
+                for k in np.flatnonzero(amounts):
+                    self._vars[k].upBound = None  # presolve may have pruned brews worthless to the objective
+                prob += (LpAffineExpression((self._vars[k], amounts[k]) for k in np.flatnonzero(amounts)) >= minimum,
+                         f"Minimum_{self.recipes.loot_names.index(name)}")
+            started = time.perf_counter()
+            prob.solve(pulp_solver)
+            feasible = prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible)
+            counts = np.array([round(v) if v and feasible else 0 for v in (value(var) for var in self._vars)], dtype=np.int64)
+            info = {
+                "backend": config.backend,
+                "status": LpStatus[prob.status],
+                "solution_status": LpSolution[prob.sol_status],
+                "optimal": prob.sol_status == LpSolutionOptimal,
+                "gap": 0.0 if prob.sol_status == LpSolutionOptimal else None,
+                "solve_time": time.perf_counter() - started,
+            }
+        return counts, info
+
+    def top_plans(self, ingredient_counts, importance_scores, k: int = 5, tolerance: float = 0.0, solver=None) -> list:
+        """Return up to ``k`` good plans, each leaving out a combination of every plan before it.
+
+        The first plan is the regular ``optimize`` result. The rest come from
+        one model that is re-solved in place. After each plan, an exclusion cut
+        requires at least one of that plan's combinations to go unused. It uses
+        one binary per used combination, ``x_k <= M * (1 - drop_k)``, where
+        ``M`` is the total stock and so bounds the number of brews. Each
+        re-solve is the best plan left, so scores never increase. Enumeration
+        stops at the first plan more than ``tolerance`` below the best. A plan
+        that only moves counts between the same combinations, or adds one to
+        them, is never listed: each alternative can be made without some brew
+        of every earlier plan.
+
+        Args:
+            k (int): Maximum number of plans
+            tolerance (float): Allowed relative score loss from the best plan (0.05 = within 5%)
+            solver (SolverConfig, optional): Limits per solve; the alternatives use CBC
+                when the native backend is selected
+
+        Returns:
+            list: ``optimization_output`` dicts, best first, each with ``rank`` and a ``solver`` report;
+            fewer than ``k`` when no other plan is within ``tolerance``
+        """
+        config = solver or self.solver_config
+        best = self.optimize(ingredient_counts, importance_scores, solver=config)
+        best["rank"] = 1
+        plans = [best]
+        if config.backend == NATIVE_BACKEND:
+            config = replace(config, backend="CBC")
+        pulp_solver = make_pulp_solver(config)
+        keep = presolve(self.recipes, ingredient_counts, importance_scores).keep if self.use_presolve else None
+        big_m = max(1.0, float(np.clip(self.recipes.rhs(ingredient_counts), 0, None).sum()))
+        counts = plan_counts(self.recipes, best)
+        floor = best["total_score"] - tolerance * abs(best["total_score"]) - 1e-6
+
+        with self._lock:
+            prob, constraints = self._new_problem("Top_Plans")
+            self._load(ingredient_counts, importance_scores, keep, model=(prob, constraints))
+            while len(plans) < k:
+                drops = []
+                for c in np.flatnonzero(counts):
+                    drop = LpVariable(f"Drop_{len(plans)}_{c}", cat="Binary")
+                    prob += (self._vars[c] + big_m * drop <= big_m, f"Drop_{len(plans)}_{c}")
+                    drops.append(drop)
+                if not drops:
+                    break
+                prob += (LpAffineExpression((drop, 1) for drop in drops) >= 1, f"Exclude_{len(plans)}")
+                started = time.perf_counter()
+                prob.solve(pulp_solver)
+                if prob.sol_status not in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+                    break
+                counts = np.array([round(v) if v else 0 for v in (value(var) for var in self._vars)], dtype=np.int64)
+                output = format_solution(self.recipes, counts, ingredient_counts, importance_scores)
+                if output["total_score"] < floor:
+                    break
+                output["solver"] = {
+                    "backend": config.backend,
+                    "status": LpStatus[prob.status],
+                    "solution_status": LpSolution[prob.sol_status],
+                    "optimal": prob.sol_status == LpSolutionOptimal,
+                    "gap": 0.0 if prob.sol_status == LpSolutionOptimal else None,
+                    "solve_time": time.perf_counter() - started,
+                }
+                output["rank"] = len(plans) + 1
+                plans.append(output)
+        return plans
+
+    def optimize(self, ingredient_counts, importance_scores, solver=None, warm_start=None) -> dict:
+        """Solve and return the ``optimization_output`` dict used by the app.
+
+        Besides the plan, the output carries a ``solver`` report (backend,
+        status, gap, solve time) and a ``presolve`` summary. Only proven-optimal
+        results are cached, so a time-limited plan is never served again.
+        """
+        config = solver or self.solver_config
+        key = None
+        if self.cache is not None:
+            key = make_key(self.recipes.fingerprint, ingredient_counts, importance_scores, config.cache_key())
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        keep = None
+        presolve_summary = None
+        if self.use_presolve:
+            result = presolve(self.recipes, ingredient_counts, importance_scores)
+            keep, presolve_summary = result.keep, result.summary()
+
+        counts, info = self.solve(ingredient_counts, importance_scores, solver=config, warm_start=warm_start, keep=keep)
+        output = format_solution(self.recipes, counts, ingredient_counts, importance_scores)
+        output["solver"] = info
+        if presolve_summary is not None:
+            output["presolve"] = presolve_summary
+        if key is not None and info["optimal"]:
+            self.cache.put(key, output)
+        return output
+
+
+class IncrementalSession:
+    """Per-user memory of the last inputs and plan, for warm-started re-runs.
+
+    Users typically tweak one count or one importance score and re-run. The
+    model itself is shared and never rebuilt; this class decides how to seed
+    the next solve from the previous plan:
+
+    - ``"unchanged"``: return the previous output as-is
+    - ``"solver"``: same inputs but different solver settings (backend, time
+      limit or gap), so re-solve with the previous plan as the MIP start
+    - ``"objective"``: only importance changed, so the previous plan is still
+      feasible and becomes the MIP start (and can be re-scored immediately)
+    - ``"rhs"``/``"both"``: counts changed, so the previous plan is repaired
+      to fit the new counts before being used as the MIP start
+    - ``"cold"``: no previous plan for this recipe table
+    """
+
+    def __init__(self, optimizer: AlchemyOptimizer):
+        self.optimizer = optimizer
+        self.ingredient_counts = None
+        self.importance_scores = None
+        self.solver_key = None
+        self.counts = None
+        self.output = None
+
+    def change_kind(self, ingredient_counts, importance_scores, solver=None) -> str:
+        if self.output is None:
+            return "cold"
+        same_counts = dict(ingredient_counts) == self.ingredient_counts
+        same_importance = dict(importance_scores) == self.importance_scores
+        if same_counts and same_importance:
+            same_solver = (solver or self.optimizer.solver_config).cache_key() == self.solver_key
+            return "unchanged" if same_solver else "solver"
+        if same_counts:
+            return "objective"
+        if same_importance:
+            return "rhs"
+        return "both"
+
+    def rescore(self, importance_scores) -> dict | None:
+        """Return the previous plan scored under new importance scores, without solving."""
+        if self.output is None:
+            return None
+        return format_solution(self.optimizer.recipes, self.counts, self.ingredient_counts, importance_scores)
+
+    def optimize(self, ingredient_counts, importance_scores, solver=None) -> dict:
+        kind = self.change_kind(ingredient_counts, importance_scores, solver)
+        if kind == "unchanged":
+            return self.output
+
+        warm_start = None
+        if kind in ("objective", "solver"):
+            warm_start = self.counts
+        elif kind != "cold":
+            warm_start = repair_plan(self.optimizer.recipes, self.counts, ingredient_counts)
+
+        output = self.optimizer.optimize(ingredient_counts, importance_scores, solver=solver, warm_start=warm_start)
+        self.ingredient_counts = dict(ingredient_counts)
+        self.importance_scores = dict(importance_scores)
+        self.solver_key = (solver or self.optimizer.solver_config).cache_key()
+        self.counts = plan_counts(self.optimizer.recipes, output)
+        self.output = output
+        return output
@@ -0,0 +1,129 @@
+"""Pareto frontier of achievable totals for two loot types.
+
+Importance scores only reach the plans on the convex hull of what is
+achievable; integer plans in between never win for any weighting. The
+frontier here uses the epsilon-constraint method instead:
+
+1. Find the most of loot type ``y`` any plan can obtain.
+2. For evenly spaced floors ``eps`` from 0 to that maximum, maximise loot
+   ``x`` subject to at least ``eps`` of ``y``, with a tie-break small enough
+   to never trade one unit of ``x`` (so each point is Pareto-optimal rather
+   than merely weakly so).
+3. Drop duplicates and dominated points.
+
+The floors are independent solves, so they run on a process pool whose
+workers each build one ``AlchemyOptimizer`` when they start, as in
+``src/sweep.py``. Other loot types get no weight: the frontier shows the
+trade between the two chosen ones only.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pulp import LpSolution, LpSolutionIntegerFeasible, LpSolutionOptimal
+
+from .optimizer import AlchemyOptimizer, format_solution
+from .recipes import CompiledRecipes
+from .solvers import SolverConfig
+from .sweep import summarise_combos
+
+_FEASIBLE = (LpSolution[LpSolutionOptimal], LpSolution[LpSolutionIntegerFeasible])
+
+_worker_optimizer = None
+
+
+def _init_worker(recipes: CompiledRecipes, solver_config: SolverConfig | None) -> None:
+    global _worker_optimizer
+    _worker_optimizer = AlchemyOptimizer(recipes, solver_config=solver_config)
+
+
+def _solve_floor(task):
+    ingredient_counts, weights, loot_y, floor = task
+    return _worker_optimizer.solve_with_minimums(ingredient_counts, weights, {loot_y: floor})
+
+
+def _totals(recipes: CompiledRecipes, counts, loot_type) -> float:
+    mask = np.asarray(recipes.loot_names)[recipes.loot_index] == loot_type
+    return float(np.dot(recipes.loot_amount[mask], counts[mask]))
+
+
+def pareto_frontier(
+    recipes: CompiledRecipes,
+    ingredient_counts,
+    importance_scores,
+    loot_x: str,
+    loot_y: str,
+    points: int = 20,
+    max_workers=None,
+    solver_config=None,
+) -> list[dict]:
+    """Return the Pareto-optimal plans trading ``loot_x`` against ``loot_y``.
+
+    Args:
+        recipes (CompiledRecipes): The compiled recipe table
+        ingredient_counts (dict): Stock available
+        importance_scores (dict): Used only to score each returned plan as the app does
+        loot_x (str): Loot type maximised at every floor
+        loot_y (str): Loot type given increasing floors
+        points (int): Number of floors between 0 and the most ``loot_y`` obtainable
+        max_workers (int, optional): Pool size. Defaults to the CPU count; 1 solves in-process.
+        solver_config (SolverConfig, optional): Backend and limits for every solve
+
+    Returns:
+        list: ``optimization_output`` dicts ordered by increasing ``loot_y``,
+        each with a ``pareto`` entry ``{loot_x: total, loot_y: total}``
+    """
+    if loot_x == loot_y:
+        raise ValueError("choose two different loot types")
+
+    # Two plans' loot_x totals differ by a multiple of the gcd of its (integer)
+    # amounts, so a tie-break worth less than that for all the loot_y a plan can
+    # get never trades away any loot_x.
+    _init_worker(recipes, solver_config)
+    y_counts, _ = _worker_optimizer.solve_with_minimums(ingredient_counts, {loot_y: 1.0}, {})
+    y_max = _totals(recipes, y_counts, loot_y)
+    amounts = recipes.loot_amount[np.asarray(recipes.loot_names)[recipes.loot_index] == loot_x]
+    amounts = np.round(amounts[amounts > 0]).astype(np.int64)
+    step = float(np.gcd.reduce(amounts)) if amounts.size else 1.0
+    weights = {loot_x: 1.0, loot_y: step / (y_max + 1.0)}
+
+    floors = sorted({float(np.floor(y_max * i / max(points - 1, 1))) for i in range(points)})
+    tasks = [(dict(ingredient_counts), weights, loot_y, floor) for floor in floors]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        results = [_solve_floor(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(recipes, solver_config)) as pool:
+            results = list(pool.map(_solve_floor, tasks))
+
+    frontier = {}
+    for counts, info in results:
+        if info["solution_status"] not in _FEASIBLE:
+            continue  # out of time before any plan met the floor
+        key = (_totals(recipes, counts, loot_x), _totals(recipes, counts, loot_y))
+        if key not in frontier:
+            output = format_solution(recipes, counts, ingredient_counts, importance_scores)
+            output["solver"] = info
+            output["pareto"] = {loot_x: key[0], loot_y: key[1]}
+            frontier[key] = output
+    # Keep only points no other point matches on both totals and beats on one.
+    keys = sorted(frontier, key=lambda key: (key[1], key[0]))
+    return [
+        frontier[key] for key in keys
+        if not any(o[0] >= key[0] and o[1] >= key[1] and o != key for o in keys)
+    ]
+
+
+def tabulate_frontier(frontier, loot_x: str, loot_y: str) -> pd.DataFrame:
+    """One row per frontier point: both totals, the app score and a compact plan summary."""
+    return pd.DataFrame([
+        {
+            loot_x: output["pareto"][loot_x],
+            loot_y: output["pareto"][loot_y],
+            "total_score": output["total_score"],
+            "combos": summarise_combos(output["combos_used"]),
+        }
+        for output in frontier
+    ])
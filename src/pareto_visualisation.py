@@ -0,0 +1,55 @@
+"""Plotly view of a two-loot Pareto frontier (see ``src/pareto.py``).
+
+Each marker is one Pareto-optimal plan; clicking it selects that plan so the
+app can load it as the current result.
+"""
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from .pareto import tabulate_frontier
+
+
+def render_pareto_frontier(frontier, loot_x: str, loot_y: str, key: str = "pareto_chart"):
+    """Render the frontier chart and table.
+
+    Returns:
+        int | None: Index into ``frontier`` of the clicked point, if any
+    """
+    if not frontier:
+        st.info("No plan obtains either loot type with these ingredients.")
+        return None
+
+    table = tabulate_frontier(frontier, loot_x, loot_y)
+    fig = go.Figure(
+        go.Scatter(
+            x=table[loot_x],
+            y=table[loot_y],
+            mode="lines+markers",
+            line_shape="hv",
+            marker=dict(color="#7c5cff", size=10),
+            customdata=table[["total_score", "combos"]].to_numpy(),
+            hovertemplate=(
+                f"<b>{loot_x}: %{{x}}</b><br>{loot_y}: %{{y}}<br>score: %{{customdata[0]}}"
+                "<br>%{customdata[1]}<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(
+        xaxis_title=loot_x,
+        yaxis_title=loot_y,
+        margin=dict(l=10, r=10, t=10, b=10),
+        height=360,
+    )
+    event = st.plotly_chart(fig, use_container_width=True, on_select="rerun", selection_mode="points", key=key)
+    st.caption("Click a point to load that plan as the current result.")
+
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    st.download_button(
+        "Download frontier (CSV)",
+        data=table.to_csv(index=False).encode("utf-8"),
+        file_name="pareto_frontier.csv",
+        mime="text/csv",
+    )
+    points = event.selection.points if event else []
+    return points[0]["point_index"] if points else None
@@ -0,0 +1,90 @@
+"""Presolve for the alchemy MIP: brew pruning.
+
+Before a solve, combinations that can never improve the plan are removed
+(fixed to zero) so solve time stays flat as events add ingredients:
+
+- Zero-value brews: a brew is worthless if its loot is worth <= 0 under the
+  current importance scores and it creates no ingredient, or only an
+  ingredient whose every use is itself worthless. Zeroing this whole closed
+  set never lowers the score and never breaks a stock constraint.
+- Unobtainable inputs: a brew needing an ingredient the player has none of and
+  cannot brew from what they do have can never be executed.
+
+These are the only rules: every combination uses its own pair of inputs, so
+no brew is ever dominated by another (one using no more of any ingredient
+for at least the same score) on the event tables. With every loot type
+valued and every ingredient in stock, nothing is pruned.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .recipes import CompiledRecipes
+
+
+@dataclass(frozen=True)
+class PresolveResult:
+    """Outcome of ``presolve``.
+
+    Attributes:
+        keep (np.ndarray): Boolean mask over combinations still in the model
+        zero_value (int): Brews pruned because they can never add score
+        unobtainable (int): Brews pruned because an input can never be obtained
+    """
+
+    keep: np.ndarray
+    zero_value: int
+    unobtainable: int
+
+    @property
+    def n_pruned(self) -> int:
+        return int((~self.keep).sum())
+
+    def summary(self) -> dict:
+        return {
+            "kept": int(self.keep.sum()),
+            "pruned": self.n_pruned,
+            "zero_value": self.zero_value,
+            "unobtainable": self.unobtainable,
+        }
+
+
+def _zero_value_brews(recipes: CompiledRecipes, coefficients) -> np.ndarray:
+    """Return the largest closed set of brews that can be zeroed without loss."""
+    makes_item = recipes.product_index >= 0
+    worthless = coefficients <= 0
+    while True:
+        # An ingredient is worthless once every brew consuming it is worthless.
+        item_worthless = np.ones(recipes.n_items, dtype=bool)
+        item_worthless[recipes.input_index[~worthless, 0]] = False
+        item_worthless[recipes.input_index[~worthless, 1]] = False
+        still = worthless & (~makes_item | item_worthless[recipes.product_index])
+        if np.array_equal(still, worthless):
+            return worthless
+        worthless = still
+
+
+def _unobtainable_brews(recipes: CompiledRecipes, rhs) -> np.ndarray:
+    """Return brews needing an ingredient that is neither held nor brewable."""
+    available = np.asarray(rhs) > 0
+    makes_item = recipes.product_index >= 0
+    while True:
+        possible = available[recipes.input_index[:, 0]] & available[recipes.input_index[:, 1]]
+        grown = available.copy()
+        grown[recipes.product_index[possible & makes_item]] = True
+        if np.array_equal(grown, available):
+            return ~possible
+        available = grown
+
+
+def presolve(recipes: CompiledRecipes, ingredient_counts, importance_scores) -> PresolveResult:
+    """Compute which combinations to keep in the model for these inputs."""
+    coefficients = recipes.objective(importance_scores)
+    zero_value = _zero_value_brews(recipes, coefficients)
+    unobtainable = _unobtainable_brews(recipes, recipes.rhs(ingredient_counts))
+    return PresolveResult(
+        keep=~(zero_value | unobtainable),
+        zero_value=int(zero_value.sum()),
+        unobtainable=int((unobtainable & ~zero_value).sum()),
+    )
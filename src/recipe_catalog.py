@@ -0,0 +1,296 @@
+"""Catalog of event recipe tables with an on-disk compiled cache.
+
+Event tables come as CSV (like ``TT2 Alchemy Event.csv``) or as XLSX
+workbooks (like ``TT2 Alchemy Event_20_06_26.xlsx``), where each recipe
+matrix sheet is one event. Workbook sheets are messy: the matrix sits under a
+title block, may have blank spacer rows/columns, often fills only one
+triangle, and spells some cells differently (``crystal``,
+``Safety Tongs (Event Set)``). ``read_event_table`` turns either format into
+the clean, symmetric table the app has always used.
+
+Every table is parsed once and compiled (``compile_recipes``) into numeric
+arrays; ``RecipeCatalog`` stores those arrays and the cleaned table in a
+versioned ``.npz`` file named by the SHA-256 of the source file, sheet, loot
+types and ``CATALOG_VERSION``. Later loads, in this process or the next one,
+are a cache lookup; editing the source file changes its hash, so stale
+entries are never read.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .recipes import CompiledRecipes, compile_recipes
+
+# Bump when the parsing/normalisation or the cache layout changes.
+CATALOG_VERSION = 1
+
+DEFAULT_EVENT = "TT2 Alchemy Event.csv"
+_EVENT_EXTENSIONS = (".csv", ".xlsx")
+_SHEET_SEPARATOR = " :: "
+_MIN_ITEMS = 8
+
+# Loot spellings used by older event sheets, mapped to the current loot types.
+_LOOT_ALIASES = {
+    "Perks": "Perk Tickets",
+    "Perk": "Perk Tickets",
+    "Shards": "Crafting Shards",
+    "Pet Eggs": "Eggs",
+    "Skill Point": "Skill Points",
+    "Wild Cards": "Wildcards",
+    "Fortune Weapon": "Fortune Weapons",
+    "Unique Equipment": "Event Equipment",
+    "Raid Card Fragments": "Raid Cards",
+}
+
+
+def _file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _normalise_cell(value, items_by_lower):
+    """Canonicalise one recipe cell (ingredient casing, event-set names, loot aliases)."""
+    if not isinstance(value, str) or not value.strip():
+        return np.nan
+    value = " ".join(value.split())
+    if value.lower() in items_by_lower:
+        return items_by_lower[value.lower()]
+    if "(Event Set)" in value:
+        return "Event Equipment"
+    # Single-item loot may name the piece, e.g. "Legendary Equipment (Madcap Goggles)".
+    value = re.sub(r"\s*\(.*\)$", "", value)
+    match = re.match(r"(\d+)\s+(.+)", value)
+    if match:
+        amount, loot = match.groups()
+        return f"{amount} {_LOOT_ALIASES.get(loot, loot)}"
+    return _LOOT_ALIASES.get(value, value)
+
+
+def _matrix_from_sheet(raw: pd.DataFrame) -> pd.DataFrame | None:
+    """Find the recipe matrix in a raw worksheet (no header), or None if there isn't one.
+
+    The header row is the first row with at least ``_MIN_ITEMS`` short text
+    cells; the label column is whichever column, below the header, names
+    the most of those items.
+    """
+    def is_name(cell):
+        return isinstance(cell, str) and 0 < len(cell.strip()) <= 30 and not any(ch.isdigit() for ch in cell)
+
+    for r in range(len(raw)):
+        header = {c: raw.iat[r, c].strip() for c in range(raw.shape[1]) if is_name(raw.iat[r, c])}
+        if len(header) < _MIN_ITEMS or len(set(header.values())) < len(header):
+            continue  # Too few names, or a list (recipe book) rather than a matrix.
+        names = set(header.values())
+        below = raw.iloc[r + 1:]
+        label_col = max(range(raw.shape[1]), key=lambda c: below.iloc[:, c].map(lambda v: isinstance(v, str) and v.strip() in names).sum())
+        rows = {i: below.iat[i, label_col].strip() for i in range(len(below)) if isinstance(below.iat[i, label_col], str) and below.iat[i, label_col].strip() in names}
+        if len(rows) < _MIN_ITEMS:
+            continue
+        items = [name for name in header.values() if name in set(rows.values())]
+        col_of = {name: c for c, name in header.items()}
+        table = pd.DataFrame(
+            [[below.iat[i, col_of[name]] for name in items] for i, label in rows.items() if label in items],
+            index=[label for label in rows.values() if label in items],
+            columns=items,
+            dtype=object,
+        )
+        return table[~table.index.duplicated()].reindex(index=items)
+    return None
+
+
+def read_event_table(path, sheet: str | None = None) -> pd.DataFrame:
+    """Read an event's recipe table from CSV or XLSX into a clean symmetric DataFrame.
+
+    Args:
+        path (str): CSV or XLSX file
+        sheet (str, optional): Worksheet name for XLSX files; defaults to
+            ``"Recipe Matrix"`` if present, else the first sheet holding a matrix
+
+    Returns:
+        pandas.DataFrame: Recipe cells indexed by ingredient on both axes
+
+    Raises:
+        ValueError: If no recipe matrix is found
+    """
+    if str(path).lower().endswith(".csv"):
+        table = pd.read_csv(path, index_col=0)
+    else:
+        sheets = pd.read_excel(path, sheet_name=None, header=None)
+        order = [sheet] if sheet else sorted(sheets, key=lambda name: name != "Recipe Matrix")
+        table = next((t for t in (_matrix_from_sheet(sheets[name]) for name in order) if t is not None), None)
+        if table is None:
+            raise ValueError(f"No recipe matrix found in {path}" + (f" sheet {sheet!r}" if sheet else ""))
+
+    items_by_lower = {str(item).strip().lower(): str(item).strip() for item in table.index}
+    table.index = [items_by_lower[str(item).strip().lower()] for item in table.index]
+    table.columns = [items_by_lower.get(str(item).strip().lower(), str(item).strip()) for item in table.columns]
+    table = table.map(lambda cell: _normalise_cell(cell, items_by_lower))
+    # Older sheets fill only one triangle; a recipe works in either order.
+    return table.combine_first(table.T).loc[table.index, table.index].astype(object)
+
+
+def list_event_sources(directory) -> list[str]:
+    """Return the CSV/XLSX files in ``directory`` that may hold event tables, newest name first."""
+    return sorted(
+        (name for name in os.listdir(directory) if name.lower().endswith(_EVENT_EXTENSIONS) and not name.startswith("~$")),
+        key=lambda name: (name != DEFAULT_EVENT, name),
+    )
+
+
+class RecipeCatalog:
+    """Event recipe tables, compiled once and cached on disk.
+
+    Events are named after their file, plus `` :: <sheet>`` for workbook
+    sheets other than the main "Recipe Matrix". ``load`` returns the cleaned
+    table and its ``CompiledRecipes``; results are memoised in memory and
+    stored under ``cache_dir`` keyed by content hash.
+    """
+
+    def __init__(self, directory, loot_types, cache_dir=None):
+        self.directory = directory
+        self.loot_types = tuple(loot_types)
+        self.cache_dir = cache_dir or os.path.join(directory, ".recipe_cache")
+        self._loaded = {}
+        self._digests = {}
+        self._sheets = {}
+
+    def _digest(self, path) -> str:
+        """SHA-256 of a source file, re-hashed only when its size or mtime changes."""
+        stat = os.stat(path)
+        known = self._digests.get(path)
+        if known is None or known[:2] != (stat.st_size, stat.st_mtime_ns):
+            known = (stat.st_size, stat.st_mtime_ns, _file_digest(path))
+            self._digests[path] = known
+        return known[2]
+
+    def _cache_path(self, source_digest: str, sheet: str | None) -> str:
+        key = json.dumps([CATALOG_VERSION, source_digest, sheet, self.loot_types])
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.npz")
+
+    def events(self) -> list[str]:
+        """Return the selectable event names (the default CSV first)."""
+        events = []
+        for name in list_event_sources(self.directory):
+            events.append(name)
+            if name.lower().endswith(".xlsx"):
+                events += [f"{name}{_SHEET_SEPARATOR}{sheet}" for sheet in self._matrix_sheets(name) if sheet != "Recipe Matrix"]
+        return events
+
+    def _matrix_sheets(self, filename) -> list[str]:
+        """Return the workbook's sheets that hold a recipe matrix, cached by file hash."""
+        path = os.path.join(self.directory, filename)
+        digest = self._digest(path)
+        if digest in self._sheets:
+            return self._sheets[digest]
+        index_path = self._cache_path(digest, "__sheets__").replace(".npz", ".json")
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self._sheets[digest] = json.load(f)
+            return self._sheets[digest]
+        sheets = pd.read_excel(path, sheet_name=None, header=None)
+        matrix_sheets = [name for name, raw in sheets.items() if _matrix_from_sheet(raw) is not None]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(index_path, "w") as f:
+                json.dump(matrix_sheets, f)
+        except OSError:
+            pass
+        self._sheets[digest] = matrix_sheets
+        return matrix_sheets
+
+    def load(self, event: str = DEFAULT_EVENT):
+        """Return ``(table, recipes)`` for an event name from ``events()``.
+
+        Returns:
+            tuple: (pandas.DataFrame recipe table, CompiledRecipes)
+        """
+        filename, _, sheet = event.partition(_SHEET_SEPARATOR)
+        path = os.path.join(self.directory, filename)
+        digest = self._digest(path)
+        memo_key = (digest, sheet or None)
+        if memo_key in self._loaded:
+            return self._loaded[memo_key]
+
+        cache_path = self._cache_path(digest, sheet or None)
+        if os.path.exists(cache_path):
+            try:
+                entry = _read_cache(cache_path)
+            except (OSError, KeyError, ValueError):
+                entry = None  # Unreadable (e.g. a partial write): rebuild below.
+        else:
+            entry = None
+        if entry is None:
+            table = read_event_table(path, sheet or None)
+            entry = (table, compile_recipes(table, self.loot_types))
+            try:
+                _write_cache(cache_path, *entry)
+            except OSError:
+                pass  # Read-only checkout: keep the in-memory copy only.
+        self._loaded[memo_key] = entry
+        return entry
+
+
+def _text_array(values) -> np.ndarray:
+    """Store cells as fixed-width unicode (no pickling); missing cells become ""."""
+    return np.array(["" if not isinstance(v, str) else v for v in values], dtype=str)
+
+
+def _write_cache(cache_path, table: pd.DataFrame, recipes: CompiledRecipes) -> None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    partial = f"{cache_path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        np.savez(
+            f,
+            version=np.array(CATALOG_VERSION),
+            items=_text_array(recipes.items),
+            loot_types=_text_array(recipes.loot_types),
+            products=_text_array(recipes.products),
+            loot_names=_text_array(recipes.loot_names),
+            cells=_text_array(table.to_numpy().ravel()),
+            fingerprint=np.array(recipes.fingerprint),
+            loot_index=recipes.loot_index,
+            loot_amount=recipes.loot_amount,
+            product_index=recipes.product_index,
+            is_ingredient=recipes.is_ingredient,
+            input_index=recipes.input_index,
+            incidence_rows=recipes.incidence_rows,
+            incidence_cols=recipes.incidence_cols,
+            incidence_data=recipes.incidence_data,
+        )
+    # Atomic rename so concurrent readers never see a half-written file.
+    os.replace(partial, cache_path)
+
+
+def _read_cache(cache_path):
+    with np.load(cache_path, allow_pickle=False) as data:
+        if int(data["version"]) != CATALOG_VERSION:
+            raise ValueError("stale catalog cache")
+        items = tuple(data["items"].tolist())
+        input_index = data["input_index"]
+        cells = [v if v else np.nan for v in data["cells"].tolist()]
+        table = pd.DataFrame(np.array(cells, dtype=object).reshape(len(items), len(items)), index=list(items), columns=list(items))
+        recipes = CompiledRecipes(
+            items=items,
+            loot_types=tuple(data["loot_types"].tolist()),
+            combinations=tuple((items[i], items[j]) for i, j in input_index.tolist()),
+            products=tuple(v if v else np.nan for v in data["products"].tolist()),
+            loot_names=tuple(data["loot_names"].tolist()),
+            loot_index=data["loot_index"],
+            loot_amount=data["loot_amount"],
+            product_index=data["product_index"],
+            is_ingredient=data["is_ingredient"],
+            input_index=input_index,
+            incidence_rows=data["incidence_rows"],
+            incidence_cols=data["incidence_cols"],
+            incidence_data=data["incidence_data"],
+            fingerprint=str(data["fingerprint"]),
+        )
+    return table, recipes
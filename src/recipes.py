@@ -0,0 +1,159 @@
+"""Recipe tables: cell parsing and compilation into numeric arrays.
+
+The recipe table is compiled once into a sparse ingredient-incidence matrix
+(COO arrays: +1 for each ingredient a brew consumes, -1 for the ingredient it
+creates) plus per-combination loot arrays, which the optimizer, presolve and
+analysis modules all work from.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def extract_loot(value, importance_keys):
+    """Parse a recipe cell into ``(loot_type, amount)``.
+
+    Cells like ``"12 Currency"`` map to ``("Currency", 12)``, bare loot names
+    like ``"Event Equipment"`` map to an amount of 1, and ingredient products
+    (or anything unrecognised) map to ``("Unknown", 0)``.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        parts = value.split()
+        try:
+            amount = int(parts[0])
+            item_type = ' '.join(parts[1:])
+            for key in importance_keys:
+                if key in item_type:
+                    return (key, amount)
+            return (item_type, amount)
+        except (ValueError, IndexError):
+            sorted_keys = sorted(importance_keys, key=len, reverse=True)
+            for key in sorted_keys:
+                if key in value:
+                    return (key, 1)
+    return ('Unknown', 0)
+
+
+@dataclass(frozen=True)
+class CompiledRecipes:
+    """Numeric form of a recipe table.
+
+    Attributes:
+        items (tuple): Ingredient names, in table order
+        loot_types (tuple): Loot type names used to classify recipe cells
+        combinations (tuple): ``(input1, input2)`` pairs with ``input1 <= input2``
+        products (tuple): Raw recipe cell for each combination
+        loot_names (tuple): Distinct loot names returned by ``extract_loot``
+        loot_index (np.ndarray): Index into ``loot_names`` for each combination
+        loot_amount (np.ndarray): Loot amount for each combination (0 for ingredients)
+        product_index (np.ndarray): Index into ``items`` of the created ingredient, or -1
+        is_ingredient (np.ndarray): True where the product is not a loot type
+        input_index (np.ndarray): ``(n_combos, 2)`` item indices of both inputs
+        incidence_rows, incidence_cols, incidence_data (np.ndarray): COO entries of
+            the net ingredient usage matrix (items x combinations)
+        fingerprint (str): SHA-256 of the items, loot types and recipe cells
+    """
+
+    items: tuple
+    loot_types: tuple
+    combinations: tuple
+    products: tuple
+    loot_names: tuple
+    loot_index: np.ndarray
+    loot_amount: np.ndarray
+    product_index: np.ndarray
+    is_ingredient: np.ndarray
+    input_index: np.ndarray
+    incidence_rows: np.ndarray
+    incidence_cols: np.ndarray
+    incidence_data: np.ndarray
+    fingerprint: str
+
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+
+    @property
+    def n_combos(self) -> int:
+        return len(self.combinations)
+
+    def incidence_dense(self) -> np.ndarray:
+        """Return the net usage matrix as a dense ``(n_items, n_combos)`` array."""
+        matrix = np.zeros((self.n_items, self.n_combos))
+        np.add.at(matrix, (self.incidence_rows, self.incidence_cols), self.incidence_data)
+        return matrix
+
+    def objective(self, importance_scores) -> np.ndarray:
+        """Return the objective coefficient of every combination."""
+        weights = np.array([float(importance_scores.get(name, 0)) for name in self.loot_names])
+        return weights[self.loot_index] * self.loot_amount
+
+    def rhs(self, ingredient_counts) -> np.ndarray:
+        """Return the ingredient counts as an array in ``items`` order."""
+        return np.array([float(ingredient_counts[item]) for item in self.items])
+
+
+def compile_recipes(recipe_df: pd.DataFrame, loot_types) -> CompiledRecipes:
+    """Compile a recipe table (ingredients on both axes) into a ``CompiledRecipes``."""
+    loot_types = tuple(loot_types)
+    items = tuple(recipe_df.index)
+    item_pos = {item: k for k, item in enumerate(items)}
+    combinations = tuple((i, j) for i in items for j in items if i <= j)
+
+    products = []
+    loot_names = list(loot_types)
+    loot_pos = {name: k for k, name in enumerate(loot_names)}
+    loot_index = np.empty(len(combinations), dtype=np.int64)
+    loot_amount = np.empty(len(combinations), dtype=float)
+    product_index = np.full(len(combinations), -1, dtype=np.int64)
+    is_ingredient = np.empty(len(combinations), dtype=bool)
+    input_index = np.empty((len(combinations), 2), dtype=np.int64)
+    rows, cols, data = [], [], []
+
+    for k, (i, j) in enumerate(combinations):
+        product = recipe_df.loc[i, j]
+        products.append(product)
+
+        name, amount = extract_loot(product, loot_types)
+        if name not in loot_pos:
+            loot_pos[name] = len(loot_names)
+            loot_names.append(name)
+        loot_index[k] = loot_pos[name]
+        loot_amount[k] = amount
+        is_ingredient[k] = not any(key in product for key in loot_types if isinstance(product, str))
+
+        input_index[k] = (item_pos[i], item_pos[j])
+        rows += [item_pos[i], item_pos[j]]
+        cols += [k, k]
+        data += [1.0, 1.0]
+        if product in item_pos:
+            product_index[k] = item_pos[product]
+            rows.append(item_pos[product])
+            cols.append(k)
+            data.append(-1.0)
+
+    fingerprint = hashlib.sha256(
+        json.dumps([items, loot_types, products], default=str).encode("utf-8")
+    ).hexdigest()
+
+    return CompiledRecipes(
+        items=items,
+        loot_types=loot_types,
+        combinations=combinations,
+        products=tuple(products),
+        loot_names=tuple(loot_names),
+        loot_index=loot_index,
+        loot_amount=loot_amount,
+        product_index=product_index,
+        is_ingredient=is_ingredient,
+        input_index=input_index,
+        incidence_rows=np.array(rows, dtype=np.int64),
+        incidence_cols=np.array(cols, dtype=np.int64),
+        incidence_data=np.array(data, dtype=float),
+        fingerprint=fingerprint,
+    )
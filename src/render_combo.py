@@ -1,6 +1,39 @@
-import streamlit as st
+import hashlib
+import json
 import re
 
+import streamlit as st
+
+from .result_cache import ResultCache
+
+def combination_card_html(combo, count, product, ingredient_images):
+    """Return the HTML of one combination card (see ``render_combination_card``)."""
+    result_html = f'<span class="count-badge">{int(count)}x [</span>'
+
+    # Inputs
+    result_html += f'<img src="{ingredient_images.get(combo[0], "")}" width="40" height="40" class="ingredient-img"/>'
+    result_html += '<span class="plus-sign">+</span>'
+    result_html += f'<img src="{ingredient_images.get(combo[1], "")}" width="40" height="40" class="ingredient-img"/>'
+    result_html += '<span class="equals-sign">=</span>'
+
+    # Check if it's a product with amount (like Currency)
+    amount_match = re.match(r'^(\d+)\s+(.+)$', product) if isinstance(product, str) else None
+    if amount_match:
+        amount, type_name = amount_match.groups()
+        if "Currency" in type_name:
+            result_html += f'<span class="currency">{amount} {type_name}</span>'
+        else:
+            result_html += f'{amount} {type_name}'
+    elif product in ingredient_images:
+        # It's an ingredient product
+        result_html += f'<img src="{ingredient_images.get(product, "")}" width="40" height="40" class="ingredient-img"/> {product}'
+    else:
+        result_html += product
+
+    result_html += '<span class="equals-sign"> ]</span>'
+    return f'<div class="result-card">{result_html}</div>'
+
+
 def render_combination_card(combo, count, product, ingredient_images):
     """Render a card for a single alchemy combination
 
@@ -8,78 +41,92 @@ def render_combination_card(combo, count, product, ingredient_images):
         combo (tuple): Tuple of ingredient names
         count (float): Number of times this combination is used
         product (str): The product of the combination
-        ingredient_images (dict): Dictionary mapping ingredient names to image sources (base64 data URIs)
+        ingredient_images (dict): Dictionary mapping ingredient names to image sources (thumbnail URLs or data URIs)
     """
-    # Check if it's a product with amount (like Currency)
-    if isinstance(product, str) and re.match(r'^\d+\s+', product):
-        amount_match = re.match(r'^(\d+)\s+(.+)$', product)
-        if amount_match:
-            amount, type_name = amount_match.groups()
-            result_html = f'<span class="count-badge">{int(count)}x [</span>'
+    st.markdown(combination_card_html(combo, count, product, ingredient_images), unsafe_allow_html=True)
 
-            # First ingredient
-            result_html += f'<img src="{ingredient_images.get(combo[0], "")}" width="40" height="40" class="ingredient-img"/>'
 
-            # Plus sign
-            result_html += '<span class="plus-sign">+</span>'
+def _loot_html(loot, amount):
+    if loot == "Currency":
+        return f'<p><span class="currency">{loot}</span>: <b>{int(amount)}</b></p>'
+    return f'<p>{loot}: <b>{int(amount)}</b></p>'
 
-            # Second ingredient
-            result_html += f'<img src="{ingredient_images.get(combo[1], "")}" width="40" height="40" class="ingredient-img"/>'
 
-            # Equals sign
-            result_html += '<span class="equals-sign">=</span>'
+def _split_columns(combos_used, selected_columns):
+    """Split combos into consecutive runs, one per column, as the results layout has always done."""
+    combos_per_column = max(1, (len(combos_used) + selected_columns - 1) // selected_columns)  # Ceiling division
+    columns = [[] for _ in range(selected_columns)]
+    for i, entry in enumerate(combos_used):
+        columns[min(i // combos_per_column, selected_columns - 1)].append(entry)
+    return columns
 
-            # Result
-            if "Currency" in type_name:
-                result_html += f'<span class="currency">{amount} {type_name}</span>'
-            else:
-                result_html += f'{amount} {type_name}'
 
-            result_html += '<span class="equals-sign"> ]</span>'
+# Rendered results blocks, keyed by a hash of the plan and the image sources.
+_results_html_cache = ResultCache(maxsize=64)
+_FLEX_ROW = '<div style="display:flex;flex-wrap:wrap;gap:1rem">'
+_FLEX_COL = '<div style="flex:1 1 0;min-width:14rem">'
 
-            st.markdown(f'<div class="result-card">{result_html}</div>', unsafe_allow_html=True)
-    else:
-        # It's an ingredient product
-        result_html = f'<span class="count-badge">{int(count)}x [</span>'
-
-        # First ingredient
-        result_html += f'<img src="{ingredient_images.get(combo[0], "")}" width="40" height="40" class="ingredient-img"/>'
-
-        # Plus sign
-        result_html += '<span class="plus-sign">+</span>'
 
-        # Second ingredient
-        result_html += f'<img src="{ingredient_images.get(combo[1], "")}" width="40" height="40" class="ingredient-img"/>'
-
-        # Equals sign
-        result_html += '<span class="equals-sign">=</span>'
-
-        # Result ingredient
-        if product in ingredient_images:
-            result_html += f'<img src="{ingredient_images.get(product, "")}" width="40" height="40" class="ingredient-img"/> {product}'
-        else:
-            result_html += product
+def results_html(total_score, combos_used, total_loot, ingredient_images, selected_columns=3):
+    """Return the whole results block (loot summary and combination cards) as one HTML fragment.
 
-        result_html += '<span class="equals-sign"> ]</span>'
+    The fragment reproduces the column layout of the per-element rendering
+    with flex boxes, so it can be sent to the browser in a single message.
+    It is cached per solution, so reruns that keep the same plan reuse it.
+    """
+    key = hashlib.sha256(json.dumps(
+        [total_score, [[list(combo), count, product] for combo, count, product in combos_used], total_loot,
+         sorted(ingredient_images.items())],
+        default=str,
+    ).encode("utf-8")).hexdigest()
+    cached = _results_html_cache.get(key)
+    if cached is not None:
+        return cached
+
+    parts = ['<div class="total-container">', '<h3>Total loot obtained:</h3>', f'<p>Maximum score: {int(total_score)}</p>']
+    loot_items = list(total_loot.items())
+    if len(loot_items) > selected_columns:
+        parts.append(_FLEX_ROW)
+        for col_idx in range(selected_columns):
+            parts.append(_FLEX_COL)
+            parts += [_loot_html(loot, amount) for loot, amount in loot_items[col_idx::selected_columns]]
+            parts.append('</div>')
+        parts.append('</div>')
+    else:
+        parts += [_loot_html(loot, amount) for loot, amount in loot_items]
 
-        st.markdown(f'<div class="result-card">{result_html}</div>', unsafe_allow_html=True)
+    parts += ['<h3>Combinations used:</h3>', _FLEX_ROW]
+    for column in _split_columns(combos_used, selected_columns):
+        parts.append(_FLEX_COL)
+        parts += [combination_card_html(combo, count, product, ingredient_images) for combo, count, product in column]
+        parts.append('</div>')
+    parts += ['</div>', '</div>']
 
+    html = "".join(parts)
+    _results_html_cache.put(key, html)
+    return html
 
 
-def render_results(total_score, combos_used, total_loot, ingredient_images, num_columns=4):
+def render_results(total_score, combos_used, total_loot, ingredient_images, num_columns=4, batched=True):
     """Render the results section with combinations displayed in customizable columns
 
     Args:
         total_score (float): The total score from optimization
         combos_used (list): List of tuples (combo, count, product)
         total_loot (dict): Dictionary of total loot by type
-        ingredient_images (dict): Dictionary mapping ingredient names to image sources (base64 data URIs)
+        ingredient_images (dict): Dictionary mapping ingredient names to image sources (thumbnail URLs or data URIs)
         num_columns (int, optional): Number of columns to display results in. Defaults to 4.
+        batched (bool, optional): Send the whole block as one HTML fragment (``results_html``)
+            instead of one Streamlit element per loot line and card. Defaults to True.
     """
 
     # Allow user to select number of columns
     selected_columns = 3
 
+    if batched:
+        st.markdown(results_html(total_score, combos_used, total_loot, ingredient_images, selected_columns), unsafe_allow_html=True)
+        return
+
     # Render total loot
     st.markdown('<div class="total-container">', unsafe_allow_html=True)
     st.subheader("Total loot obtained:")
@@ -89,39 +136,20 @@ def render_results(total_score, combos_used, total_loot, ingredient_images, num_
     if len(total_loot) > selected_columns:
         loot_cols = st.columns(selected_columns)
         for i, (loot, amount) in enumerate(total_loot.items()):
-            col_idx = i % selected_columns
-            with loot_cols[col_idx]:
-                if loot == "Currency":
-                    st.markdown(f'<p><span class="currency">{loot}</span>: <b>{int(amount)}</b></p>',
-                                unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<p>{loot}: <b>{int(amount)}</b></p>', unsafe_allow_html=True)
+            with loot_cols[i % selected_columns]:
+                st.markdown(_loot_html(loot, amount), unsafe_allow_html=True)
     else:
         # If just a few loot types, show them in a single row
         for loot, amount in total_loot.items():
-            if loot == "Currency":
-                st.markdown(f'<p><span class="currency">{loot}</span>: <b>{int(amount)}</b></p>',
-                            unsafe_allow_html=True)
-            else:
-                st.markdown(f'<p>{loot}: <b>{int(amount)}</b></p>', unsafe_allow_html=True)
+            st.markdown(_loot_html(loot, amount), unsafe_allow_html=True)
 
     st.subheader("Combinations used:")
 
-    # Split combinations across selected number of columns
-    total_combos = len(combos_used)
-    combos_per_column = (total_combos + selected_columns - 1) // selected_columns  # Ceiling division
-
-    # Create the columns
+    # Distribute combinations across the selected number of columns
     cols = st.columns(selected_columns)
+    for col, column_combos in zip(cols, _split_columns(combos_used, selected_columns)):
+        with col:
+            for combo, count, product in column_combos:
+                render_combination_card(combo, count, product, ingredient_images)
 
-    # Distribute combinations across columns
-    for i, (combo, count, product) in enumerate(combos_used):
-        column_index = i // combos_per_column
-        if column_index >= selected_columns:  # Ensure we don't exceed our columns
-            column_index = selected_columns - 1
-
-        # Render the combination in the appropriate column
-        with cols[column_index]:
-            render_combination_card(combo, count, product, ingredient_images)
-
-    st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown('</div>', unsafe_allow_html=True)
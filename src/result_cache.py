@@ -0,0 +1,83 @@
+"""In-process LRU cache of optimizer results.
+
+Most submissions use the default inputs (2 of every ingredient and the
+default importance scores), so identical requests are answered from memory
+instead of re-solving the MIP. Keys are a SHA-256 of the recipe table
+fingerprint plus the canonicalised ``ingredient_counts`` and
+``importance_scores`` dicts (sorted, with counts as ints and scores as floats),
+so dict ordering and ``2`` vs ``2.0`` do not cause spurious misses.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def make_key(recipes_fingerprint: str, ingredient_counts, importance_scores, *extra) -> str:
+    """Return the canonical cache key for one set of optimizer inputs."""
+    payload = [
+        recipes_fingerprint,
+        sorted((str(name), int(count)) for name, count in ingredient_counts.items()),
+        sorted((str(name), float(score)) for name, score in importance_scores.items()),
+        [str(part) for part in extra],
+    ]
+    encoded = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """A thread-safe, size-bounded LRU mapping of cache key -> optimizer output.
+
+    Stored values are deep-copied on the way in and out so callers can keep
+    mutating their own result dicts without corrupting the cache.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """Return a copy of the cached value for ``key``, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key]
+        return copy.deepcopy(value)
+
+    def put(self, key, value) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -1,7 +1,17 @@
 """Persistent logging of optimizer runs to a Google Sheet.
 
 Each run is stored as one wide row:
-    timestamp | <one column per ingredient (count)> | <one column per loot type (importance)>
+    timestamp | event | <one column per ingredient (count)> | <one column per loot type (importance)> | stage_timings
+
+Values are written under the sheet's header by column name, so events with
+different ingredients share one sheet: columns a row needs but the header
+lacks (a new event's ingredients, or ``event``/``stage_timings`` on older
+sheets) are appended to the header on the next write, and cells of other
+events' ingredients stay empty. Rows logged before the ``event`` column
+existed belong to the default event (see ``runs_for_event``).
+
+``stage_timings`` is a JSON object of seconds per app stage for that run
+(see ``src/stage_timing.py``).
 
 This is used to build the aggregate "community" statistics (box plots of
 ingredient counts and a loot-importance vote tally) and to power the
@@ -16,15 +26,34 @@ Configuration (Streamlit secrets):
 
 If these secrets are missing, logging silently no-ops so local development
 still works without a backend.
+
+Rows are written by a background ``RunLogWriter``: the "Run optimizer" click
+only queues its row, and the writer appends whatever is pending in one
+``append_rows`` call every few seconds (or sooner once a batch fills up).
 """
 
+import atexit
 import datetime
+import json
+import queue
+import threading
+import time
 
 import pandas as pd
 import streamlit as st
 
 _SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 _TIMESTAMP_COL = "timestamp"
+_EVENT_COL = "event"
+_TIMINGS_COL = "stage_timings"
+
+# Batching and retry settings of the background writer.
+_BATCH_SIZE = 25  # rows per append_rows call at most before an early flush
+_FLUSH_INTERVAL = 10.0  # seconds a queued row waits at most
+_MAX_RETRIES = 5  # attempts per flush; failed rows are kept for the next one
+_BACKOFF = 1.0  # seconds before the first retry, doubled after each failure
+_MAX_PENDING = 1000  # rows kept while the sheet is unreachable; the oldest are dropped beyond this
+_STOP = object()
 
 
 def is_logging_configured() -> bool:
@@ -51,43 +80,164 @@ def _get_worksheet():
     return client.open_by_key(sheet_key).sheet1
 
 
-def _build_header(ingredient_order, loot_order) -> list[str]:
-    return [_TIMESTAMP_COL, *ingredient_order, *loot_order]
+class RunLogWriter:
+    """Appends logged runs to the sheet from a background thread, in batches.
 
+    ``log`` only queues a record (column name -> value). The worker thread
+    writes everything pending with one ``append_rows`` call once
+    ``batch_size`` records are waiting or the oldest has waited
+    ``flush_interval`` seconds, retrying a failed write with exponential
+    backoff. The header is read once per process (row 1 only, rather than the
+    whole sheet on every run) and remembered; each record is laid out under
+    it by name, and missing columns are added to it first.
+    ``close`` (registered with ``atexit``) flushes what is left.
 
-def log_run(ingredient_counts, importance_scores, ingredient_order, loot_order) -> bool:
-    """Append a single run to the sheet. Returns True on success.
+    Attributes:
+        rows_written (int): Rows appended so far
+        last_error (str | None): The most recent write error, cleared by the next success
+    """
+
+    def __init__(self, get_worksheet, batch_size: int = _BATCH_SIZE, flush_interval: float = _FLUSH_INTERVAL,
+                 max_retries: int = _MAX_RETRIES, on_flush=None):
+        """
+        Args:
+            get_worksheet (callable): Returns the gspread worksheet (called on the worker thread)
+            batch_size (int): Pending rows that trigger a flush before the interval is up
+            flush_interval (float): Seconds the oldest pending row waits at most
+            max_retries (int): Write attempts per flush
+            on_flush (callable, optional): Called after every successful write
+        """
+        self._get_worksheet = get_worksheet
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._on_flush = on_flush
+        self._header = None  # the sheet's row 1, once read
+        self.rows_written = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="run-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, record: dict) -> None:
+        """Queue one record (column name -> value, in the order new columns should take) for the next write."""
+        self._queue.put(record)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Write any pending rows and stop the worker thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        pending = []
+        deadline = None
+        while True:
+            wait = None if not pending else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                if pending:
+                    self._flush(pending)
+                return
+            if item is not None:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+            if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                pending = self._flush(pending)
+                deadline = time.monotonic() + self.flush_interval
+
+    def _layout(self, ws, pending) -> list:
+        """Return the rows to append for ``pending``, extending the sheet's header first if needed."""
+        if self._header is None:
+            # gspread returns [] for an empty first row, so check for actual cell content.
+            first_row = ws.row_values(1)
+            self._header = first_row if any(first_row) else []
+        header = list(self._header)
+        for record in pending:
+            header += [name for name in record if name not in header]
+        rows = [[record.get(name, "") for name in header] for record in pending]
+        if not self._header:
+            return [header] + rows  # empty sheet: the header goes in with the first batch
+        if header != self._header:
+            ws.update([header], "A1", value_input_option="USER_ENTERED")
+            self._header = header
+        return rows
+
+    def _flush(self, pending) -> list:
+        """Append ``pending`` in one call; return the records still unwritten after every retry."""
+        for attempt in range(self.max_retries):
+            try:
+                ws = self._get_worksheet()
+                rows = self._layout(ws, pending)
+                ws.append_rows(rows, value_input_option="USER_ENTERED")
+                if not self._header:
+                    self._header = rows[0]
+                self.rows_written += len(pending)
+                self.last_error = None
+                if self._on_flush is not None:
+                    self._on_flush()
+                return []
+            except Exception as exc:  # noqa: BLE001 - logging must never crash the app
+                self.last_error = str(exc)
+                if attempt + 1 < self.max_retries:
+                    time.sleep(_BACKOFF * 2 ** attempt)
+        return pending[-_MAX_PENDING:]
+
+
+@st.cache_resource(show_spinner=False)
+def _get_writer() -> RunLogWriter:
+    """One background writer per server process, flushed when the process exits."""
+    # New rows won't appear in the cached fetch until it is invalidated.
+    writer = RunLogWriter(_get_worksheet, on_flush=lambda: fetch_runs.clear())
+    atexit.register(writer.close)
+    return writer
 
-    Fails gracefully (returns False) if the backend is not configured or any
-    network/auth error occurs, so the optimizer UX is never blocked by logging.
+
+def log_run(ingredient_counts, importance_scores, ingredient_order, loot_order, stage_timings=None, event=None) -> bool:
+    """Queue a single run for the sheet. Returns True once it is queued.
+
+    The row is written shortly afterwards by the background ``RunLogWriter``,
+    so the optimizer UX never waits on (or is broken by) the Sheets API.
+    Returns False if the backend is not configured.
+
+    Args:
+        event (str, optional): The event the run was solved for; its ingredients
+            are ``ingredient_order``
     """
     if not is_logging_configured():
         return False
     try:
-        ws = _get_worksheet()
-        header = _build_header(ingredient_order, loot_order)
-
-        # Write the header row once if the sheet has no content yet.
-        # Note: gspread returns [[]] (truthy) for an empty sheet, so check
-        # for actual cell content rather than truthiness of the list.
-        existing = ws.get_all_values()
-        if not any(any(cell for cell in row) for row in existing):
-            ws.append_row(header, value_input_option="USER_ENTERED")
-
-        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        row = [timestamp]
-        row += [ingredient_counts.get(name, "") for name in ingredient_order]
-        row += [importance_scores.get(name, "") for name in loot_order]
-        ws.append_row(row, value_input_option="USER_ENTERED")
-
-        # New row won't appear in the cached fetch until it is invalidated.
-        fetch_runs.clear()
+        record = {
+            _TIMESTAMP_COL: datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            _EVENT_COL: event or "",
+        }
+        record.update({name: ingredient_counts.get(name, "") for name in ingredient_order})
+        record.update({name: importance_scores.get(name, "") for name in loot_order})
+        record[_TIMINGS_COL] = json.dumps(stage_timings) if stage_timings else ""
+        _get_writer().log(record)
         return True
     except Exception as exc:  # noqa: BLE001 - logging must never crash the app
         st.session_state["_run_logging_error"] = str(exc)
         return False
 
 
+def runs_for_event(runs_df: pd.DataFrame, event: str, default_event: str) -> pd.DataFrame:
+    """Return the logged runs of one event.
+
+    Runs logged before the ``event`` column existed count as ``default_event``.
+    """
+    if runs_df is None or runs_df.empty:
+        return runs_df
+    if _EVENT_COL not in runs_df.columns:
+        return runs_df if event == default_event else runs_df.iloc[0:0]
+    events = runs_df[_EVENT_COL].replace("", default_event).fillna(default_event)
+    return runs_df[events == event]
+
+
 @st.cache_data(ttl=300, show_spinner=False)
 def fetch_runs() -> pd.DataFrame:
     """Return all logged runs as a DataFrame (empty if unconfigured/unavailable)."""
@@ -0,0 +1,239 @@
+"""Executable brew order for a plan, and a check that every step is affordable.
+
+The optimizer only says how many of each combination to brew; it allows
+chains such as Leaf + Leaf -> Petal then Petal + Petal -> Berries as long as
+the totals fit the stock. Brewing them in the wrong order runs out of Petal
+part-way through.
+
+``schedule_brews`` orders the brews along the producer -> consumer graph
+(a brew that makes an ingredient comes before every brew that uses it) with
+Kahn's algorithm, grouping brews into batches whose members do not depend on
+each other and so can run together. Loot brews produce nothing another brew
+uses, so they all go in one last batch. Any order that respects the graph is
+executable whenever the plan fits the stock: every ingredient is fully
+brewed before its first use.
+
+``verify_schedule`` replays a schedule as one steps x items matrix of stock
+changes (a cumulative sum, as in ``track_inventory_from_formatted_combos``)
+and reports each step that needs more of an ingredient than is on hand.
+
+Both are linear in the number of brews (times the number of items for the
+matrix), so they are cheap enough to run on every solve and in batch jobs.
+
+``brew_steps`` turns a plan into ``BrewSteps``: the scheduled brews as item-id
+arrays plus the stock before and after each one. It is built once per plan;
+the inventory table and the crafting graph both read it rather than
+formatting and re-parsing each other's strings.
+"""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+# Shortfalls smaller than this are rounding in fractional counts, not real violations.
+_TOLERANCE = 1e-9
+
+
+def schedule_brews(formatted_combos) -> list[dict]:
+    """Order a plan's brews so every ingredient is brewed before it is used.
+
+    Args:
+        formatted_combos (list): Dicts with keys input1, input2, count, result, is_ingredient
+
+    Returns:
+        list: Copies of the combos in execution order, each with a ``batch``
+        number (0-based). Brews in the same batch do not depend on each other;
+        within a batch the input order is kept. Brews caught in a production
+        cycle (which no order can resolve) go in a batch of their own before
+        the loot brews, for ``verify_schedule`` to flag if the stock does not
+        cover them.
+    """
+    n = len(formatted_combos)
+    producers = {}  # item -> brews making it
+    for k, combo in enumerate(formatted_combos):
+        if combo['is_ingredient']:
+            producers.setdefault(combo['result'], []).append(k)
+
+    # A brew waits for every input some other brew makes; an item is ready once all its producers ran.
+    pending = {item: len(brews) for item, brews in producers.items()}
+    consumers = {}  # item -> brews waiting for it
+    waiting = [0] * n
+    for k, combo in enumerate(formatted_combos):
+        for item in {combo['input1'], combo['input2']}:
+            if item in producers and k not in producers[item]:
+                consumers.setdefault(item, []).append(k)
+                waiting[k] += 1
+
+    batch = [None] * n
+    frontier = [k for k in range(n) if formatted_combos[k]['is_ingredient'] and not waiting[k]]
+    level = 0
+    while frontier:
+        ready = []
+        for k in frontier:
+            batch[k] = level
+            item = formatted_combos[k]['result']
+            pending[item] -= 1
+            if pending[item] == 0:
+                for c in consumers.get(item, ()):
+                    waiting[c] -= 1
+                    if not waiting[c] and formatted_combos[c]['is_ingredient']:
+                        ready.append(c)
+        frontier = sorted(ready)
+        level += 1
+
+    cyclic = [k for k in range(n) if formatted_combos[k]['is_ingredient'] and batch[k] is None]
+    for k in cyclic:
+        batch[k] = level
+    loot_batch = level + 1 if cyclic else level
+    for k in range(n):
+        if batch[k] is None:
+            batch[k] = loot_batch
+
+    order = sorted(range(n), key=lambda k: (batch[k], k))
+    return [{**formatted_combos[k], 'batch': batch[k]} for k in order]
+
+
+def verify_schedule(ingredient_counts, scheduled_combos) -> list[dict]:
+    """Check that every brew in order has its inputs on hand.
+
+    Args:
+        ingredient_counts (dict): Initial ingredient counts
+        scheduled_combos (list): Combos in the order they are brewed, e.g. from ``schedule_brews``
+
+    Returns:
+        list: One dict per shortfall, ``{"step", "item", "available", "required"}``,
+        with 1-based steps; empty when the order is executable
+    """
+    columns = {name: j for j, name in enumerate(ingredient_counts)}
+    used, made = [], []  # (step, column, amount)
+    for i, combo in enumerate(scheduled_combos):
+        count = combo['count']
+        used += [(i, columns.setdefault(item, len(columns)), count) for item in (combo['input1'], combo['input2'])]
+        if combo['is_ingredient']:
+            made.append((i, columns.setdefault(combo['result'], len(columns)), count))
+    if not used:
+        return []
+
+    shape = (len(scheduled_combos), len(columns))
+    consumed, produced = np.zeros(shape), np.zeros(shape)
+    for matrix, entries in ((consumed, used), (produced, made)):
+        if entries:
+            rows, cols, amounts = zip(*entries)
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(amounts, dtype=float))
+    initial = np.zeros(len(columns))
+    initial[:len(ingredient_counts)] = list(ingredient_counts.values())
+
+    # Stock before each step: the initial counts plus every earlier step's net change.
+    net = produced - consumed
+    before = initial + np.cumsum(net, axis=0) - net
+    steps, items = np.nonzero((consumed > 0) & (consumed - before > _TOLERANCE))
+    names = list(columns)
+    return [
+        {
+            "step": int(i) + 1,
+            "item": names[j],
+            "available": float(before[i, j]),
+            "required": float(consumed[i, j]),
+        }
+        for i, j in zip(steps, items)
+    ]
+
+
+@dataclass(frozen=True)
+class BrewSteps:
+    """A plan's brews in brewing order, with the stock around each one.
+
+    Attributes:
+        items (tuple): Item names: the initial items, then brewed ingredients
+            and loot types in order of first appearance
+        n_initial (int): How many of ``items`` came from the initial counts
+        inputs (np.ndarray): ``(n_steps, 2)`` item ids of both inputs
+        counts (np.ndarray): Times each step's combination is brewed
+        outputs (np.ndarray): Item id of the brewed ingredient or loot type, or -1
+            for a loot cell without an amount
+        amounts (np.ndarray): How much of ``outputs`` each step adds
+        is_ingredient (np.ndarray): True where the step brews an ingredient
+        batches (np.ndarray): Batch of each step, from ``schedule_brews``
+        results (tuple): Recipe result text of each step (e.g. ``"226 Currency"``)
+        inventory (np.ndarray): ``(n_steps + 1, n_items)`` stock; row ``i`` is
+            the stock before step ``i`` (0-based) and row ``i + 1`` after it
+    """
+
+    items: tuple
+    n_initial: int
+    inputs: np.ndarray
+    counts: np.ndarray
+    outputs: np.ndarray
+    amounts: np.ndarray
+    is_ingredient: np.ndarray
+    batches: np.ndarray
+    results: tuple
+    inventory: np.ndarray
+
+    @property
+    def n_steps(self) -> int:
+        return len(self.counts)
+
+
+def brew_steps(ingredient_counts, formatted_combos) -> BrewSteps:
+    """Schedule a plan and compute the stock before and after every brew.
+
+    The stock is one cumulative sum over a steps x items matrix of changes.
+    Only when that would take an input below zero (a plan the stock cannot
+    cover; ``verify_schedule`` reports those) are the steps replayed one by
+    one with every input clamped at 0.
+
+    Args:
+        ingredient_counts (dict): Initial ingredient counts
+        formatted_combos (list): Dicts with keys input1, input2, count, result, is_ingredient
+
+    Returns:
+        BrewSteps: The scheduled plan
+    """
+    scheduled = schedule_brews(formatted_combos)
+    columns = {name: j for j, name in enumerate(ingredient_counts)}
+    n = len(scheduled)
+    inputs = np.zeros((n, 2), dtype=np.int64)
+    counts = np.zeros(n)
+    outputs = np.full(n, -1, dtype=np.int64)
+    amounts = np.zeros(n)
+    for i, combo in enumerate(scheduled):
+        inputs[i] = [columns.setdefault(item, len(columns)) for item in (combo['input1'], combo['input2'])]
+        counts[i] = combo['count']
+        if combo['is_ingredient']:
+            outputs[i], amounts[i] = columns.setdefault(combo['result'], len(columns)), counts[i]
+        else:
+            loot = re.match(r"(\d+)\s*(.+)", combo['result'])
+            if loot:
+                outputs[i], amounts[i] = columns.setdefault(loot.group(2), len(columns)), int(loot.group(1)) * counts[i]
+
+    deltas = np.zeros((n + 1, len(columns)))
+    deltas[0, :len(ingredient_counts)] = list(ingredient_counts.values())
+    steps = np.arange(1, n + 1)
+    np.add.at(deltas, (np.repeat(steps, 2), inputs.ravel()), -np.repeat(counts, 2))
+    made = outputs >= 0
+    np.add.at(deltas, (steps[made], outputs[made]), amounts[made])
+    inventory = np.cumsum(deltas, axis=0)
+
+    if (inventory < 0).any():
+        for i in range(n):
+            row = inventory[i].copy()
+            for column in inputs[i]:
+                row[column] = max(0.0, row[column] - counts[i])
+            if made[i]:
+                row[outputs[i]] += amounts[i]
+            inventory[i + 1] = row
+
+    return BrewSteps(
+        items=tuple(columns),
+        n_initial=len(ingredient_counts),
+        inputs=inputs,
+        counts=counts,
+        outputs=outputs,
+        amounts=amounts,
+        is_ingredient=np.array([combo['is_ingredient'] for combo in scheduled], dtype=bool),
+        batches=np.array([combo['batch'] for combo in scheduled], dtype=np.int64),
+        results=tuple(combo['result'] for combo in scheduled),
+        inventory=inventory,
+    )
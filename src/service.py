@@ -0,0 +1,291 @@
+"""Stand-alone JSON HTTP service for the optimizer.
+
+The HTTP server is the standard library's; the solve path needs only the
+optimizer's own dependencies (NumPy, pandas, PuLP), not Streamlit.
+
+One server process keeps a pool of warm worker processes. Each worker
+holds an ``AlchemyOptimizer`` per event, with its built model and result
+cache, so a request costs a solve rather than a Streamlit rerun::
+
+    python -m src.service --port 8765 --workers 4
+
+Endpoints (JSON in, JSON out):
+
+- ``GET /health``: status, events and solver backends
+- ``POST /optimize``: ``{"event"?, "ingredient_counts", "importance_scores", "solver"?}``
+  returns the app's optimization output
+- ``POST /sweep``: the same plus ``"loot_type"`` and ``"values"``; one row per value
+- ``POST /track_inventory``: ``{"ingredient_counts", "formatted_combos"}``
+  returns the step-by-step inventory rows and any ``violations`` of the brew order
+
+``solver`` takes ``backend``, ``time_limit`` and ``gap_rel`` as in
+``SolverConfig``; the time limit is capped at the request timeout. When
+``--max-concurrent`` requests are already running, new ones get 503 with
+``Retry-After``. A solve that outlives ``--timeout`` returns 504.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .batch import parse_problem
+from .config import default_importance_scores
+from .inventory_tracking import track_inventory_from_formatted_combos
+from .optimizer import AlchemyOptimizer
+from .recipe_catalog import DEFAULT_EVENT, RecipeCatalog
+from .result_cache import ResultCache
+from .schedule import schedule_brews, verify_schedule
+from .solvers import SolverConfig, available_backends
+from .sweep import importance_grid, tabulate_sweep
+
+_MAX_BODY_BYTES = 1 << 20
+_MAX_SWEEP_POINTS = 200
+
+_worker_catalog = None
+_worker_optimizers = {}
+
+
+def _finite(value) -> float:
+    """Return ``value`` as a float, rejecting inf and NaN (e.g. a JSON ``1e999``)."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+class ServiceError(Exception):
+    """A request failure with the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _init_worker(directory, loot_types) -> None:
+    global _worker_catalog
+    _worker_catalog = RecipeCatalog(directory, loot_types)
+
+
+def _worker_optimizer(event) -> AlchemyOptimizer:
+    """Return this worker's optimizer for an event, building the model on first use."""
+    _, recipes = _worker_catalog.load(event)
+    optimizer = _worker_optimizers.get(recipes.fingerprint)
+    if optimizer is None:
+        optimizer = AlchemyOptimizer(recipes, cache=ResultCache(maxsize=256))
+        _worker_optimizers[recipes.fingerprint] = optimizer
+    return optimizer
+
+
+def _warm(event) -> None:
+    _worker_optimizer(event)
+
+
+def _optimize(event, ingredient_counts, importance_scores, solver_config) -> dict:
+    return _worker_optimizer(event).optimize(ingredient_counts, importance_scores, solver=solver_config)
+
+
+def _jsonable(value):
+    """Turn tuples and NumPy scalars (as in optimizer outputs) into plain JSON types."""
+    return json.loads(json.dumps(value, default=lambda value: value.item() if hasattr(value, "item") else str(value)))
+
+
+class OptimizerService:
+    """Request handling independent of HTTP: validation, the worker pool and limits.
+
+    Args:
+        directory (str): Folder holding the event tables (see ``RecipeCatalog``)
+        workers (int, optional): Worker processes; defaults to the CPU count
+        max_concurrent (int): Requests allowed to run at once
+        timeout (float): Seconds a request may wait on its solves
+    """
+
+    def __init__(self, directory, workers=None, max_concurrent: int = 8, timeout: float = 30.0):
+        self.catalog = RecipeCatalog(directory, default_importance_scores.keys())
+        self.events = self.catalog.events()
+        self.timeout = timeout
+        self.workers = workers or os.cpu_count() or 1
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(directory, self.catalog.loot_types)
+        )
+        # Build the default event's model in every worker before the first request.
+        warm = [self._pool.submit(_warm, DEFAULT_EVENT) for _ in range(self.workers)]
+        for future in warm:
+            future.result()
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    def _problem(self, payload: dict):
+        event = payload.get("event", DEFAULT_EVENT)
+        if event not in self.events:
+            raise ServiceError(404, f"unknown event {event!r}")
+        _, recipes = self.catalog.load(event)
+        try:
+            ingredient_counts, importance_scores = parse_problem(payload, recipes)
+        except (AttributeError, TypeError, ValueError) as exc:
+            raise ServiceError(400, f"invalid problem: {exc}") from exc
+        return event, recipes, ingredient_counts, importance_scores
+
+    def _solver_config(self, payload: dict) -> SolverConfig:
+        options = payload.get("solver") or {}
+        backend = options.get("backend", "CBC")
+        if backend not in available_backends():
+            raise ServiceError(400, f"unknown solver backend {backend!r}")
+        try:
+            time_limit = min(_finite(options.get("time_limit", self.timeout)), self.timeout)
+            gap_rel = _finite(options["gap_rel"]) if options.get("gap_rel") is not None else None
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(400, f"invalid solver options: {exc}") from exc
+        if time_limit <= 0:
+            raise ServiceError(400, "invalid solver options: time_limit must be positive")
+        if gap_rel is not None and gap_rel < 0:
+            raise ServiceError(400, "invalid solver options: gap_rel must not be negative")
+        return SolverConfig(backend=backend, time_limit=time_limit, gap_rel=gap_rel)
+
+    def _results(self, futures) -> list:
+        # One deadline for the whole request, however many solves it fans out to.
+        deadline = time.monotonic() + self.timeout
+        try:
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeoutError as exc:
+            for future in futures:
+                future.cancel()
+            raise ServiceError(504, f"solve did not finish within {self.timeout:g}s") from exc
+
+    def handle(self, path: str, payload: dict | None) -> dict:
+        """Dispatch one request. Raises ``ServiceError`` for any client-visible failure."""
+        if path == "/health":
+            return {"status": "ok", "workers": self.workers, "events": self.events, "backends": available_backends()}
+        routes = {"/optimize": self.optimize, "/sweep": self.sweep, "/track_inventory": self.track_inventory}
+        if path not in routes:
+            raise ServiceError(404, f"no endpoint {path}")
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "expected a JSON object body")
+        if not self._slots.acquire(blocking=False):
+            raise ServiceError(503, "server busy, retry shortly")
+        try:
+            return routes[path](payload)
+        finally:
+            self._slots.release()
+
+    def optimize(self, payload: dict) -> dict:
+        event, _, ingredient_counts, importance_scores = self._problem(payload)
+        config = self._solver_config(payload)
+        [output] = self._results([self._pool.submit(_optimize, event, ingredient_counts, importance_scores, config)])
+        return _jsonable(output)
+
+    def sweep(self, payload: dict) -> dict:
+        event, recipes, ingredient_counts, importance_scores = self._problem(payload)
+        config = self._solver_config(payload)
+        loot_type, values = payload.get("loot_type"), payload.get("values")
+        if loot_type not in recipes.loot_types:
+            raise ServiceError(400, f"unknown loot type {loot_type!r}")
+        if not isinstance(values, list) or not 0 < len(values) <= _MAX_SWEEP_POINTS:
+            raise ServiceError(400, f"values must be a list of 1 to {_MAX_SWEEP_POINTS} numbers")
+        try:
+            values = [_finite(v) for v in values]
+            points = [(ingredient_counts, scores) for scores in importance_grid(importance_scores, loot_type, values)]
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(400, f"invalid values: {exc}") from exc
+        futures = [self._pool.submit(_optimize, event, counts, scores, config) for counts, scores in points]
+        table = tabulate_sweep(recipes, points, self._results(futures), loot_type)
+        return {"rows": _jsonable(table.to_dict(orient="records"))}
+
+    def track_inventory(self, payload: dict) -> dict:
+        combos = payload.get("formatted_combos")
+        counts = payload.get("ingredient_counts")
+        if not isinstance(combos, list) or not isinstance(counts, dict):
+            raise ServiceError(400, "expected ingredient_counts (object) and formatted_combos (list)")
+        try:
+            history = track_inventory_from_formatted_combos(counts, combos)
+            violations = verify_schedule(counts, schedule_brews(combos))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ServiceError(400, f"invalid formatted_combos: {exc}") from exc
+        return {"steps": _jsonable(history.to_dict(orient="records")), "violations": violations}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TT2Optimiser"
+
+    def _reply(self, status: int, body: dict, headers=()) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, payload) -> None:
+        try:
+            self._reply(200, self.server.service.handle(self.path.split("?")[0], payload))
+        except ServiceError as exc:
+            headers = [("Retry-After", "1")] if exc.status == 503 else []
+            self._reply(exc.status, {"error": str(exc)}, headers)
+        except Exception as exc:  # noqa: BLE001 - report, keep serving
+            self._reply(500, {"error": f"internal error: {exc}"})
+
+    def do_GET(self):
+        self._dispatch(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY_BYTES:
+            self._reply(413, {"error": f"body larger than {_MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._reply(400, {"error": "body is not valid JSON"})
+            return
+        self._dispatch(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service: OptimizerService, host: str = "127.0.0.1", port: int = 8765, quiet: bool = False) -> ThreadingHTTPServer:
+    """Return a threaded HTTP server answering with ``service`` (call ``serve_forever`` on it)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the optimizer as a JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (0.0.0.0 for all)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Solver worker processes (default: CPU count)")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Requests handled at once; more get 503")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds a request may spend solving before 504")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request")
+    args = parser.parse_args(argv)
+
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    service = OptimizerService(app_dir, args.workers, args.max_concurrent, args.timeout)
+    server = make_server(service, args.host, args.port, args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {service.workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Solver backends for the alchemy optimizer.
+
+A ``SolverConfig`` names a backend and its limits; ``make_pulp_solver`` turns
+it into a PuLP solver object. Backends:
+
+- ``"Native"``: the in-process NumPy branch-and-bound in ``src/native_solver.py``
+  (always available; no subprocess or temp files, fastest for small tables)
+- ``"CBC"``: PuLP's bundled CBC (always available)
+- ``"HiGHS"``: HiGHS through ``highspy`` if installed, else the ``highs`` binary
+- any other PuLP solver name available locally (e.g. ``"GLPK_CMD"``)
+
+Every backend gets the same time limit, relative MIP gap and thread count, so
+a pathological input can't hold a worker for longer than ``time_limit``.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import pulp
+
+NATIVE_BACKEND = "Native"
+
+_ALIASES = {
+    "CBC": ("PULP_CBC_CMD",),
+    "HiGHS": ("HiGHS", "HiGHS_CMD"),
+}
+
+# PuLP solvers that accept ``warmStart`` and read initial variable values.
+_WARM_START_SOLVERS = {"PULP_CBC_CMD", "COIN_CMD", "HiGHS_CMD", "CPLEX_CMD", "CPLEX_PY", "GUROBI", "GUROBI_CMD"}
+
+
+@dataclass(frozen=True)
+class SolverConfig:
+    """Which backend to solve with and how long it may take.
+
+    Attributes:
+        backend (str): ``"Native"``, ``"CBC"``, ``"HiGHS"`` or a PuLP solver name
+        time_limit (float, optional): Wall-clock limit in seconds; None for no limit
+        gap_rel (float, optional): Stop once the relative MIP gap is below this
+        threads (int, optional): Solver threads; None leaves the solver default
+        msg (bool): Show the solver log on stdout
+    """
+
+    backend: str = "CBC"
+    time_limit: float | None = 20.0
+    gap_rel: float | None = None
+    threads: int | None = None
+    msg: bool = False
+
+    def cache_key(self) -> str:
+        """Identify the settings that can change the returned plan."""
+        return f"{self.backend}|{self.time_limit}|{self.gap_rel}"
+
+
+@lru_cache(maxsize=1)
+def _installed() -> tuple:
+    # Probing every PuLP solver is slow-ish, and the installed set can't change at runtime.
+    return tuple(pulp.listSolvers(onlyAvailable=True))
+
+
+def available_backends() -> list[str]:
+    """Return the backend names usable on this machine, friendly aliases first."""
+    installed = _installed()
+    backends = [NATIVE_BACKEND] + [alias for alias, names in _ALIASES.items() if any(name in installed for name in names)]
+    aliased = {name for names in _ALIASES.values() for name in names}
+    return backends + [name for name in installed if name not in aliased]
+
+
+def make_pulp_solver(config: SolverConfig, warm_start: bool = False, mip: bool = True):
+    """Build the PuLP solver object for ``config``.
+
+    The native backend has no PuLP solver object; ``AlchemyOptimizer``
+    dispatches it directly.
+
+    Raises:
+        pulp.PulpSolverError: If the backend is unknown or not installed
+    """
+    if config.backend == NATIVE_BACKEND:
+        raise pulp.PulpSolverError("The native backend is not a PuLP solver; solve through AlchemyOptimizer")
+    installed = _installed()
+    candidates = _ALIASES.get(config.backend, (config.backend,))
+    name = next((candidate for candidate in candidates if candidate in installed), None)
+    if name is None:
+        raise pulp.PulpSolverError(f"Solver backend {config.backend!r} is not available; choose from {available_backends()}")
+
+    kwargs = {"msg": config.msg, "mip": mip, "timeLimit": config.time_limit}
+    if config.gap_rel is not None:
+        kwargs["gapRel"] = config.gap_rel
+    if config.threads is not None:
+        kwargs["threads"] = config.threads
+    if warm_start and name in _WARM_START_SOLVERS:
+        kwargs["warmStart"] = True
+    return pulp.getSolver(name, **kwargs)
@@ -0,0 +1,87 @@
+"""Per-stage timing and on-demand profiling of an app run.
+
+``StageTimer`` records how long each named stage of one script execution
+took (the Gemini image call, the MIP solve, the Sheets write, the inventory
+Styler, the graph render, ...), so a "the app is slow" report can be pinned
+to a stage. ``ProfileCapture`` wraps cProfile and tracemalloc for an admin
+who wants the full hot path of a run as a downloadable file.
+
+Neither class depends on Streamlit; the UI lives in ``src/timing_visualisation.py``.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage, in first-seen order."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a duration measured elsewhere (e.g. the solver's own ``solve_time``)."""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        """Return ``{stage: seconds}`` rounded to the millisecond, plus the script ``total``."""
+        timings = {name: round(seconds, 3) for name, seconds in self.timings.items()}
+        timings["total"] = round(time.perf_counter() - self.started, 3)
+        return timings
+
+
+class ProfileCapture:
+    """cProfile plus tracemalloc over one script execution.
+
+    Call ``start()`` early in the script and ``stop()`` at the end; the
+    results are kept as ``stats_bytes`` (a ``.prof`` file readable by
+    ``pstats``/snakeviz) and ``report`` (a plain-text summary of the hottest
+    functions and the largest allocation sites).
+    """
+
+    def __init__(self, top: int = 30):
+        self.top = top
+        self._profiler = cProfile.Profile()
+        self._tracing = False
+        self.stats_bytes = None
+        self.report = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        self._profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._tracing:
+            tracemalloc.stop()
+
+        self._profiler.create_stats()
+        # Same format as ``Profile.dump_stats`` writes to disk.
+        self.stats_bytes = marshal.dumps(self._profiler.stats)
+
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        out.write(f"\nMemory: {current / 1e6:.1f} MB traced now, {peak / 1e6:.1f} MB peak\n")
+        out.write(f"Top {self.top} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            out.write(f"{stat}\n")
+        self.report = out.getvalue()
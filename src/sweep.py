@@ -0,0 +1,112 @@
+"""Parallel what-if sweeps over many importance (and count) vectors.
+
+Each worker process builds one ``AlchemyOptimizer`` from the compiled recipe
+table when it starts, so every sweep point only costs a solve. Results come
+back as a tidy DataFrame with one row per point.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .optimizer import AlchemyOptimizer
+from .recipes import CompiledRecipes
+from .solvers import SolverConfig
+
+_worker_optimizer = None
+
+
+def _init_worker(recipes: CompiledRecipes, solver_config: SolverConfig | None) -> None:
+    global _worker_optimizer
+    _worker_optimizer = AlchemyOptimizer(recipes, solver_config=solver_config)
+
+
+def _solve_point(point):
+    ingredient_counts, importance_scores = point
+    return _worker_optimizer.optimize(ingredient_counts, importance_scores)
+
+
+def importance_grid(base_scores, loot_type, values) -> list[dict]:
+    """Return one copy of ``base_scores`` per value, with ``loot_type`` set to that value."""
+    return [{**base_scores, loot_type: float(v)} for v in values]
+
+
+def summarise_combos(combos_used) -> str:
+    """Format a plan compactly, e.g. ``"3x Leaf+Petal; 1x Tooth+Tooth"``."""
+    return "; ".join(f"{int(count)}x {combo[0]}+{combo[1]}" for combo, count, _ in combos_used)
+
+
+def run_sweep(recipes: CompiledRecipes, importance_vectors, ingredient_counts, max_workers=None, solver_config=None,
+              loot_type=None) -> pd.DataFrame:
+    """Solve every point of a sweep on a process pool.
+
+    Args:
+        recipes (CompiledRecipes): The compiled recipe table
+        importance_vectors (list): Importance-score dicts, one per point
+        ingredient_counts (dict or list): One counts dict for every point, or a
+            list of counts dicts the same length as ``importance_vectors``
+        max_workers (int, optional): Pool size. Defaults to the CPU count; 1 solves in-process.
+        solver_config (SolverConfig, optional): Backend and limits for every point
+        loot_type (str, optional): The swept loot type; its importance column is
+            kept even when every point has the same value
+
+    Returns:
+        pandas.DataFrame: One row per point with the varying inputs, the score,
+        one column per loot type and a compact summary of the chosen combos
+    """
+    importance_vectors = list(importance_vectors)
+    if isinstance(ingredient_counts, dict):
+        count_vectors = [ingredient_counts] * len(importance_vectors)
+    else:
+        count_vectors = list(ingredient_counts)
+        if len(count_vectors) != len(importance_vectors):
+            raise ValueError("ingredient_counts must be one dict or one per importance vector")
+    points = list(zip(count_vectors, importance_vectors))
+    if not points:
+        return pd.DataFrame()
+
+    workers = min(max_workers or os.cpu_count() or 1, len(points))
+    if workers == 1:
+        _init_worker(recipes, solver_config)
+        outputs = [_solve_point(point) for point in points]
+    else:
+        chunksize = max(1, len(points) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(recipes, solver_config)) as pool:
+            outputs = list(pool.map(_solve_point, points, chunksize=chunksize))
+    return tabulate_sweep(recipes, points, outputs, loot_type)
+
+
+def tabulate_sweep(recipes: CompiledRecipes, points, outputs, loot_type=None) -> pd.DataFrame:
+    """Build the sweep table from ``(counts, importance)`` points and their ``optimize`` outputs.
+
+    ``loot_type`` (the swept loot, if any) always gets its importance column.
+
+    Returns:
+        pandas.DataFrame: One row per point (see ``run_sweep``)
+    """
+    count_vectors = [counts for counts, _ in points]
+    importance_vectors = [importance for _, importance in points]
+    # Only report the inputs that actually vary across the sweep, plus the swept loot type.
+    varying_importance = [
+        name for name in importance_vectors[0]
+        if name == loot_type or len({vector.get(name) for vector in importance_vectors}) > 1
+    ]
+    varying_counts = [
+        name for name in recipes.items
+        if len({counts.get(name) for counts in count_vectors}) > 1
+    ]
+
+    rows = []
+    for point, ((counts, importance), output) in enumerate(zip(points, outputs)):
+        row = {"point": point}
+        row.update({f"{name} importance": importance[name] for name in varying_importance})
+        row.update({f"{name} count": counts[name] for name in varying_counts})
+        row["total_score"] = output["total_score"]
+        row["status"] = output["solver"]["solution_status"]
+        row.update({name: output["total_loot"].get(name, 0.0) for name in recipes.loot_types})
+        row["n_brews"] = int(np.sum([count for _, count, _ in output["combos_used"]]))
+        row["combos"] = summarise_combos(output["combos_used"])
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,62 @@
+"""Plotly views of a what-if sweep (see ``src/sweep.py``).
+
+- Score: the weighted objective at every sweep point.
+- Loot: one line per loot type whose total changes across the sweep, so the
+  plan shifts (e.g. Currency traded for Raid Cards) are easy to spot.
+"""
+
+import plotly.graph_objects as go
+import streamlit as st
+
+
+def render_sweep_results(sweep_df, x_column: str, loot_names) -> None:
+    """Render the score and loot-total charts plus the raw sweep table."""
+    if sweep_df is None or sweep_df.empty:
+        st.info("The sweep returned no points.")
+        return
+
+    score_fig = go.Figure(
+        go.Scatter(
+            x=sweep_df[x_column],
+            y=sweep_df["total_score"],
+            mode="lines+markers",
+            marker_color="#7c5cff",
+            customdata=sweep_df[["combos"]].to_numpy(),
+            hovertemplate="<b>%{x}</b><br>score: %{y}<br>%{customdata[0]}<extra></extra>",
+        )
+    )
+    score_fig.update_layout(
+        yaxis_title="Maximum score",
+        xaxis_title=x_column,
+        margin=dict(l=10, r=10, t=10, b=10),
+        height=320,
+    )
+    st.plotly_chart(score_fig, use_container_width=True)
+
+    # Only plot loot types that are non-zero somewhere and actually change.
+    changing = [
+        name for name in loot_names
+        if name in sweep_df.columns and sweep_df[name].any() and sweep_df[name].nunique() > 1
+    ]
+    if changing:
+        loot_fig = go.Figure()
+        for name in changing:
+            loot_fig.add_trace(go.Scatter(x=sweep_df[x_column], y=sweep_df[name], mode="lines+markers", name=name))
+        loot_fig.update_layout(
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            yaxis_title="Loot obtained",
+            xaxis_title=x_column,
+            margin=dict(l=10, r=10, t=10, b=10),
+            height=360,
+        )
+        st.plotly_chart(loot_fig, use_container_width=True)
+    else:
+        st.caption("Loot totals do not change across this sweep.")
+
+    st.dataframe(sweep_df, use_container_width=True, hide_index=True)
+    st.download_button(
+        "Download sweep data (CSV)",
+        data=sweep_df.to_csv(index=False).encode("utf-8"),
+        file_name="importance_sweep.csv",
+        mime="text/csv",
+    )
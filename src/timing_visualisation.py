@@ -0,0 +1,61 @@
+"""Collapsible per-stage timing breakdown of the last run (see ``src/stage_timing.py``)."""
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+
+def render_stage_timings(timings: dict, profile=None, cache_stats=None) -> None:
+    """Render a bar chart and table of seconds per stage, plus profiler downloads if captured.
+
+    Args:
+        timings (dict): ``{stage: seconds}`` from ``StageTimer.as_dict``
+        profile (ProfileCapture, optional): A stopped capture to offer for download
+        cache_stats (dict, optional): ``ResultCache.stats()`` of the shared result cache
+    """
+    stages = {name: seconds for name, seconds in timings.items() if name != "total"}
+    total = timings.get("total", sum(stages.values()))
+    with st.expander(f"Run timing ({total:.2f}s)", expanded=False):
+        if stages:
+            timing_df = pd.DataFrame({"Stage": list(stages), "Seconds": list(stages.values())})
+            timing_df["Share"] = (timing_df["Seconds"] / max(total, 1e-9)).map("{:.0%}".format)
+            fig = go.Figure(
+                go.Bar(
+                    x=timing_df["Seconds"],
+                    y=timing_df["Stage"],
+                    orientation="h",
+                    marker_color="#7c5cff",
+                    hovertemplate="<b>%{y}</b><br>%{x:.3f}s<extra></extra>",
+                )
+            )
+            fig.update_layout(
+                xaxis_title="Seconds",
+                yaxis=dict(autorange="reversed"),
+                margin=dict(l=10, r=10, t=10, b=10),
+                height=60 + 28 * len(timing_df),
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(timing_df, use_container_width=True, hide_index=True)
+        st.caption("Total is the whole script run, including Streamlit's own rendering between stages.")
+        if cache_stats is not None:
+            st.caption(
+                f"Result cache (this server process): {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['size']} of {cache_stats['maxsize']} entries."
+            )
+
+        if profile is not None and profile.stats_bytes is not None:
+            st.markdown("**Profiler capture**")
+            col1, col2 = st.columns(2)
+            col1.download_button(
+                "Download cProfile stats (.prof)",
+                data=profile.stats_bytes,
+                file_name="run_profile.prof",
+                mime="application/octet-stream",
+            )
+            col2.download_button(
+                "Download summary (.txt)",
+                data=profile.report.encode("utf-8"),
+                file_name="run_profile.txt",
+                mime="text/plain",
+            )
+            st.code(profile.report[:4000], language="text")
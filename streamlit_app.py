@@ -1,67 +1,69 @@
 import streamlit as st
 import pandas as pd
-from pulp import LpMaximize, LpProblem, LpVariable, lpSum, value
-from src.config import get_ingredient_images
+from src.assets import build_thumbnails
+from src.config import ingredient_images_signature, default_importance_scores
 from src.graph_visualisation import render_graph_visualization
-from src.inventory_tracking import track_inventory_from_formatted_combos
-from src.inventory_tracking import highlight_changes
+from src.inventory_tracking import inventory_history, inventory_table
+from src.schedule import brew_steps, schedule_brews, verify_schedule
 import os
 import hashlib
 from src.genai_client import extract_counts_from_image
+from src.optimizer import AlchemyOptimizer, IncrementalSession
+from src.recipe_catalog import DEFAULT_EVENT, RecipeCatalog
 from src.render_combo import render_results
-from src.run_logging import log_run, fetch_runs, is_logging_configured
+from src.result_cache import ResultCache
+from src.marginal_values import marginal_values
+from src.multiday import plan_with_baseline
+from src.multiday_visualisation import render_multiday_plan
+from src.pareto import pareto_frontier
+from src.pareto_visualisation import render_pareto_frontier
+from src.solvers import SolverConfig, available_backends
+from src.sweep import importance_grid, run_sweep
+from src.sweep_visualisation import render_sweep_results
+from src.run_logging import log_run, fetch_runs, is_logging_configured, runs_for_event
 from src.run_visualisation import render_runs_analysis
+from src.stage_timing import ProfileCapture, StageTimer
+from src.timing_visualisation import render_stage_timings
 
-ingredient_images = get_ingredient_images()
-
-# Load the CSV file
-file_path = 'TT2 Alchemy Event.csv'
-df = pd.read_csv(file_path, index_col=0)
-
-# Combined function to extract loot (including currency and handling specific keywords)
-def extract_loot(value, importance_keys):
-    if isinstance(value, str):
-        value = value.strip()
-        parts = value.split()
-        try:
-            amount = int(parts[0])
-            item_type = ' '.join(parts[1:])
-            for key in importance_keys:
-                if key in item_type:
-                    return (key, amount)
-            return (item_type, amount)
-        except (ValueError, IndexError):
-            sorted_keys = sorted(importance_keys, key=len, reverse=True)
-            for key in sorted_keys:
-                if key in value:
-                    return (key, 1)
-    return ('Unknown', 0)
-
-# Default importance scores
-default_importance_scores = {
-    "Currency": 100,
-    "Crafting Shards": 1,
-    "Perk Tickets": 1,
-    "Skill Points": 1,
-    "Eggs": 1,
-    "Raid Cards": 1,
-    "Wildcards": 1,
-    "Common Equipment": 1,
-    "Rare Equipment": 1,
-    "Legendary Equipment": 1,
-    "Event Equipment": 1,
-    "Clan Scroll": 1,
-    "Fortune Scroll": 1,
-    "Fortune Weapons": 1,
-    "Hero Weapons": 1
-}
-
-# Apply the function to the dataframe
-loot_df = df.map(lambda x: extract_loot(x, default_importance_scores.keys()))
-
-# Extracting relevant data for optimization
-items = list(df.index)
-combinations = [(i, j) for i in items for j in items if i <= j]
+# Admins (secret token in the ?admin= query param) get the raw export and can profile runs with &profile=1.
+try:
+    admin_token = st.secrets.get("admin_token")
+except Exception:
+    admin_token = None
+is_admin = bool(admin_token) and st.query_params.get("admin") == admin_token
+
+# Time each stage of this script run; the breakdown of the last optimizer run is shown at the bottom.
+timer = StageTimer()
+profile = ProfileCapture() if is_admin and st.query_params.get("profile") else None
+if profile is not None:
+    profile.start()
+
+
+@st.cache_resource(show_spinner=False)
+def load_ingredient_images(signature, serve_static):
+    """Build the 40x40 icon thumbnails once per process (and again only if an icon file changes)."""
+    return build_thumbnails(serve_static=serve_static)
+
+
+@st.cache_resource(show_spinner=False)
+def get_catalog():
+    """One recipe catalog per server process; compiled tables are cached on disk between restarts."""
+    return RecipeCatalog(os.path.dirname(os.path.abspath(__file__)), default_importance_scores.keys())
+
+
+@st.cache_resource(show_spinner=False)
+def get_optimizer(fingerprint, _recipes):
+    """Build the solver model once per distinct recipe table (keyed by its fingerprint).
+
+    The optimizer carries an LRU result cache shared by all sessions, so the
+    common default submissions are answered without re-solving.
+    """
+    return AlchemyOptimizer(_recipes, cache=ResultCache(maxsize=256))
+
+
+# Static work is cached per process; only user-dependent work below runs on every interaction.
+ingredient_images = load_ingredient_images(ingredient_images_signature(), st.get_option("server.enableStaticServing"))
+catalog = get_catalog()
 
 # Streamlit inputs
 st.set_page_config(layout="wide")
@@ -70,6 +72,13 @@ st.title("TT2 Alchemy Event Optimizer")
 st.success("Updated for June 2026 Event! For any feedback or bugs, please reach out to peterbarkat@gmail.com")
 st.info('If the app is running slowly, try these alternative links: [V2](https://tt2optimiser-v2.streamlit.app/), [V3](https://tt2optimiser-v3.streamlit.app/), [V4](https://tt2optimiser-v4.streamlit.app/), [V5](https://tt2optimiser-v5.streamlit.app/).')
 
+# Switching events is a catalog lookup; each table is parsed and compiled once.
+events = catalog.events()
+event = st.selectbox("Event", events, index=events.index(DEFAULT_EVENT) if DEFAULT_EVENT in events else 0)
+df, recipes = catalog.load(event)
+items = list(df.index)
+optimizer = get_optimizer(recipes.fingerprint, recipes)
+
 # Editable dataframe for the CSV data
 with st.expander("Edit CSV Data", expanded=False):
     edited_df = st.data_editor(df)
@@ -104,7 +113,7 @@ with col1:
 
         # Only call the Google model when a new image is uploaded
         if st.session_state.get("last_uploaded_image_hash") != image_hash or "extracted_counts" not in st.session_state:
-            with st.spinner("Calling Google model..."):
+            with st.spinner("Calling Google model..."), timer.stage("Gemini image extraction"):
                 raw_text, counts_dict = extract_counts_from_image(
                     image_bytes=image_bytes,
                     mime_type=mime_type,
@@ -131,8 +140,6 @@ with col1:
     for index, row in edited_ingredient_data.iterrows():
         ingredient_counts[row["Ingredient"]] = int(row["Count"])
 
-    print(ingredient_counts)
-
 with col2:
     st.subheader("Importance Scores")
     st.caption("Tip: You can set 'importance' to the number of gems you'd pay for each loot type to compare rewards fairly.")
@@ -147,82 +154,206 @@ with col2:
     for index, row in edited_importance_data.iterrows():
         importance_scores[row["Loot Type"]] = float(row["Importance"])
 
-st.divider()
-if st.button("Run optimizer", type="primary"):
-    prob = LpProblem("Maximize Loot Score", LpMaximize)
-
-    combo_vars = LpVariable.dicts("Combo", combinations, lowBound=0, cat='Integer')
-
-    prob += lpSum([
-        importance_scores.get(extract_loot(df.loc[combo], importance_scores.keys())[0], 0) * extract_loot(df.loc[combo], importance_scores.keys())[1] * combo_vars[combo]
-        for combo in combinations
-    ])
-
-    for item in items:
-        used = lpSum([combo_vars[combo] for combo in combinations if combo[0] == item]) + \
-               lpSum([combo_vars[combo] for combo in combinations if combo[1] == item])
-        created = lpSum([combo_vars[combo] for combo in combinations if df.loc[combo] == item])
-        prob += used <= ingredient_counts[item] + created
-
-    prob.solve()
-
-    combos_used = [(combo, value(var), df.loc[combo]) for combo, var in combo_vars.items() if value(var) > 0]
-
-    total_loot = {}
-    formatted_combos = []
-    total_score = 0
-
-    combos_used = sorted(combos_used, key=lambda x: items.index(x[0][0]))
-    combos_used = sorted(combos_used, key=lambda x: any(key in x[2] for key in importance_scores.keys()))
-
-    for combo, count, product in combos_used:
-        product_name, product_amount = extract_loot(product, importance_scores.keys())
-        if product_name in total_loot:
-            total_loot[product_name] += product_amount * count
-        else:
-            total_loot[product_name] = product_amount * count
-        total_score += importance_scores.get(product_name, 0) * product_amount * count
-        formatted_combos.append({
-            'input1': combo[0],
-            'input2': combo[1],
-            'count': count,
-            'result': product,
-            'is_ingredient': not any(key in product for key in importance_scores.keys() if isinstance(product, str))
-        })
-
-    st.session_state["optimization_output"] = {
-        "total_score": total_score,
-        "combos_used": combos_used,
-        "total_loot": total_loot,
-        "formatted_combos": formatted_combos,
-        "ingredient_counts": dict(ingredient_counts),
-    }
-
-    # Log this run to the persistent backend for the community statistics.
-    log_run(
-        ingredient_counts=dict(ingredient_counts),
-        importance_scores=dict(importance_scores),
-        ingredient_order=items,
-        loot_order=list(default_importance_scores.keys()),
+# Solver limits come from the deployment (secrets) so a single request can't hold a worker indefinitely.
+try:
+    solver_secrets = dict(st.secrets.get("solver", {}))
+except Exception:
+    solver_secrets = {}
+backends = available_backends()
+default_backend = solver_secrets.get("backend", "CBC")
+
+with st.expander("Solver settings", expanded=False):
+    solver_col1, solver_col2 = st.columns(2)
+    solver_backend = solver_col1.selectbox(
+        "Backend", backends, index=backends.index(default_backend) if default_backend in backends else 0
     )
+    solver_gap = solver_col2.number_input(
+        "Relative MIP gap (%)", min_value=0.0, max_value=50.0, value=float(solver_secrets.get("gap_percent", 0.0)),
+        help="0 solves to proven optimality; a larger gap may return a slightly worse plan sooner.",
+    )
+solver_config = SolverConfig(
+    backend=solver_backend,
+    time_limit=float(solver_secrets.get("time_limit", 20.0)),
+    gap_rel=solver_gap / 100 if solver_gap > 0 else None,
+    threads=solver_secrets.get("threads"),
+)
+
+st.divider()
+run_clicked = st.button("Run optimizer", type="primary")
+if run_clicked:
+    # Keep the previous plan per session so small edits re-solve from a warm start.
+    session = st.session_state.get("incremental_session")
+    if session is None or session.optimizer is not optimizer:
+        session = IncrementalSession(optimizer)
+        st.session_state["incremental_session"] = session
+
+    preview = st.empty()
+    if session.change_kind(ingredient_counts, importance_scores, solver_config) == "objective":
+        rescored = session.rescore(importance_scores)
+        preview.info(f"Previous plan re-scored with the new importance scores: {int(rescored['total_score'])}. Re-optimising...")
+    with timer.stage("Optimize (solve)"):
+        st.session_state["optimization_output"] = session.optimize(ingredient_counts, importance_scores, solver=solver_config)
+    preview.empty()
 
 if "optimization_output" not in st.session_state:
     st.info("Set your ingredients and importance scores, then click **Run optimizer** to see results.")
 else:
     o = st.session_state["optimization_output"]
     render_results(o["total_score"], o["combos_used"], o["total_loot"], ingredient_images)
+    if o.get("solver"):
+        info = o["solver"]
+        if info["optimal"]:
+            st.caption(f"Solved to optimality with {info['backend']} in {info['solve_time']:.2f}s.")
+        else:
+            gap = f"{info['gap']:.2%}" if info["gap"] is not None else "unknown"
+            st.warning(f"{info['backend']} stopped early ({info['solution_status']}); gap to the best possible score: {gap}.")
+    if o.get("presolve") and o["presolve"]["pruned"]:
+        p = o["presolve"]
+        st.caption(f"Left out {p['pruned']} of {p['kept'] + p['pruned']} combinations before solving: "
+                   f"{p['zero_value']} can never add score, {p['unobtainable']} need an ingredient you can't get.")
 
     st.subheader("Check brews:")
-    st.write("Changes in the quantities are highlighted in yellow")
-    df = track_inventory_from_formatted_combos(o["ingredient_counts"], o["formatted_combos"])
-
-    styled_df = highlight_changes(df)
-    st.write(styled_df)
+    st.write("Each step's changes are listed next to its action")
+    # The inventory history only depends on the plan, so build it once per plan rather than per rerun.
+    if st.session_state.get("inventory_plan") is not o:
+        with timer.stage("Inventory tracking"):
+            st.session_state["brew_steps"] = brew_steps(o["ingredient_counts"], o["formatted_combos"])
+            inventory_df = inventory_history(st.session_state["brew_steps"])
+            st.session_state["schedule_violations"] = verify_schedule(o["ingredient_counts"], schedule_brews(o["formatted_combos"]))
+        with timer.stage("Inventory table"):
+            st.session_state["inventory_table"] = inventory_table(inventory_df)
+        st.session_state["inventory_plan"] = o
+    for violation in st.session_state["schedule_violations"]:
+        st.warning(f"Step {violation['step']} needs {violation['required']:g} {violation['item']} "
+                   f"but only {violation['available']:g} are on hand at that point.")
+    st.dataframe(
+        st.session_state["inventory_table"],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Step": st.column_config.TextColumn(pinned=True),
+            "Action": st.column_config.TextColumn(width="large", pinned=True),
+            "Changes": st.column_config.TextColumn(width="large"),
+        },
+    )
 
     with st.expander("Visualise results - (Experimental)", expanded=False):
-        render_graph_visualization(
-            o["combos_used"], o["ingredient_counts"], o["total_loot"], o["formatted_combos"]
-        )
+        with timer.stage("Graph render"):
+            render_graph_visualization(st.session_state["brew_steps"])
+
+    with st.expander("Marginal ingredient values", expanded=False):
+        st.caption("How much score one extra unit of each ingredient would add to this plan, i.e. which ingredient to farm next.")
+        exact_marginals = st.checkbox("Also compute exact integer values (one bounded re-solve per ingredient)", value=True)
+        if st.button("Compute marginal values"):
+            with st.spinner("Computing marginal values..."):
+                st.session_state["marginal_output"] = marginal_values(
+                    optimizer, o["ingredient_counts"], importance_scores, exact=exact_marginals, solver_config=solver_config
+                )
+        if "marginal_output" in st.session_state:
+            marginal_df, reduced_cost_df = st.session_state["marginal_output"]
+            st.dataframe(marginal_df, use_container_width=True, hide_index=True)
+            st.markdown("**Reduced costs of unused combinations** (score lost per brew if forced into the plan)")
+            st.dataframe(reduced_cost_df, use_container_width=True, hide_index=True)
+
+    with st.expander("Alternative plans", expanded=False):
+        st.caption("Other good plans for the same inputs. Each one skips at least one brew of every plan to its left, "
+                   "e.g. to keep some ingredients for later.")
+        alt_col1, alt_col2 = st.columns(2)
+        alt_count = alt_col1.number_input("Plans", min_value=2, max_value=6, value=3, step=1)
+        alt_tolerance = alt_col2.number_input("Score tolerance (%)", min_value=0.0, max_value=50.0, value=1.0,
+                                              help="How far below the best score an alternative may be.")
+        if st.button("Find alternative plans"):
+            with st.spinner("Finding alternative plans..."):
+                st.session_state["alternative_plans"] = optimizer.top_plans(
+                    o["ingredient_counts"], importance_scores, k=int(alt_count), tolerance=alt_tolerance / 100,
+                    solver=solver_config,
+                )
+        if "alternative_plans" in st.session_state:
+            plans = st.session_state["alternative_plans"]
+            if len(plans) == 1:
+                st.info("No other plan is within the score tolerance.")
+            for plan, column in zip(plans, st.columns(len(plans))):
+                with column:
+                    st.markdown(f"**Plan {plan['rank']}**")
+                    render_results(plan["total_score"], plan["combos_used"], plan["total_loot"], ingredient_images)
+
+# --- What-if sweep over one importance score ---
+st.divider()
+with st.expander("What-if sweep", expanded=False):
+    st.caption("Re-solve your current inputs across a range of importance values for one loot type.")
+    sweep_col1, sweep_col2, sweep_col3, sweep_col4 = st.columns(4)
+    sweep_loot = sweep_col1.selectbox("Loot type", list(default_importance_scores.keys()))
+    sweep_min = sweep_col2.number_input("From", min_value=0.0, value=50.0)
+    sweep_max = sweep_col3.number_input("To", min_value=0.0, value=500.0)
+    sweep_steps = sweep_col4.number_input("Points", min_value=2, max_value=200, value=10, step=1)
+    if st.button("Run sweep"):
+        values = [sweep_min + (sweep_max - sweep_min) * k / (sweep_steps - 1) for k in range(int(sweep_steps))]
+        if len(set(values)) < 2:
+            st.warning("Set different From and To values to sweep over.")
+        else:
+            with st.spinner(f"Solving {len(values)} points..."):
+                st.session_state["sweep_output"] = {
+                    "loot_type": sweep_loot,
+                    "df": run_sweep(
+                        optimizer.recipes, importance_grid(importance_scores, sweep_loot, values), dict(ingredient_counts),
+                        solver_config=solver_config, loot_type=sweep_loot,
+                    ),
+                }
+    if "sweep_output" in st.session_state:
+        sweep = st.session_state["sweep_output"]
+        render_sweep_results(sweep["df"], f"{sweep['loot_type']} importance", list(default_importance_scores.keys()))
+
+# --- Pareto frontier between two loot types ---
+st.divider()
+with st.expander("Trade-off between two loot types", expanded=False):
+    st.caption("Every plan that can't get more of one loot type without giving up some of the other, "
+               "including plans no choice of importance scores would pick.")
+    loot_options = list(default_importance_scores.keys())
+    pareto_col1, pareto_col2, pareto_col3 = st.columns(3)
+    pareto_x = pareto_col1.selectbox("Loot type (x axis)", loot_options, index=0)
+    pareto_y = pareto_col2.selectbox("Loot type (y axis)", loot_options, index=loot_options.index("Fortune Scroll"))
+    pareto_points = pareto_col3.number_input("Points", min_value=2, max_value=60, value=12, step=1, key="pareto_points")
+    if st.button("Compute frontier", disabled=pareto_x == pareto_y):
+        with st.spinner(f"Solving {int(pareto_points)} points..."):
+            st.session_state["pareto_output"] = {
+                "loot_x": pareto_x,
+                "loot_y": pareto_y,
+                "frontier": pareto_frontier(
+                    optimizer.recipes, dict(ingredient_counts), importance_scores, pareto_x, pareto_y,
+                    points=int(pareto_points), solver_config=solver_config,
+                ),
+            }
+            st.session_state.pop("pareto_loaded", None)
+    if "pareto_output" in st.session_state:
+        pareto = st.session_state["pareto_output"]
+        selected = render_pareto_frontier(pareto["frontier"], pareto["loot_x"], pareto["loot_y"])
+        # Load a clicked plan once; the rerun shows it in the results section above.
+        if selected is not None and st.session_state.get("pareto_loaded") != selected:
+            st.session_state["pareto_loaded"] = selected
+            st.session_state["optimization_output"] = pareto["frontier"][selected]
+            st.rerun()
+
+# --- Multi-day plan with expected daily income ---
+st.divider()
+with st.expander("Multi-day plan", expanded=False):
+    st.caption("Plan the rest of the event: brews are chosen for today while looking a few days ahead at the "
+               "ingredients you expect to receive each day, and compared with brewing everything today.")
+    plan_col1, plan_col2 = st.columns(2)
+    plan_days = plan_col1.number_input("Days left (including today)", min_value=1, max_value=60, value=5, step=1)
+    plan_window = plan_col2.number_input("Look-ahead window (days)", min_value=1, max_value=7, value=3, step=1,
+                                         help="Days planned together in each solve; larger windows are slower.")
+    income_data = pd.DataFrame({"Ingredient": items, "Per day": [0] * len(items)})
+    edited_income_data = st.data_editor(income_data, num_rows="fixed", use_container_width=True, hide_index=True,
+                                        key="daily_income_editor")
+    daily_income = {row["Ingredient"]: int(row["Per day"]) for _, row in edited_income_data.iterrows()}
+    if st.button("Plan days"):
+        with st.spinner(f"Planning {int(plan_days)} days..."):
+            st.session_state["multiday_output"] = plan_with_baseline(
+                optimizer.recipes, dict(ingredient_counts), daily_income, importance_scores, int(plan_days),
+                window=int(plan_window), solver_config=solver_config, optimizer=optimizer,
+            )
+    if "multiday_output" in st.session_state:
+        render_multiday_plan(*st.session_state["multiday_output"])
 
 # --- Community run statistics (aggregated across all logged runs) ---
 st.divider()
@@ -231,17 +362,13 @@ with st.expander("Community run statistics", expanded=False):
         st.info("Run logging is not configured. Add the Google Sheets backend in secrets to enable this section.")
     else:
         runs_df = fetch_runs()
-        render_runs_analysis(runs_df, ingredient_names=items, loot_names=list(default_importance_scores.keys()))
+        render_runs_analysis(
+            runs_for_event(runs_df, event, DEFAULT_EVENT),
+            ingredient_names=items, loot_names=list(default_importance_scores.keys()),
+        )
 
         # Admin-only raw export, gated by a secret token in the URL query param.
-        admin_token = None
-        try:
-            admin_token = st.secrets.get("admin_token")
-        except Exception:
-            admin_token = None
-        provided_token = st.query_params.get("admin")
-
-        if admin_token and provided_token == admin_token:
+        if is_admin:
             st.divider()
             st.subheader("Admin export")
             if runs_df is not None and not runs_df.empty:
@@ -253,3 +380,30 @@ with st.expander("Community run statistics", expanded=False):
                 )
             else:
                 st.info("No runs to export yet.")
+
+# --- Run timing (and the admin profiler capture) for the last optimizer run ---
+if run_clicked:
+    # Queue this run for the persistent backend (written in the background), with its stage timings.
+    with timer.stage("Sheets log write"):
+        log_run(
+            ingredient_counts=dict(ingredient_counts),
+            importance_scores=dict(importance_scores),
+            ingredient_order=items,
+            loot_order=list(default_importance_scores.keys()),
+            stage_timings=timer.as_dict(),
+            event=event,
+        )
+    st.session_state["run_timings"] = timer.as_dict()
+    if profile is not None:
+        profile.stop()
+        st.session_state["run_profile"] = profile
+elif profile is not None:
+    profile.stop()
+
+if "run_timings" in st.session_state:
+    st.divider()
+    render_stage_timings(
+        st.session_state["run_timings"],
+        st.session_state.get("run_profile") if is_admin else None,
+        cache_stats=optimizer.cache.stats() if is_admin else None,
+    )